@@ -14,11 +14,12 @@ from app.anesthetic_risk.handlers.check_correct_values import (check_correct_val
 from app.anesthetic_risk.handlers.result import print_result
 from app.anesthetic_risk.keyboards.inline_kb_anesthetic import inline_anest
 
-from app.anesthetic_risk.keyboards.keyboard_operation import kb_operation
-from app.anesthetic_risk.keyboards.keyboard_patient import kb_patient
-from app.anesthetic_risk.keyboards.keyboards_character import kb_character
+from app.anesthetic_risk.keyboards.keyboard_operation import kb_operation, operation_codec
+from app.anesthetic_risk.keyboards.keyboard_patient import kb_patient, patient_codec
+from app.anesthetic_risk.keyboards.keyboards_character import kb_character, character_codec
+from app.storage.transitions import restart_state, advance_state, finish_state
 
-anesthesia_router = Router()
+anesthesia_router = Router(name='anesthesia_router')
 
 
 class Reg(StatesGroup):
@@ -30,6 +31,13 @@ class Reg(StatesGroup):
     character = State()  # характер анастезии.
 
 
+def calculate_anesthetic_risk(data: dict) -> str:
+    """Результат оценки риска по данным сценария: номера вариантов переводятся обратно в текст."""
+    return print_result(get_operate_patient(patient_codec.decode(data['patient']).lower()),
+                        get_operate_operation(operation_codec.decode(data['operation']).lower()),
+                        get_operate_character(character_codec.decode(data['character']).lower()))
+
+
 @anesthesia_router.message(Command('anesthetic_risk'))
 async def start_Read_user_dataPatient(message: types.Message, state: FSMContext):
     """
@@ -40,9 +48,7 @@ async def start_Read_user_dataPatient(message: types.Message, state: FSMContext)
     - Устанавливает состояние Reg.patient для сбора информации о состоянии пациента.
     - Отправляет сообщение пользователю с выбором состояния больного и соответствующей клавиатурой.
     """
-    await state.clear()  # Очистка состояния!
-
-    await state.set_state(Reg.patient)  # Установка состояния Reg.patient.
+    await restart_state(state, Reg.patient)  # Очистка состояния и установка состояния Reg.patient.
 
     await message.answer(f'Выбрали: Оценка операционно-анестезиологического риска (MHOAP-89)')
     await message.answer(f'Выберите состояние больного: ', reply_markup=kb_patient())
@@ -65,9 +71,7 @@ async def start_callbacks(callback: CallbackQuery, state: FSMContext):
 
      :return None
      """
-    await state.clear()  # Очистка состояния!
-
-    await state.set_state(Reg.patient)  # Установка состояния Reg.patient.
+    await restart_state(state, Reg.patient)  # Очистка состояния и установка состояния Reg.patient.
 
     await callback.message.answer(f'Выбрали: оценка операционно-анестезиологического риска (MHOAP-89)')
     await callback.answer(f'Оценка опер. анестезиологического риска')
@@ -83,8 +87,8 @@ async def read_user_dataOperation(message: types.Message, state: FSMContext):
         await message.reply(f'<b>Выберите корректное значение из предложенного!</b>', reply_markup=kb_patient())
         return
 
-    await state.update_data(patient=message.text.lower())  # сохраняем результат.
-    await state.set_state(Reg.operation)  # Установка состояния Reg.operation.
+    # сохраняем номер выбранного варианта, установка состояния Reg.operation.
+    await advance_state(state, Reg.operation, patient=patient_codec.encode(message.text))
 
     await message.answer(f'Выберите характер операции: ', reply_markup=kb_operation())
 
@@ -98,8 +102,8 @@ async def read_user_dataCharacter(message: types.Message, state: FSMContext):
         await message.reply(f'<b>Выберите корректное значение из предложенного!</b>', reply_markup=kb_operation())
         return
 
-    await state.update_data(operation=message.text.lower())  # сохраняем результат.
-    await state.set_state(Reg.character)
+    # сохраняем номер выбранного варианта, установка состояния Reg.character.
+    await advance_state(state, Reg.character, operation=operation_codec.encode(message.text))
 
     await message.answer(f'Выберите характер анастезии: ', reply_markup=kb_character())
 
@@ -113,18 +117,14 @@ async def save_data_user(message: types.Message, state: FSMContext):
         await message.reply(f'<b>Выберите корректное значение из предложенного!</b>', reply_markup=kb_character())
         return
 
-    await state.update_data(character=message.text.lower())
-    data = await state.get_data()
+    # сохраняем результат, получаем все данные и очищаем состояние.
+    data = await finish_state(state, character=character_codec.encode(message.text))
 
-    # Получение сохраненных данных (FSM) и возврат результата
-    total_result = print_result(get_operate_patient(data['patient']),
-                                get_operate_operation(data['operation']),
-                                get_operate_character(data['character']))
+    # Получение сохраненных данных (FSM): номера вариантов переводятся обратно в текст, возврат результата
+    total_result = calculate_anesthetic_risk(data)
 
     # вывод значения
     await message.answer(f'{total_result}')
 
-    await state.clear()  # очистка состояния.
-
     # Меню: на стартовую страницу или вернуться назад
     await message.answer(f'Выберите действие: ', reply_markup=inline_anest())
\ No newline at end of file
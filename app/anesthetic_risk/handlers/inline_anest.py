@@ -0,0 +1,19 @@
+# Оценка операционно-анестезиологического риска в одном сообщении (WIZARD_MODE=inline):
+# те же шаги, что в handler_main_anest.py.
+from app.anesthetic_risk.handlers.handler_main_anest import Reg, calculate_anesthetic_risk
+from app.anesthetic_risk.keyboards.inline_kb_anesthetic import inline_anest
+from app.anesthetic_risk.keyboards.keyboard_operation import operation_codec
+from app.anesthetic_risk.keyboards.keyboard_patient import patient_codec
+from app.anesthetic_risk.keyboards.keyboards_character import character_codec
+from app.wizard.inline import Choice, InlineWizard
+
+anesthesia_wizard = InlineWizard(
+    'anesthetic_risk', 'Оценка операционно-анестезиологического риска (MHOAP-89)',
+    [
+        Choice(Reg.patient, 'patient', 'Состояние больного', 'Выберите состояние больного:', patient_codec),
+        Choice(Reg.operation, 'operation', 'Характер операции', 'Выберите характер операции:', operation_codec),
+        Choice(Reg.character, 'character', 'Характер анестезии', 'Выберите характер анестезии:', character_codec),
+    ],
+    result=calculate_anesthetic_risk, menu=inline_anest)
+
+anesthesia_inline_router = anesthesia_wizard.router
@@ -1,5 +1,7 @@
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
 
+from app.storage.codec import OptionCodec
+
 ONE = ('Нет гипотензии')
 
 TWO = ('АДср < 70 мм.рт.ст.')
@@ -10,6 +12,9 @@ FOUR = ('Допамин > 5 или адреналин <= 0.1 или НА <= 0.1'
 
 FIVE = ('Допамин > 15 или адреналин > 0.1 или НА > 0.1')
 
+# В данных FSM ответ хранится номером кнопки.
+hypotension_codec = OptionCodec(ONE, TWO, THREE, FOUR, FIVE)
+
 
 def kb_hypotension() -> ReplyKeyboardMarkup:
     key_typle = [[KeyboardButton(text=ONE)],
@@ -1,5 +1,7 @@
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
 
+from app.storage.codec import OptionCodec
+
 ONE = ('Малые полостные или небольшие (операции на поверхности тела)')
 
 TWO = ('Более сложные и длительные (операции на поверх. тела, позвоночнике, ЦНС, и внут. орг)')
@@ -10,6 +12,9 @@ FOUR = ('Сердечно-сосудистые без ИК')
 
 FIVE = ('Операции с ИК или пересадки внутр. орг')
 
+# В данных FSM ответ хранится номером кнопки.
+operation_codec = OptionCodec(ONE, TWO, THREE, FOUR, FIVE)
+
 
 def kb_operation() -> ReplyKeyboardMarkup:
     key_typle = [[KeyboardButton(text=ONE)],
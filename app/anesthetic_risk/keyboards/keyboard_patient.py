@@ -1,5 +1,7 @@
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
 
+from app.storage.codec import OptionCodec
+
 SATISFACTORY = ('Удовлетворительное (соматически здоровые без системных заболеваний)')
 
 AVERAGE = ('Средней тяжести (легкие/умеренные системные расcтройства)')
@@ -10,6 +12,9 @@ EXTREMELY_SEVERE = ('Крайне тяжелое (системные расст
 
 TERMINAL = ('Терминальное (с выраженными явлениями декомпенсации при кот.ожидается смерть)')
 
+# В данных FSM ответ хранится номером кнопки.
+patient_codec = OptionCodec(SATISFACTORY, AVERAGE, HEAVY, EXTREMELY_SEVERE, TERMINAL)
+
 
 def kb_patient() -> ReplyKeyboardMarkup:
     key_typle = [[KeyboardButton(text=SATISFACTORY)],
@@ -1,5 +1,7 @@
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
 
+from app.storage.codec import OptionCodec
+
 ONE = ('Потенцированная местная')
 
 TWO = ('Регионарная или общая с самостоятельным дыханием')
@@ -10,6 +12,9 @@ FOUR = ('Комбинированная эндотрахеальная + рег
 
 FIVE = ('Эндотрахеальная комбинированная + спец. методы (ИК, ГБО)')
 
+# В данных FSM ответ хранится номером кнопки.
+character_codec = OptionCodec(ONE, TWO, THREE, FOUR, FIVE)
+
 
 def kb_character() -> ReplyKeyboardMarkup:
     key_typle = [[KeyboardButton(text=ONE)],
@@ -0,0 +1,39 @@
+import unittest
+
+from app.anesthetic_risk.handlers.inline_anest import anesthesia_inline_router
+from app.anesthetic_risk.keyboards.keyboard_operation import operation_codec
+from app.anesthetic_risk.keyboards.keyboard_patient import patient_codec
+from app.anesthetic_risk.keyboards.keyboards_character import character_codec
+from app.testing.fake_telegram import make_callback_update
+from app.testing.io_budget import IOBudgetTestCase
+from app.wizard.inline import WizardCallback
+
+ANSWERS = [patient_codec.options[1], operation_codec.options[2], character_codec.options[0]]
+
+
+class TestAnestheticRiskIOBudget(IOBudgetTestCase):
+    """Обращения к Bot API и Redis за полную оценку риска MHOAP-89: команда и три шага с клавиатуры."""
+
+    async def test_command(self):
+        counts = await self.converse(100, '/anesthetic_risk', *ANSWERS)
+        self.assertWithinBudget(counts, telegram=6, redis=6)
+
+    async def test_menu_button(self):
+        counts = await self.converse(100, make_callback_update(100, '/anesthetic_risk'), *ANSWERS)
+        self.assertWithinBudget(counts, telegram=7, redis=6)
+
+
+class TestInlineAnestheticRiskIOBudget(IOBudgetTestCase):
+    """Те же ответы в сценарии в одном сообщении: одно новое сообщение, остальные шаги правят его."""
+    routers = (anesthesia_inline_router,)
+
+    async def test_command(self):
+        buttons = [make_callback_update(100, WizardCallback(wizard='anesthetic_risk', step=step, code=code).pack())
+                   for step, code in enumerate((1, 2, 0))]
+        counts = await self.converse(100, '/anesthetic_risk', *buttons)
+        self.assertEqual(counts.telegram['sendMessage'], 1)
+        self.assertWithinBudget(counts, telegram=7, redis=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
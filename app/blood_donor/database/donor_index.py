@@ -0,0 +1,74 @@
+import logging
+import time
+from types import MappingProxyType
+from typing import Iterable
+
+from config import db_pool
+
+logger = logging.getLogger(__name__)
+
+
+def render_donor(compatible: str, indications: str) -> str:
+    """
+    Текст ответа бота для одной строки таблицы donor.
+
+    :param compatible: Совместимый фенотип (колонка compatible).
+    :param indications: Фенотипы при экстренных показаниях к трансфузии (колонка indications).
+    :return: Строка с HTML-разметкой.
+    """
+    return (f'Cовместимый фенотип: \n'
+            f'<b>{compatible.strip()}</b> \n'
+            f'\n'
+            f'При экстренных показаниях к трансфузии (переливанию): \n'
+            f'<b>{indications.strip()}</b>')
+
+
+class DonorIndex:
+    """
+    Неизменяемый индекс таблицы donor в памяти: фенотип реципиента -> готовый текст ответа.
+
+    Строится целиком при загрузке и после этого не меняется; перезагрузка создает новый индекс
+    и подменяет ссылку на него, поэтому чтение не требует блокировок.
+
+    :param rows: Строки (recipient, compatible, indications).
+    """
+
+    def __init__(self, rows: Iterable[tuple[str, str, str]] = ()):
+        self.replies = MappingProxyType({recipient.strip(): render_donor(compatible, indications)
+                                         for recipient, compatible, indications in rows})
+        self.loaded_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self.replies)
+
+    def get(self, recipient: str) -> str | None:
+        """Текст ответа для фенотипа реципиента или None, если фенотипа нет в таблице."""
+        return self.replies.get(recipient)
+
+
+# Текущий индекс. Пустой до первой загрузки (on_startup в run.py).
+_index = DonorIndex()
+
+
+def get_donor_index() -> DonorIndex:
+    return _index
+
+
+def set_donor_index(index: DonorIndex) -> None:
+    """Подменяет текущий индекс готовым (нагрузочный стенд, тесты) без обращения к базе данных."""
+    global _index
+    _index = index
+
+
+async def reload_donor_index(table_name='donor') -> DonorIndex:
+    """
+    Загружает таблицу donor из Postgres и подменяет текущий индекс.
+    Если загрузка не удалась, исключение пробрасывается, а прежний индекс остается.
+    """
+    global _index
+
+    rows = await db_pool.fetch(f'SELECT recipient, compatible, indications FROM {table_name}', name='donor.load')
+
+    _index = DonorIndex((row['recipient'], row['compatible'], row['indications']) for row in rows)
+    logger.info('Индекс доноров загружен: %d фенотипов', len(_index))
+    return _index
@@ -1,5 +1,6 @@
 import asyncio
-from config import db_manager
+from config import db_pool
+from app.blood_donor.database.donor_index import render_donor
 
 
 async def get_table_donor(recipient: str, table_name='donor') -> str:
@@ -18,33 +19,23 @@ async def get_table_donor(recipient: str, table_name='donor') -> str:
       показаниях к трансфузии.
 
     Описание работы функции:
-    1. Устанавливает асинхронное соединение с менеджером базы данных.
+    1. Берет соединение из общего пула соединений.
     2. Извлекает данные о совместимых донорах, соответствующих указанному
        реципиенту, включая совместимый фенотип и показания.
-    3. Преобразует полученные данные в обычный список.
-    4. Форматирует и возвращает строку с информацией о совместимом фенотипе и
+    3. Форматирует и возвращает строку с информацией о совместимом фенотипе и
        экстренных показаниях к трансфузии.
 
     Пример использования:
     recipient = 'CcDee'
     result = await get_table_donor(recipient)
     """
-    async with db_manager:
-        info = await db_manager.select_data(table_name=table_name,
-                                            where_dict=[{'recipient': recipient}],
-                                            columns=['compatible', 'indications'],
-                                            one_dict=False)
-
-    # if not info:
-    #     return None  # Возвращаем None, если данных нет
-
-    recipient_list = sum([list(d.values()) for d in info], [])
-
-    return (f'Cовместимый фенотип: \n'
-            f'<b>{recipient_list[0].strip()}</b> \n'
-            f'\n'
-            f'При экстренных показаниях к трансфузии (переливанию): \n'
-            f'<b>{recipient_list[1].strip()}</b>')
+    info = await db_pool.fetchrow(f'SELECT compatible, indications FROM {table_name} WHERE recipient = $1',
+                                  recipient, name='donor.lookup')
+
+    if info is None:
+        return None  # Возвращаем None, если данных нет
+
+    return render_donor(info['compatible'], info['indications'])
 
 # recipient = 'CcDee'
 # #recipient = '1'
@@ -1,22 +1,21 @@
-import asyncio
-
 from aiogram import Router, types, F
 from aiogram.types import CallbackQuery
 from aiogram.utils.markdown import hbold, hitalic
 
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.enums import ChatAction
 
+from app.blood_donor.database.donor_index import get_donor_index
 from app.blood_donor.database.get_table import get_table_donor
 
 from aiogram.filters import Command
 
 from app.blood_donor.handlers.check_correct import СheckСorrectPhenotype
 from app.blood_donor.inline_kb_donor import inline_donor
+from app.storage.transitions import restart_state, finish_state
 from config import bot
 
-donor_router = Router()
+donor_router = Router(name='donor_router')
 
 
 class Reg(StatesGroup):
@@ -44,9 +43,7 @@ async def cmd_donor(message: types.Message, state: FSMContext):
      None: Функция не возвращает значения, но отправляет сообщение
      пользователю с просьбой ввести фенотип.
      """
-    await state.clear()  # автоматический сброс закрытие сценария заполнения.
-
-    await state.set_state(Reg.phenotype)  # установлено состояние.
+    await restart_state(state, Reg.phenotype)  # сброс сценария заполнения и установлено состояние.
 
     await message.answer(f'{hbold("Введите фенотип реципиента: ")}\n'
                          f'{hitalic("Например: CcDee, CwCDee, ccddee")}')
@@ -65,9 +62,7 @@ async def start_callback(callback: CallbackQuery, state: FSMContext):
     - callback: CallbackQuery - объект, содержащий информацию о колбэке.
     - state: FSMContext - контекст состояния для управления состоянием пользователя.
     """
-    await state.clear()  # автоматический сброс закрытие сценария заполнения.
-
-    await state.set_state(Reg.phenotype)  # установлено состояние.
+    await restart_state(state, Reg.phenotype)  # сброс сценария заполнения и установлено состояние.
 
     await callback.message.answer(f'{hbold("Введите фенотип реципиента: ")}\n'
                                   f'{hitalic("Например: CcDee, CwCDee, ccddee")}')
@@ -80,38 +75,36 @@ async def operate_with_data(message: types.Message, state: FSMContext):
     Обрабатывает введенные пользователем данные о фенотипе реципиента.
 
     Эта функция выполняет следующие действия:
-    1. Отображает действие "печатает" в чате, чтобы показать пользователю, что бот обрабатывает запрос.
-    2. Проверяет корректность введенного фенотипа с помощью функции `СheckСorrectPhenotype`.
-    3. Если фенотип некорректен, отправляет пользователю сообщение с просьбой ввести корректный фенотип.
-    4. Если фенотип корректен, сохраняет его в состоянии и извлекает данные из базы данных о донорах.
-    5. Отправляет пользователю информацию о подходящих донорах.
-    6. Очищает состояние FSM, чтобы подготовить бота к следующему запросу.
-    7. Предлагает пользователю выбрать следующее действие через меню.
+    1. Проверяет корректность введенного фенотипа с помощью функции `СheckСorrectPhenotype`.
+    2. Если фенотип некорректен, отправляет пользователю сообщение с просьбой ввести корректный фенотип.
+    3. Если фенотип корректен, сохраняет его в состоянии и берет ответ из индекса доноров в памяти
+       (если индекс не загружен — из базы данных).
+    4. Отправляет пользователю информацию о подходящих донорах.
+    5. Очищает состояние FSM, чтобы подготовить бота к следующему запросу.
+    6. Предлагает пользователю выбрать следующее действие через меню.
 
     :param message: Объект сообщения, содержащий текст, введенный пользователем.
     :param state: Контекст состояния FSM, используемый для хранения данных между сообщениями.
     """
-    await message.bot.send_chat_action(chat_id=message.from_user.id,
-                                       action=ChatAction.TYPING)  # отображает то, что бот печатает.
-    await asyncio.sleep(1)  # время отображения ответа бота.
-
     # проверяем корректность введенных значений от пользователя
     user = СheckСorrectPhenotype(message.text)
     if user is None:
         await message.reply(f'<b>Введите корректный фенотип!</b>')
         return
 
-    await state.update_data(phenotype=message.text)  # сохраняет введенное пользователем значение phenotype
+    # сохраняет введенное пользователем значение phenotype, получает данные и закрывает сценарий заполнения.
+    data = await finish_state(state, phenotype=message.text)
 
-    data = await state.get_data()
-
-    # получение значения phenotype из базы данных
-    recipient = await get_table_donor(data['phenotype'])
+    # ответ из индекса доноров в памяти; пока индекс не загружен — запрос в базу данных
+    recipient = get_donor_index().get(data['phenotype'])
+    if recipient is None:
+        recipient = await get_table_donor(data['phenotype'])
+    if recipient is None:
+        recipient = f'<b>Фенотип {data["phenotype"]} не найден в таблице совместимости.</b>'
 
     # Вывод результата пользователю
     await message.answer(f'{recipient}')
 
-    await state.clear()  # автоматический сброс закрытие сценария заполнения.
-
     # Меню: на стартовую страницу или вернуться назад
-    await message.answer(f'Выберите действие: ', reply_markup=inline_donor())
\ No newline at end of file
+    await message.answer(f'Выберите действие: ', reply_markup=inline_donor())
+
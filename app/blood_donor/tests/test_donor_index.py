@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from app.blood_donor.database import donor_index
+from app.blood_donor.database.donor_index import DonorIndex, get_donor_index, reload_donor_index
+from app.blood_donor.database.donor_rows import DONOR_ROWS
+
+
+def db_rows():
+    """Строки, как их возвращает Postgres: колонки char дополнены пробелами."""
+    return [{'recipient': recipient.ljust(10), 'compatible': compatible.ljust(40), 'indications': indications.ljust(30)}
+            for _, recipient, compatible, indications in DONOR_ROWS]
+
+
+class TestDonorIndex(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        # Индекс модуля подменяется при загрузке; после теста возвращаем прежний.
+        self.addCleanup(setattr, donor_index, '_index', donor_index._index)
+
+        self.fetch = AsyncMock(return_value=db_rows())
+        patcher = patch('app.blood_donor.database.donor_index.db_pool.fetch', self.fetch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_reload_renders_replies(self):
+        index = await reload_donor_index()
+
+        self.assertIs(get_donor_index(), index)
+        self.assertEqual(len(index), len(DONOR_ROWS))
+        self.assertEqual(index.get('CcDee'), 'Cовместимый фенотип: \n'
+                                             '<b>CcDee CCDee ccddee ccDee Ccddee</b> \n'
+                                             '\n'
+                                             'При экстренных показаниях к трансфузии (переливанию): \n'
+                                             '<b>отсутствуют</b>')
+        self.assertIsNone(index.get('drop'))
+        self.fetch.assert_awaited_once()
+
+    async def test_index_immutable(self):
+        index = await reload_donor_index()
+        with self.assertRaises(TypeError):
+            index.replies['CcDee'] = ''
+
+    async def test_failed_reload_keeps_index(self):
+        previous = await reload_donor_index()
+        self.fetch.side_effect = OSError('connection refused')
+
+        with self.assertRaises(OSError):
+            await reload_donor_index()
+        self.assertIs(get_donor_index(), previous)
+
+    def test_empty_before_load(self):
+        self.assertEqual(len(DonorIndex()), 0)
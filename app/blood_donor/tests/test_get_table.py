@@ -7,12 +7,12 @@ from app.blood_donor.database.get_table import get_table_donor
 
 class TestGetTableDonor(unittest.TestCase):
 
-    @patch('config.db_manager')
-    def test_get_table_donor_success(self, mock_db_manager):
+    @patch('app.blood_donor.database.get_table.db_pool')
+    def test_get_table_donor_success(self, mock_db_pool):
         # Настройка имитации данных, возвращаемых из базы данных
-        mock_db_manager.select_data = AsyncMock(return_value=[
-            {'compatible': 'CcDee CCDee ccddee ccDee Ccddee', 'indications': 'отсутствуют'}
-        ])
+        mock_db_pool.fetchrow = AsyncMock(return_value=
+            {'compatible': 'CcDee CCDee ccddee ccDee Ccddee    ', 'indications': 'отсутствуют              '}
+        )
 
         recipient = 'CcDee'
         expected_result = (
@@ -28,16 +28,17 @@ class TestGetTableDonor(unittest.TestCase):
 
         # Проверка результата
         self.assertEqual(result, expected_result)
+        self.assertEqual(mock_db_pool.fetchrow.await_args.args[1], recipient)
+
+    @patch('app.blood_donor.database.get_table.db_pool')
+    def test_get_table_donor_no_data(self, mock_db_pool):
+        # Настройка имитации отсутствия данных
+        mock_db_pool.fetchrow = AsyncMock(return_value=None)
 
-    # @patch('config.db_manager')
-    # def test_get_table_donor_no_data(self, mock_db_manager):
-    #     # Настройка имитации отсутствия данных
-    #     mock_db_manager.select_data = AsyncMock(return_value=[])
-    #
-    #     recipient = 'Unknown'
-    #
-    #     # Запуск тестируемой функции
-    #     result = asyncio.run(get_table_donor(recipient))
-    #
-    #     # Проверка результата
-    #     self.assertIsNone(result)
+        recipient = 'Unknown'
+
+        # Запуск тестируемой функции
+        result = asyncio.run(get_table_donor(recipient))
+
+        # Проверка результата
+        self.assertIsNone(result)
@@ -0,0 +1,41 @@
+import unittest
+
+from app.blood_donor.database.donor_index import DonorIndex, get_donor_index, set_donor_index
+from app.blood_donor.database.donor_rows import DONOR_ROWS
+from app.testing.fake_telegram import make_callback_update
+from app.testing.io_budget import IOBudgetTestCase
+
+ROWS = {recipient: {'compatible': compatible, 'indications': indications}
+        for _, recipient, compatible, indications in DONOR_ROWS}
+
+
+class TestDonorIOBudget(IOBudgetTestCase):
+    """Обращения к Bot API, Redis и PostgreSQL за подбор донора: команда и фенотип."""
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        previous = get_donor_index()
+        self.addCleanup(set_donor_index, previous)
+        set_donor_index(DonorIndex((recipient, row['compatible'], row['indications'])
+                                   for recipient, row in ROWS.items()))
+
+    def database_rows(self, query, args):
+        return [ROWS[args[0]]] if args and args[0] in ROWS else []
+
+    async def test_command(self):
+        counts = await self.converse(100, '/donor', 'CcDee')
+        self.assertWithinBudget(counts, telegram=3, redis=4, postgres=0)
+
+    async def test_menu_button(self):
+        counts = await self.converse(100, make_callback_update(100, '/donor'), 'CcDee')
+        self.assertWithinBudget(counts, telegram=4, redis=4, postgres=0)
+
+    async def test_without_index(self):
+        # Индекс не загружен (база данных была недоступна при старте): один запрос в базу данных.
+        set_donor_index(DonorIndex([]))
+        counts = await self.converse(100, '/donor', 'CcDee')
+        self.assertWithinBudget(counts, telegram=3, redis=4, postgres=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
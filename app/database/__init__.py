@@ -0,0 +1 @@
+# Подключение к PostgreSQL: общий пул соединений процесса.
@@ -0,0 +1,94 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from app.database.pool import DatabasePool
+
+
+class FakeConnection:
+    """Соединение asyncpg: запоминает запросы, отвечает заданными строками."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def fetch(self, query, *args):
+        self.queries.append((query, args))
+        return self.rows
+
+    async def fetchrow(self, query, *args):
+        self.queries.append((query, args))
+        return self.rows[0] if self.rows else None
+
+
+class FakePool:
+    """Пул asyncpg из одного соединения."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.free = asyncio.Semaphore(1)
+        self.closed = False
+
+    async def acquire(self, timeout=None):
+        await asyncio.wait_for(self.free.acquire(), timeout)
+        return self.connection
+
+    async def release(self, connection):
+        self.free.release()
+
+    async def close(self):
+        self.closed = True
+
+    def get_size(self):
+        return 1
+
+    def get_idle_size(self):
+        return 0 if self.free.locked() else 1
+
+
+class TestDatabasePool(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.connection = FakeConnection([{'compatible': 'CcDee', 'indications': 'отсутствуют'}])
+        self.fake_pool = FakePool(self.connection)
+        patcher = patch('app.database.pool.asyncpg.create_pool', AsyncMock(return_value=self.fake_pool))
+        self.create_pool = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = DatabasePool('postgresql://localhost/test', min_size=1, max_size=1, acquire_timeout=0.05)
+
+    async def test_opens_once_on_first_query(self):
+        await asyncio.gather(self.pool.fetchrow('SELECT 1', name='one'), self.pool.fetch('SELECT 1', name='one'))
+
+        self.create_pool.assert_awaited_once()
+        self.assertEqual(self.create_pool.await_args.kwargs['statement_cache_size'], 100)
+        self.assertEqual(self.pool.queries['one'].count, 2)
+        self.assertEqual(self.pool.wait.count, 2)
+
+    async def test_query_args_and_name(self):
+        row = await self.pool.fetchrow('SELECT * FROM donor WHERE recipient = $1', 'CcDee')
+
+        self.assertEqual(row['compatible'], 'CcDee')
+        self.assertEqual(self.connection.queries, [('SELECT * FROM donor WHERE recipient = $1', ('CcDee',))])
+        self.assertIn('SELECT * FROM donor WHERE recipient = $1', self.pool.queries)
+
+    async def test_query_error_counted(self):
+        self.connection.fetch = AsyncMock(side_effect=ValueError)
+        with self.assertRaises(ValueError):
+            await self.pool.fetch('SELECT 1', name='broken')
+
+        self.assertEqual(self.pool.queries['broken'].errors, 1)
+        self.assertEqual(self.pool.stats()['idle'], 1)  # соединение вернулось в пул
+
+    async def test_acquire_timeout_counted(self):
+        async with self.pool.acquire():
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.pool.fetch('SELECT 1')
+
+        self.assertEqual((self.pool.wait.count, self.pool.wait.errors), (2, 1))
+
+    async def test_close(self):
+        await self.pool.open()
+        await self.pool.close()
+
+        self.assertTrue(self.fake_pool.closed)
+        self.assertFalse(self.pool.stats()['opened'])
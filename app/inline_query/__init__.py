@@ -0,0 +1 @@
+# Inline-режим: калькуляторы в поле ввода любого чата ('@бот skf ж 67 94').
@@ -0,0 +1,91 @@
+# Калькуляторы для inline-режима: '@бот skf ж 67 94', '@бот sofa pao2=80 ...', '@бот donor CcDee' в любом чате.
+import html
+import re
+
+from aiogram.types import InlineQueryResultArticle, InputTextMessageContent
+
+from app.blood_donor.database.donor_index import get_donor_index
+from app.blood_donor.database.get_table import get_table_donor
+from app.blood_donor.handlers.check_correct import RESIPIENT
+from app.skf.handlers.handler_main_skf import calculate_skf
+from app.skf.handlers.parse_skf import SkfInputError, parse_skf
+from app.skf.keyboards.reply_kb_skf import gender_codec
+from app.sofa.handlers.handler_main_sofa import calculate_sofa
+from app.sofa.handlers.parse_sofa import SofaInputError, format_inputs, parse_sofa
+
+HINT = 'skf ж 67 94 · donor CcDee · sofa pao2=80 fio2=0.4 …'
+
+TAG = re.compile(r'<[^>]+>')
+
+# Ответ на запрос: результаты и подсказка над ними (None — подсказки нет).
+Answer = tuple[tuple[InlineQueryResultArticle, ...], str | None]
+
+
+def plain(text: str) -> str:
+    """Текст результата без HTML-разметки — для заголовка и описания результата."""
+    return ' '.join(html.unescape(TAG.sub('', text)).split())
+
+
+def article(result_id: str, title: str, description: str, text: str) -> InlineQueryResultArticle:
+    return InlineQueryResultArticle(id=result_id, title=title, description=description,
+                                    input_message_content=InputTextMessageContent(message_text=text))
+
+
+def skf(args: str) -> Answer:
+    try:
+        data = parse_skf(args)
+    except SkfInputError as error:
+        return (), f'СКФ: {error.problems[0]}'
+    result = calculate_skf(data)
+    inputs = f'Пол: {gender_codec.decode(data["gender"])}, возраст: {data["age"]}, креатинин: {data["creatinin"]}'
+    return (article('skf', plain(result), inputs, f'{inputs}\n\n{result}'),), None
+
+
+def sofa(args: str) -> Answer:
+    try:
+        data = parse_sofa(args)
+    except SofaInputError as error:
+        return (), f'SOFA: {error.problems[0]}'
+    result = calculate_sofa(data)
+    return (article('sofa', f'SOFA: {plain(result)}', 'Шкала SOFA', f'{format_inputs(data)}\n\n{result}'),), None
+
+
+async def donor(args: str) -> Answer:
+    """
+    Совместимые фенотипы донора: точный фенотип реципиента — один результат, начало фенотипа (или пустой
+    запрос) — все фенотипы таблицы, которые с него начинаются. Ответы берутся из индекса доноров в памяти;
+    пока он не загружен, точный фенотип ищется в базе данных.
+    """
+    index = get_donor_index()
+    if args in RESIPIENT:
+        phenotypes = [args]
+    else:
+        phenotypes = [phenotype for phenotype in RESIPIENT if phenotype.startswith(args)]
+        if not phenotypes:
+            return (), f'Донор: нет фенотипа {args}'
+
+    results = []
+    for phenotype in phenotypes:
+        reply = index.get(phenotype)
+        if reply is None and len(phenotypes) == 1:
+            reply = await get_table_donor(phenotype)
+        if reply is not None:
+            results.append(article(f'donor:{phenotype}', f'Реципиент {phenotype}', plain(reply),
+                                   f'Реципиент <b>{phenotype}</b>\n{reply}'))
+    return tuple(results), None if results else f'Донор: фенотип {args} не найден в таблице совместимости'
+
+
+async def evaluate(query: str) -> Answer:
+    """
+    Результаты inline-запроса '<калькулятор> <аргументы>'. Неполный или ошибочный запрос дает пустые
+    результаты с подсказкой, что исправить.
+    """
+    name, _, args = query.partition(' ')
+    name = name.lower()
+    if name == 'skf':
+        return skf(args)
+    if name == 'sofa':
+        return sofa(args)
+    if name == 'donor':
+        return await donor(args.strip())
+    return (), HINT
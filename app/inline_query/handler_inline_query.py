@@ -0,0 +1,159 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+from aiogram import Dispatcher, Router
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import InlineQuery, InlineQueryResultsButton, TelegramObject, Update
+
+from app.blood_donor.database.donor_index import get_donor_index
+from app.inline_query.calculators import Answer, evaluate
+from app.server.executor import register_before_fsm
+from config import INLINE_CACHE_TIME, INLINE_DEBOUNCE, INLINE_CACHE_SIZE, INLINE_CACHE_TTL
+
+
+class ResultCache:
+    """
+    Готовые ответы на inline-запросы в памяти процесса: запрос -> результаты. Ограничен по размеру
+    (первыми вытесняются запросы, которые дольше всех не повторялись), запись живет ttl секунд.
+
+    :param max_size: Максимальное количество запросов в кэше.
+    :param ttl: Время жизни записи, в секундах.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: float = 600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Answer]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Есть ли живая запись (без учета в hits и misses)."""
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] >= time.monotonic()
+
+    def get(self, key: Hashable) -> Answer | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, answer: Answer) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, answer)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class Debouncer:
+    """
+    Пока пользователь набирает запрос, Telegram присылает inline-запрос на каждый символ. Запрос
+    вычисляется, только если за delay секунд от того же пользователя не пришел следующий;
+    на вытесненные запросы бот не отвечает — клиент Telegram показывает ответ на последний.
+
+    :param delay: Пауза в наборе, после которой запрос вычисляется, в секундах.
+    """
+
+    def __init__(self, delay: float = 0.3):
+        self.delay = delay
+        self.superseded = 0
+        self._latest: dict[int, object] = {}
+
+    async def settle(self, user_id: int) -> bool:
+        """Ждет delay секунд; True — за это время от пользователя не было нового запроса."""
+        if self.delay <= 0:
+            return True
+        token = self._latest[user_id] = object()
+        await asyncio.sleep(self.delay)
+        if self._latest.get(user_id) is not token:
+            self.superseded += 1
+            return False
+        del self._latest[user_id]
+        return True
+
+
+class InlineCalculators:
+    """
+    Inline-режим бота: '@бот skf ж 67 94', '@бот sofa pao2=80 ...', '@бот donor CcDee' в поле ввода любого чата
+    показывают результат калькулятора (app/inline_query/calculators.py), который можно отправить в чат.
+
+    Ответ на запрос не зависит от пользователя, поэтому он кэшируется и у Telegram (cache_time, общий для всех
+    пользователей), и в памяти процесса (ResultCache): повтор запроса не вычисляется заново. Запрос, которого
+    нет в кэше, вычисляется после паузы в наборе (Debouncer). Таблица доноров входит в ключ кэша: после
+    /reload_donors ответы вычисляются заново.
+
+    Пауза в наборе выдерживается в outer-middleware обновлений (setup), до FSM-middleware: у inline-запроса
+    нет чата, FSM-middleware ставит его в очередь чата с id пользователя (ChatOrderedExecutor), и запросы,
+    ждущие паузу внутри очереди, не видели бы следующих. Вытесненные запросы до обработчиков не доходят.
+
+    :param cache_time: Сколько секунд Telegram может отдавать ответ из своего кэша.
+    :param debounce: Пауза в наборе перед вычислением запроса, в секундах.
+    :param cache_size: Размер кэша ответов в памяти процесса.
+    :param cache_ttl: Время жизни ответа в кэше процесса, в секундах.
+    """
+
+    def __init__(self, cache_time: int = 300, debounce: float = 0.3, cache_size: int = 1000,
+                 cache_ttl: float = 600.0):
+        self.cache_time = cache_time
+        self.cache = ResultCache(cache_size, cache_ttl)
+        self.debouncer = Debouncer(debounce)
+        self.evaluations = 0
+
+        self.router = Router(name='inline_query_router')
+        self.router.inline_query()(self.answer)
+
+    def setup(self, dispatcher: Dispatcher) -> None:
+        """Подключает паузу в наборе к обновлениям диспетчера — вне очереди чата (register_before_fsm)."""
+        register_before_fsm(dispatcher, self.debounce)
+
+    def stats(self) -> dict[str, Any]:
+        """Счетчики для мониторинга."""
+        return {
+            'cache_size': len(self.cache),
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+            'superseded': self.debouncer.superseded,
+            'evaluations': self.evaluations,
+        }
+
+    @staticmethod
+    def key(inline_query: InlineQuery) -> tuple[str, float]:
+        """Ключ кэша: запрос без лишних пробелов и время загрузки таблицы доноров."""
+        return ' '.join(inline_query.query.split()), get_donor_index().loaded_at
+
+    async def debounce(self, handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: Update, data: dict[str, Any]) -> Any:
+        """Outer-middleware обновлений: inline-запрос, которого нет в кэше, ждет паузы в наборе."""
+        inline_query = event.inline_query
+        if (inline_query is not None and self.key(inline_query) not in self.cache
+                and not await self.debouncer.settle(inline_query.from_user.id)):
+            return UNHANDLED
+        return await handler(event, data)
+
+    async def answer(self, inline_query: InlineQuery):
+        """Ответ на inline-запрос: из кэша или вычисленный заново."""
+        key = self.key(inline_query)
+        answer = self.cache.get(key)
+        if answer is None:
+            self.evaluations += 1
+            answer = await evaluate(key[0])
+            self.cache.put(key, answer)
+
+        results, hint = answer
+        # Подсказка — кнопка над (пустыми) результатами; она открывает чат с ботом.
+        button = InlineQueryResultsButton(text=hint, start_parameter='inline') if hint else None
+        await inline_query.answer(list(results), cache_time=self.cache_time, is_personal=False, button=button)
+
+
+inline_calculators = InlineCalculators(cache_time=INLINE_CACHE_TIME, debounce=INLINE_DEBOUNCE,
+                                       cache_size=INLINE_CACHE_SIZE, cache_ttl=INLINE_CACHE_TTL)
+
+inline_query_router = inline_calculators.router
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from aiogram.types import Update
+
+from app.blood_donor.database.donor_index import DonorIndex, get_donor_index, set_donor_index
+from app.blood_donor.database.donor_rows import DONOR_ROWS
+from app.inline_query.calculators import HINT, evaluate
+from app.inline_query.handler_inline_query import InlineCalculators, ResultCache
+from app.testing.fake_telegram import make_inline_query_update
+from app.testing.io_budget import IOBudgetTestCase, bot_dispatcher
+
+SOFA = 'sofa pao2=80 fio2=0.4 resp=да plt=120 bili=25 creat=150 hypo=0 eye=4 verbal=5 motor=6'
+
+
+def load_donor_index(test: unittest.TestCase, rows=DONOR_ROWS) -> None:
+    test.addCleanup(set_donor_index, get_donor_index())
+    set_donor_index(DonorIndex((recipient, compatible, indications) for _, recipient, compatible, indications in rows))
+
+
+class TestEvaluate(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        load_donor_index(self)
+
+    async def test_skf(self):
+        (result,), hint = await evaluate('skf ж 67 94')
+        self.assertIsNone(hint)
+        self.assertEqual(result.title, 'Скорость клубочковой фильтрации: 54 мл/мин/1.73м²')
+        self.assertIn('<b>54 мл/мин/1.73м²</b>', result.input_message_content.message_text)
+
+    def assertHint(self, answer, hint: str) -> None:
+        self.assertEqual(answer, ((), hint))
+
+    async def test_incomplete_query(self):
+        self.assertHint(await evaluate('skf ж 67'), 'СКФ: не хватает: креатинин (число от 1 до 1000)')
+        self.assertHint(await evaluate('sofa'), 'SOFA: не хватает: pao2, fio2, resp, plt, bili, creat, hypo, eye, '
+                                                'verbal, motor')
+        self.assertHint(await evaluate('sk'), HINT)
+
+    async def test_sofa(self):
+        (result,), _ = await evaluate(SOFA)
+        self.assertEqual(result.title, 'SOFA: Баллов: 4 Смертность: < 10%')
+
+    async def test_sofa_zero_fio2(self):
+        # Ошибка ввода, а не исключение: ответ с подсказкой кэшируется, как любой другой.
+        self.assertHint(await evaluate(SOFA.replace('fio2=0.4', 'fio2=0.0')), 'SOFA: некорректное значение fio2=0.0')
+
+    async def test_donor(self):
+        (result,), _ = await evaluate('donor CcDee')
+        self.assertEqual(result.title, 'Реципиент CcDee')
+        self.assertIn(get_donor_index().get('CcDee'), result.input_message_content.message_text)
+
+    async def test_donor_prefix(self):
+        results, _ = await evaluate('donor CcD')
+        self.assertEqual([result.title for result in results],
+                         ['Реципиент CcDee', 'Реципиент CcDEe', 'Реципиент CcDEE', 'Реципиент CcDweakee'])
+        self.assertHint(await evaluate('donor X'), 'Донор: нет фенотипа X')
+
+    async def test_donor_without_index(self):
+        set_donor_index(DonorIndex([]))
+        with patch('app.inline_query.calculators.get_table_donor', AsyncMock(return_value='из базы')) as table:
+            (result,), _ = await evaluate('donor CcDee')
+            results, _ = await evaluate('donor Cc')
+        table.assert_awaited_once_with('CcDee')
+        self.assertIn('из базы', result.input_message_content.message_text)
+        self.assertEqual(results, ())
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_evicts_least_recent(self):
+        cache = ResultCache(max_size=2)
+        cache.put('a', ((), 'a'))
+        cache.put('b', ((), 'b'))
+        cache.get('a')
+        cache.put('c', ((), 'c'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), ((), 'a'))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_expires(self):
+        cache = ResultCache(ttl=-1)
+        cache.put('a', ((), 'a'))
+        self.assertIsNone(cache.get('a'))
+
+
+class TestInlineQueryIOBudget(IOBudgetTestCase):
+    """Inline-запросы, пока пользователь набирает текст: один расчет и один ответ Bot API на паузу в наборе."""
+    calculators = InlineCalculators(cache_time=300, debounce=0.05)
+    routers = (calculators.router,)
+
+    @classmethod
+    def setUpClass(cls):
+        cls.calculators.setup(bot_dispatcher(cls.routers))
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        load_donor_index(self)
+
+    async def type_query(self, user_id: int, text: str, interval: float = 0.005) -> None:
+        """Запрос на каждый набранный символ, как их присылает Telegram."""
+        feeds = []
+        for length in range(1, len(text) + 1):
+            update = Update.model_validate({'update_id': next(self._update_ids),
+                                            **make_inline_query_update(user_id, text[:length])},
+                                           context={'bot': self.bot})
+            feeds.append(asyncio.create_task(self.dp.feed_update(self.bot, update)))
+            await asyncio.sleep(interval)
+        await asyncio.gather(*feeds)
+
+    async def test_typing(self):
+        # Диспетчер с ChatOrderedExecutor, как в боте: запросы одного пользователя ждут паузы
+        # вне его очереди, поэтому следующий символ вытесняет предыдущий запрос.
+        evaluations, superseded = self.calculators.evaluations, self.calculators.debouncer.superseded
+        await self.type_query(100, 'skf ж 67 94')
+        self.assertEqual(self.calculators.evaluations - evaluations, 1)
+        self.assertEqual(self.calculators.debouncer.superseded - superseded, len('skf ж 67 94') - 1)
+
+        (call,) = self.telegram.calls_of('answerInlineQuery')
+        self.assertEqual((call.params['cache_time'], call.params['is_personal']), ('300', 'false'))
+        self.assertEqual(json.loads(call.params['results'])[0]['id'], 'skf')
+
+    async def test_repeated_query_from_cache(self):
+        await self.type_query(100, 'donor Kk')
+        evaluations = self.calculators.evaluations
+        # Тот же запрос другого пользователя: ответ из кэша, без паузы и без расчета.
+        counts = await self.converse(200, make_inline_query_update(200, 'donor  Kk'))
+        self.assertEqual(self.calculators.evaluations, evaluations)
+        self.assertWithinBudget(counts, telegram=1, redis=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import time
+
+from aiogram import Router, types, F
+from aiogram.filters import Command, CommandObject
+from aiogram.types import BufferedInputFile
+
+from app.blood_donor.database.donor_index import reload_donor_index
+from app.server.stats import format_stats
+from config import (ADMIN_ID, metrics, sweeper, cached_storage, db_pool, outbound, executor, watchdog,
+                    memory_profiler)
+
+admin_router = Router(name='admin_router')
+
+
+@admin_router.message(Command('stats'), F.from_user.id == ADMIN_ID)
+async def cmd_stats(message: types.Message):
+    """
+    Команда администратора /stats: счетчики процесса, получившего команду. Частота обновлений,
+    чаты с самым долгим ожиданием в очереди, задержка обработчиков, сессии FSM по сценариям, кэш,
+    пул PostgreSQL, очередь исходящих сообщений, отставание цикла событий и память.
+    """
+    await message.answer(format_stats(metrics, sweeper.last_report, cached_storage.stats(), db_pool.stats(),
+                                      outbound.stats(), executor.snapshot(top=5), watchdog.stats(),
+                                      pool_max=db_pool.max_size))
+
+
+@admin_router.message(Command('memprofile'), F.from_user.id == ADMIN_ID)
+async def cmd_memprofile(message: types.Message, command: CommandObject):
+    """
+    Команда администратора /memprofile: первый вызов включает tracemalloc и делает снимок памяти,
+    каждый следующий присылает ADMIN_ID файлом разницу с предыдущим снимком. /memprofile stop выключает
+    профилирование. Снимок держит GIL и останавливает обработку обновлений на время съемки (до секунд
+    на большой куче); в отдельном потоке выполняются сравнение снимков и форматирование отчета.
+    """
+    if command.args == 'stop':
+        memory_profiler.stop()
+        await message.answer('Профилирование памяти выключено')
+        return
+
+    if not memory_profiler.running:
+        await asyncio.to_thread(memory_profiler.start)
+        await message.answer('Профилирование памяти включено, первый снимок сделан. '
+                             'Повторите /memprofile позже, чтобы получить прирост памяти')
+        return
+
+    report = await asyncio.to_thread(memory_profiler.report)
+    name = f'memprofile-{os.getpid()}-{time.strftime("%Y%m%d-%H%M%S")}.txt'
+    await message.bot.send_document(ADMIN_ID, BufferedInputFile(report.encode(), filename=name),
+                                    caption=f'Снимок памяти процесса {os.getpid()}')
+
+
+@admin_router.message(Command('reload_donors'), F.from_user.id == ADMIN_ID)
+async def cmd_reload_donors(message: types.Message):
+    """
+    Команда администратора /reload_donors: перечитывает таблицу donor из базы данных в индекс
+    в памяти после изменения таблицы. Индекс обновляется только в воркере, получившем команду.
+    """
+    try:
+        index = await reload_donor_index()
+    except Exception as error:
+        await message.answer(f'Не удалось загрузить таблицу donor: {error!r}')
+        return
+    await message.answer(f'Индекс доноров обновлен: {len(index)} фенотипов.')
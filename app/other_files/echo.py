@@ -1,7 +1,7 @@
 from aiogram import types, Router
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
-echo_router = Router()
+echo_router = Router(name='echo_router')
 
 @echo_router.message()
 async def echo(message: types.Message) -> types.Message | InlineKeyboardMarkup:
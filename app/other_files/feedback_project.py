@@ -2,7 +2,7 @@ from aiogram import F, Router
 from aiogram.types import CallbackQuery
 
 
-user_router = Router()
+user_router = Router(name='feedback_router')
 
 
 @user_router.callback_query(F.data == 'Обратная связь')
@@ -0,0 +1 @@
+# Серверная часть бота: прием обновлений от Telegram через webhook.
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Awaitable, Callable
+
+from aiogram import Dispatcher
+from aiogram.fsm.storage.base import BaseEventIsolation, StorageKey
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChatStats:
+    """
+    Статистика очереди одного чата.
+
+    depth: Сколько обновлений чата сейчас в очереди (включая выполняющееся).
+    max_depth: Максимальная глубина очереди.
+    updates: Сколько обновлений чата прошло через очередь.
+    total_wait: Суммарное время ожидания в очереди, сек.
+    max_wait: Максимальное время ожидания в очереди, сек.
+    """
+    depth: int = 0
+    max_depth: int = 0
+    updates: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def avg_wait(self) -> float:
+        return self.total_wait / self.updates if self.updates else 0.0
+
+
+class _ChatQueue:
+    """Очередь обновлений одного чата: справедливая блокировка и число обновлений в ней."""
+    __slots__ = ('lock', 'depth')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.depth = 0
+
+
+class ChatOrderedExecutor(BaseEventIsolation):
+    """
+    Исполнитель обновлений: чаты обрабатываются параллельно, но внутри одного чата строго по очереди.
+
+    Подключается к диспетчеру как events_isolation: FSMContextMiddleware входит в lock(key)
+    до чтения состояния, поэтому два быстрых нажатия в одном чате не читают и не пишут запись FSM
+    одновременно. Очередь чата — справедливая блокировка asyncio.Lock (ожидающие проходят в порядке
+    поступления), общее число одновременно выполняемых обновлений ограничено семафором.
+
+    Очереди — в памяти процесса: при нескольких воркерах (WEB_WORKERS > 1) обновления одного чата,
+    попавшие в разные процессы, друг друга не ждут.
+
+    :param limit: Максимум одновременно обрабатываемых обновлений из разных чатов.
+    :param stats_size: Для скольких последних активных чатов хранить статистику.
+    :param slow_wait: Ожидание в очереди дольше этого значения (сек) пишется в лог.
+    """
+
+    def __init__(self, limit: int = 100, stats_size: int = 1000, slow_wait: float = 1.0):
+        self.limit = limit
+        self.stats_size = stats_size
+        self.slow_wait = slow_wait
+        self.active = 0
+        self.waiting = 0
+
+        self._semaphore = asyncio.Semaphore(limit)
+        self._queues: dict[int, _ChatQueue] = {}
+        self._stats: OrderedDict[int, ChatStats] = OrderedDict()
+
+    def _chat_stats(self, chat_id: int) -> ChatStats:
+        stats = self._stats.pop(chat_id, None) or ChatStats()
+        self._stats[chat_id] = stats
+        if len(self._stats) > self.stats_size:
+            self._stats.popitem(last=False)
+        return stats
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        chat_id = key.chat_id
+        queue = self._queues.get(chat_id)
+        if queue is None:
+            queue = self._queues[chat_id] = _ChatQueue()
+        queue.depth += 1
+
+        stats = self._chat_stats(chat_id)
+        stats.depth = queue.depth
+        stats.max_depth = max(stats.max_depth, queue.depth)
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        self.waiting += 1
+        acquired = False
+        try:
+            async with queue.lock, self._semaphore:
+                acquired = True
+                self.waiting -= 1
+                wait = loop.time() - start
+                stats.updates += 1
+                stats.total_wait += wait
+                stats.max_wait = max(stats.max_wait, wait)
+                if wait > self.slow_wait:
+                    logger.warning('Обновление чата %d ждало в очереди %.2f с (глубина очереди %d)',
+                                   chat_id, wait, queue.depth)
+
+                self.active += 1
+                try:
+                    yield
+                finally:
+                    self.active -= 1
+        finally:
+            if not acquired:
+                self.waiting -= 1
+            queue.depth -= 1
+            stats.depth = queue.depth
+            if queue.depth == 0:
+                # Очередь чата опустела: блокировка больше не нужна.
+                del self._queues[chat_id]
+
+    def snapshot(self, top: int = 10) -> dict:
+        """
+        Текущее состояние исполнителя для метрик и отчетов.
+
+        :param top: Сколько чатов с наибольшим временем ожидания включить в отчет.
+        :return dict: active, limit, queued (обновлений ждут очереди) и chats — список
+            {chat_id, depth, max_depth, updates, avg_wait, max_wait}.
+        """
+        chats = sorted(self._stats.items(), key=lambda item: item[1].max_wait, reverse=True)[:top]
+
+        return {'active': self.active, 'limit': self.limit, 'queued': self.waiting,
+                'chats': [{'chat_id': chat_id, 'depth': stats.depth, 'max_depth': stats.max_depth,
+                           'updates': stats.updates, 'avg_wait': stats.avg_wait, 'max_wait': stats.max_wait}
+                          for chat_id, stats in chats]}
+
+    def stats(self, top: int = 10) -> dict:
+        """
+        Счетчики для метрик: active, limit, queued и по top чатам с наибольшим временем ожидания —
+        текущая глубина очереди (depth) и максимальное ожидание (max_wait); номер чата — метка name.
+        """
+        snapshot = self.snapshot(top)
+        chats = snapshot.pop('chats')
+        snapshot['depth'] = {str(chat['chat_id']): chat['depth'] for chat in chats}
+        snapshot['max_wait'] = {str(chat['chat_id']): chat['max_wait'] for chat in chats}
+        return snapshot
+
+    async def close(self) -> None:
+        self._queues.clear()
+
+
+def register_before_fsm(dispatcher: Dispatcher, middleware: Callable[..., Awaitable[Any]]) -> None:
+    """
+    Подключает outer-middleware обновлений прямо перед FSM-middleware диспетчера: оно выполняется
+    до чтения состояния и вне очереди чата. Порядок остальных middleware не меняется: подключенные
+    после FSM-middleware (LogContext, UpdateMetrics) по-прежнему выполняются внутри очереди чата.
+    """
+    outer = dispatcher.update.outer_middleware
+    middlewares = list(outer)
+    for item in middlewares:
+        outer.unregister(item)
+    for item in middlewares:
+        if item is dispatcher.fsm:
+            outer.register(middleware)
+        outer.register(item)
@@ -0,0 +1,171 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Обновление, которое обрабатывается в текущей задаче: (update_id, chat_id) или None вне обновления.
+log_context: ContextVar[tuple[int, int | None] | None] = ContextVar('log_context', default=None)
+
+# Поток вывода логов процесса (setup_logging).
+_listener: QueueListener | None = None
+
+
+class LogContext(BaseMiddleware):
+    """
+    Outer-middleware обновлений: запоминает update_id и id чата обновления, чтобы каждая запись лога,
+    сделанная при его обработке (обработчики, хранилище, пул, Bot API), несла их в полях update_id и chat_id.
+    Регистрируется после UserContextMiddleware диспетчера, который определяет чат (data['event_chat']).
+    """
+
+    async def __call__(self, handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: Update, data: dict[str, Any]) -> Any:
+        chat = data.get('event_chat')
+        token = log_context.set((event.update_id, chat.id if chat is not None else None))
+        try:
+            return await handler(event, data)
+        finally:
+            log_context.reset(token)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Выборка записей по логгерам: из записей логгера name (и его потомков) ниже WARNING проходит доля rates[name].
+    Предупреждения и ошибки проходят всегда. Для логгера действует самое длинное подходящее имя.
+
+    :param rates: Доля записей по имени логгера, например {'aiogram.event': 0.01}.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._random = random.random
+        self._cache: dict[str, float] = {}
+
+    def rate(self, name: str) -> float:
+        if name not in self._cache:
+            prefixes = [prefix for prefix in self.rates if name == prefix or name.startswith(prefix + '.')]
+            self._cache[name] = self.rates[max(prefixes, key=len)] if prefixes else 1.0
+        return self._cache[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate(record.name)
+        return rate >= 1.0 or self._random() < rate
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    Обработчик, который только кладет запись в очередь: запись в поток вывода и форматирование
+    выполняет QueueListener в отдельном потоке, цикл событий на вывод не блокируется.
+
+    В момент записи к ней добавляются update_id и chat_id текущего обновления (log_context);
+    текст сообщения и исключения вычисляются сразу, пока аргументы записи не изменились.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        context = log_context.get()
+        record.update_id, record.chat_id = context if context is not None else (None, None)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись лога одной строкой JSON: время, уровень, логгер, сообщение, update_id, chat_id и исключение."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            't': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        update_id = getattr(record, 'update_id', None)
+        if update_id is not None:
+            entry['update_id'] = update_id
+            entry['chat_id'] = getattr(record, 'chat_id', None)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class ContextTextFormatter(logging.Formatter):
+    """Текстовый формат логов с [update_id chat_id] для записей, сделанных при обработке обновления."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        update_id = getattr(record, 'update_id', None)
+        if update_id is None:
+            return line
+        return f'{line} [update {update_id} chat {getattr(record, "chat_id", None)}]'
+
+
+def parse_rates(value: str | None) -> dict[str, float]:
+    """'aiogram.event=0.01,app.storage=0.1' -> {'aiogram.event': 0.01, 'app.storage': 0.1}."""
+    rates = {}
+    for item in (value or '').split(','):
+        if item.strip():
+            name, rate = item.split('=')
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+def setup_logging(level: str | int = logging.INFO, fmt: str = 'text', sample: dict[str, float] | None = None,
+                  stream=None) -> QueueListener:
+    """
+    Логирование процесса через очередь: корневой логгер получает ContextQueueHandler (с выборкой sample),
+    вывод в stream (по умолчанию stderr) выполняет QueueListener в отдельном потоке.
+    Поток вывода останавливается при выходе из процесса (stop_logging), оставшиеся записи при этом выводятся.
+
+    :param level: Уровень корневого логгера.
+    :param fmt: 'text' — прежний текстовый формат, 'json' — одна строка JSON на запись.
+    :param sample: Доля записей ниже WARNING по логгерам (SamplingFilter).
+    :param stream: Поток вывода.
+    """
+    global _listener
+    stop_logging()
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == 'json' else ContextTextFormatter(TEXT_FORMAT))
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = ContextQueueHandler(records)
+    if sample:
+        handler.addFilter(SamplingFilter(sample))
+
+    root = logging.getLogger()
+    for previous in root.handlers[:]:
+        root.removeHandler(previous)
+        previous.close()
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    atexit.unregister(stop_logging)
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging() -> None:
+    """Выводит оставшиеся в очереди записи и останавливает поток вывода логов."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,99 @@
+import gc
+import linecache
+import os
+import time
+import tracemalloc
+from collections import Counter
+
+from app.server.stats import rss_mb
+
+# Аллокации самого профилировщика и импорта модулей в отчет не попадают.
+IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+)
+
+
+class MemoryProfiler:
+    """
+    Снимки памяти работающего бота по команде администратора.
+
+    Пока профилирование выключено, профилировщик ничего не делает и не замедляет обработку обновлений.
+    start() включает tracemalloc и делает первый снимок. Каждый следующий report() сравнивает текущий
+    снимок с предыдущим: строки кода с наибольшим приростом памяти (с трассировкой стека для первых
+    traces строк) и прирост числа объектов по типам (gc.get_objects). stop() выключает tracemalloc.
+
+    Снимок (tracemalloc.take_snapshot) и подсчет объектов (gc.get_objects) занимают от десятых долей
+    секунды до секунд на большой куче и все это время держат GIL: обработка обновлений на это время
+    останавливается, даже если вызывать их в отдельном потоке. В потоке (asyncio.to_thread) цикл событий
+    продолжает работать только во время сравнения снимков и форматирования отчета.
+
+    :param frames: Глубина стека, сохраняемая tracemalloc для каждой аллокации.
+    :param top: Сколько строк и типов объектов включать в отчет.
+    :param traces: Для скольких первых строк выводить стек.
+    """
+
+    def __init__(self, frames: int = 10, top: int = 30, traces: int = 5):
+        self.frames = frames
+        self.top = top
+        self.traces = traces
+        self._snapshot: tracemalloc.Snapshot | None = None
+        self._types: Counter | None = None
+        self._taken_at = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._snapshot is not None and tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        """Включает tracemalloc и запоминает первый снимок."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._snapshot, self._types = self._take()
+        self._taken_at = time.time()
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self._snapshot = self._types = None
+
+    @staticmethod
+    def _take() -> tuple[tracemalloc.Snapshot, Counter]:
+        snapshot = tracemalloc.take_snapshot().filter_traces(IGNORED)
+        types = Counter(type(item).__name__ for item in gc.get_objects())
+        return snapshot, types
+
+    def report(self) -> str:
+        """Текст отчета: разница текущего снимка с предыдущим. Текущий становится предыдущим."""
+        if not self.running:
+            raise RuntimeError('Профилирование памяти не включено')
+
+        snapshot, types = self._take()
+        now = time.time()
+        current, peak = tracemalloc.get_traced_memory()
+        rss, rss_peak = rss_mb()
+        lines = [f'Снимок памяти процесса {os.getpid()}, {time.strftime("%Y-%m-%d %H:%M:%S")}',
+                 f'С предыдущего снимка: {(now - self._taken_at) / 60:.1f} мин',
+                 f'tracemalloc: {current / 2 ** 20:.1f} МБ, пик {peak / 2 ** 20:.1f} МБ; '
+                 f'RSS {rss:.0f} МБ, пик {rss_peak:.0f} МБ', '']
+
+        lines.append(f'Строки кода с наибольшим приростом (топ {self.top}):')
+        for index, diff in enumerate(snapshot.compare_to(self._snapshot, 'traceback')[:self.top]):
+            frame = diff.traceback[0]
+            source = linecache.getline(frame.filename, frame.lineno).strip()
+            lines.append(f'{diff.size_diff / 1024:+10.1f} КБ {diff.count_diff:+8d} блоков  '
+                         f'{frame.filename}:{frame.lineno}  {source}')
+            if index < self.traces:
+                lines.extend(f'        {line}' for line in diff.traceback.format(most_recent_first=True)[2:])
+
+        lines += ['', f'Объекты по типам, прирост (топ {self.top}):']
+        growth = Counter(types)
+        growth.subtract(self._types)
+        for name, diff in growth.most_common(self.top):
+            if diff <= 0:
+                break
+            lines.append(f'{diff:+10d}  {name} (всего {types[name]})')
+
+        self._snapshot, self._types, self._taken_at = snapshot, types, now
+        return '\n'.join(lines) + '\n'
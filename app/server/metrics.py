@@ -0,0 +1,289 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject, Update
+from aiohttp import web
+
+from app.database.pool import Timing
+from app.storage.transitions import UNCHANGED, transition
+
+# Границы корзин гистограмм задержки, сек.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """
+    Гистограмма задержки с фиксированными корзинами (как histogram в Prometheus).
+
+    counts[i] — число наблюдений не больше buckets[i], последний элемент — больше всех границ.
+    В выводе корзины накопительные.
+    """
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """Пары (le, накопленное число наблюдений), последняя — '+Inf'."""
+        result, total = [], 0
+        for bound, count in zip((*map(_number, self.buckets), '+Inf'), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """
+        Оценка квантиля q (0..1) по корзинам: линейная интерполяция внутри корзины, как histogram_quantile
+        в Prometheus. Для значений больше последней границы возвращается последняя граница.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        total, lower = 0, 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and total + count >= rank:
+                return lower + (bound - lower) * (rank - total) / count
+            total += count
+            lower = bound
+        return self.buckets[-1]
+
+    @classmethod
+    def merged(cls, histograms: list['Histogram'], buckets: tuple[float, ...] = BUCKETS) -> 'Histogram':
+        """Сумма гистограмм с одинаковыми корзинами (например, всех обработчиков роутера)."""
+        result = cls(buckets)
+        for histogram in histograms:
+            result.counts = [a + b for a, b in zip(result.counts, histogram.counts)]
+            result.sum += histogram.sum
+            result.count += histogram.count
+        return result
+
+
+class RateMeter:
+    """
+    Частота событий за последние window секунд: кольцо из секундных счетчиков, add() — O(1).
+
+    :param window: Окно, сек.
+    """
+    __slots__ = ('window', 'counts', 'second')
+
+    def __init__(self, window: int = 60):
+        self.window = window
+        self.counts = [0] * window
+        self.second = 0
+
+    def _advance(self, second: int) -> None:
+        # Счетчики секунд, в которые событий не было, обнуляются.
+        for skipped in range(max(self.second + 1, second - self.window + 1), second + 1):
+            self.counts[skipped % self.window] = 0
+        self.second = second
+
+    def add(self, now: float) -> None:
+        second = int(now)
+        if second != self.second:
+            self._advance(second)
+        self.counts[second % self.window] += 1
+
+    def per_second(self, now: float) -> float:
+        """Среднее число событий в секунду за окно, заканчивающееся в now."""
+        second = int(now)
+        if second > self.second:
+            self._advance(second)
+        return sum(self.counts) / self.window
+
+
+def _number(value: float) -> str:
+    return repr(value) if isinstance(value, float) else str(int(value))
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels: Any) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class Metrics:
+    """
+    Метрики процесса бота в памяти и их вывод в текстовом формате Prometheus.
+
+    Счетчики и гистограммы обновляют middleware (UpdateMetrics, HandlerMetrics) — на каждое обновление
+    это несколько операций со словарями, без блокировок и ввода-вывода. Источники stats()
+    (OutboundLimiter, DatabasePool, CachedStorage, FailoverStorage) опрашиваются только при запросе /metrics.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        # тип обновления -> число обновлений, ошибок и время обработки
+        self.updates: dict[str, int] = defaultdict(int)
+        self.update_errors: dict[str, int] = defaultdict(int)
+        self.update_latency: dict[str, Histogram] = {}
+        self.update_rate = RateMeter()
+        self.started = time.time()
+        # (роутер, обработчик) -> время обработчика; (роутер, обработчик, исключение) -> число ошибок
+        self.handler_latency: dict[tuple[str, str], Histogram] = {}
+        self.handler_errors: dict[tuple[str, str, str], int] = defaultdict(int)
+        # (роутер, состояние до шага, состояние после) -> число переходов
+        self.transitions: dict[tuple[str, str, str], int] = defaultdict(int)
+        self._sources: list[tuple[str, Callable[[], dict[str, Any]]]] = []
+        self._histograms: list[tuple[str, str, Histogram]] = []
+
+    def add_source(self, prefix: str, stats: Callable[[], dict[str, Any]]) -> None:
+        """Добавляет источник stats(): числа и Timing из него выводятся как bot_<prefix>_<поле>."""
+        self._sources.append((prefix, stats))
+
+    def add_histogram(self, name: str, help_text: str, histogram: Histogram) -> None:
+        """Добавляет в вывод гистограмму, которую ведет другой компонент (например, LoopWatchdog)."""
+        self._histograms.append((name, help_text, histogram))
+
+    def histogram(self, histograms: dict, key: Any) -> Histogram:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(self.buckets)
+        return histogram
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus (version 0.0.4)."""
+        lines: list[str] = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        def histograms(name: str, items: dict, label_names: tuple[str, ...]) -> None:
+            for key, histogram in sorted(items.items()):
+                labels = dict(zip(label_names, key if isinstance(key, tuple) else (key,)))
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {count}')
+                lines.append(f'{name}_sum{_labels(**labels)} {histogram.sum!r}')
+                lines.append(f'{name}_count{_labels(**labels)} {histogram.count}')
+
+        family('bot_updates_total', 'counter', 'Обновления по типу.')
+        lines.extend(f'bot_updates_total{_labels(type=kind)} {count}' for kind, count in sorted(self.updates.items()))
+        family('bot_update_errors_total', 'counter', 'Обновления, обработка которых завершилась исключением.')
+        lines.extend(f'bot_update_errors_total{_labels(type=kind)} {count}'
+                     for kind, count in sorted(self.update_errors.items()))
+        family('bot_update_seconds', 'histogram', 'Время обработки обновления, включая middleware, сек.')
+        histograms('bot_update_seconds', self.update_latency, ('type',))
+
+        family('bot_handler_seconds', 'histogram', 'Время обработчика по роутеру и обработчику, сек.')
+        histograms('bot_handler_seconds', self.handler_latency, ('router', 'handler'))
+        family('bot_handler_errors_total', 'counter', 'Исключения в обработчиках.')
+        lines.extend(f'bot_handler_errors_total{_labels(router=router, handler=handler, error=error)} {count}'
+                     for (router, handler, error), count in sorted(self.handler_errors.items()))
+
+        family('bot_wizard_transitions_total', 'counter', 'Переходы между шагами сценариев.')
+        lines.extend(f'bot_wizard_transitions_total{_labels(router=router, **{"from": source}, to=target)} {count}'
+                     for (router, source, target), count in sorted(self.transitions.items()))
+
+        for name, help_text, histogram in self._histograms:
+            family(name, 'histogram', help_text)
+            histograms(name, {(): histogram}, ())
+
+        for prefix, stats in self._sources:
+            for field, value in stats().items():
+                lines.extend(_stat_lines(f'bot_{prefix}_{field}', value))
+
+        return '\n'.join(lines) + '\n'
+
+
+def _stat_lines(metric: str, value: Any, **labels: Any) -> list[str]:
+    """Поле stats() в строки метрик: число — gauge, строка — gauge 1 с меткой value, Timing — четыре gauge."""
+    if isinstance(value, bool | int | float):
+        return [f'{metric}{_labels(**labels)} {_number(value)}']
+    if isinstance(value, str):
+        return [f'{metric}{_labels(**labels, value=value)} 1']
+    if isinstance(value, Timing):
+        return [f'{metric}_count{_labels(**labels)} {value.count}',
+                f'{metric}_errors{_labels(**labels)} {value.errors}',
+                f'{metric}_seconds_total{_labels(**labels)} {value.total!r}',
+                f'{metric}_seconds_max{_labels(**labels)} {value.max!r}']
+    if isinstance(value, dict):
+        return [line for key, item in sorted(value.items()) for line in _stat_lines(metric, item, **labels, name=key)]
+    return []
+
+
+class UpdateMetrics(BaseMiddleware):
+    """Outer-middleware обновлений: число обновлений по типу, ошибки и полное время обработки."""
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+
+    async def __call__(self, handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: Update, data: dict[str, Any]) -> Any:
+        metrics = self.metrics
+        kind = event.event_type
+        metrics.updates[kind] += 1
+        started = time.perf_counter()
+        metrics.update_rate.add(started)
+        try:
+            return await handler(event, data)
+        except Exception:
+            metrics.update_errors[kind] += 1
+            raise
+        finally:
+            metrics.histogram(metrics.update_latency, kind).observe(time.perf_counter() - started)
+
+
+class HandlerMetrics(BaseMiddleware):
+    """
+    Inner-middleware событий: время и исключения обработчика по роутеру и имени функции, переходы
+    сценария. Переход — состояние FSM до шага (raw_state) и состояние, установленное на шаге через
+    restart_state / advance_state / finish_state; шаг без перехода (неверный ответ) не учитывается.
+    """
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+
+    async def __call__(self, handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: dict[str, Any]) -> Any:
+        metrics = self.metrics
+        router = data['event_router'].name
+        name = data['handler'].callback.__name__
+        token = transition.set(UNCHANGED)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as error:
+            metrics.handler_errors[router, name, type(error).__name__] += 1
+            raise
+        finally:
+            metrics.histogram(metrics.handler_latency, (router, name)).observe(time.perf_counter() - started)
+            target = transition.get()
+            transition.reset(token)
+            if target is not UNCHANGED:
+                metrics.transitions[router, data.get('raw_state') or 'none', target or 'finished'] += 1
+
+
+def setup_metrics(dispatcher: Dispatcher, metrics: Metrics) -> None:
+    """Подключает UpdateMetrics к обновлениям и HandlerMetrics ко всем типам событий диспетчера."""
+    dispatcher.update.outer_middleware(UpdateMetrics(metrics))
+    handler_metrics = HandlerMetrics(metrics)
+    for name, observer in dispatcher.observers.items():
+        if name not in ('update', 'error'):
+            observer.middleware(handler_metrics)
+
+
+def create_metrics_app(metrics: Metrics) -> web.Application:
+    """aiohttp-приложение с GET /metrics для сборщика Prometheus."""
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(body=metrics.render().encode(), headers={'Content-Type': CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle)
+    return app
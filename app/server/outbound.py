@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+logger = logging.getLogger(__name__)
+
+# Методы, не являющиеся отправкой сообщения: на них ограничения Telegram не распространяются.
+UNLIMITED_METHODS = ('sendChatAction',)
+LIMITED_METHODS = ('copyMessage', 'copyMessages', 'forwardMessage', 'forwardMessages')
+
+
+class TokenBucket:
+    """
+    Ведро токенов в виде расписания (GCRA): reserve возвращает момент, когда можно отправить запрос,
+    и сразу занимает его. Запросы получают моменты в порядке вызова reserve, блокировки не нужны.
+
+    :param rate: Запросов в секунду в среднем.
+    :param capacity: Сколько запросов можно отправить подряд без ожидания.
+    """
+    __slots__ = ('interval', 'tolerance', 'next_at')
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.interval = 1 / rate
+        self.tolerance = (capacity - 1) * self.interval
+        self.next_at = 0.0  # когда ведро снова было бы полным минус один токен
+
+    def reserve(self, at: float) -> float:
+        """Занимает токен не раньше момента at и возвращает момент отправки."""
+        send_at = max(at, self.next_at - self.tolerance)
+        self.next_at = max(self.next_at, send_at) + self.interval
+        return send_at
+
+    def block_until(self, at: float) -> None:
+        """Не выдавать токены до момента at (ответ Telegram 429)."""
+        self.next_at = max(self.next_at, at + self.tolerance)
+
+    def idle(self, now: float) -> bool:
+        """Ведро полное: его можно удалить без изменения поведения."""
+        return self.next_at <= now
+
+
+class OutboundLimiter(BaseRequestMiddleware):
+    """
+    Ограничение исходящих сообщений бота под лимиты Telegram (middleware сессии бота).
+
+    Отправка сообщения проходит через два ведра токенов: общее для бота (global_rate в секунду) и
+    ведро чата (chat_rate в секунду для личных чатов, group_rate в минуту для групп). Запрос ждет
+    своей очереди вместо ответа 429. Если Telegram все же ответил TelegramRetryAfter, чат (или весь
+    бот, если ответ пришел на запрос без chat_id) блокируется на retry_after секунд и запрос
+    повторяется, но не более max_retries раз; затем исключение пробрасывается обработчику.
+
+    Время ожидания в очереди учитывается в stats() — задержка ответа, добавленная ограничением.
+
+    :param global_rate: Сообщений в секунду на весь бот.
+    :param chat_rate: Сообщений в секунду в один личный чат.
+    :param group_rate: Сообщений в минуту в одну группу.
+    :param burst: Сколько сообщений в чат можно отправить подряд без ожидания.
+    :param max_retries: Сколько раз повторять запрос после TelegramRetryAfter.
+    :param max_chats: Для скольких чатов хранить ведра (пустые ведра удаляются первыми).
+    """
+
+    def __init__(self, global_rate: float = 30, chat_rate: float = 1, group_rate: float = 20,
+                 burst: int = 3, max_retries: int = 3, max_chats: int = 10_000):
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+
+        self.global_bucket = TokenBucket(global_rate, capacity=max(1, int(global_rate)))
+        self._chats: OrderedDict[int | str, TokenBucket] = OrderedDict()
+
+        self.requests = 0  # ограниченных запросов
+        self.delayed = 0  # из них ждали в очереди
+        self.queued = 0  # ждут сейчас
+        self.total_delay = 0.0
+        self.max_delay = 0.0
+        self.retries = 0
+        self.retry_after_total = 0.0
+        self.failed = 0  # TelegramRetryAfter после max_retries повторов
+
+    def stats(self) -> dict[str, Any]:
+        """Очередь исходящих сообщений и ответы 429 для мониторинга."""
+        return {
+            'requests': self.requests,
+            'delayed': self.delayed,
+            'queued': self.queued,
+            'avg_delay': self.total_delay / self.requests if self.requests else 0.0,
+            'max_delay': self.max_delay,
+            'retries': self.retries,
+            'retry_after_total': self.retry_after_total,
+            'failed': self.failed,
+            'chats': len(self._chats),
+        }
+
+    @staticmethod
+    def limited(method: TelegramMethod) -> bool:
+        name = method.__api_method__
+        if name in UNLIMITED_METHODS:
+            return False
+        return name.startswith('send') or name in LIMITED_METHODS
+
+    def _chat_bucket(self, chat_id: int | str, now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is not None:
+            self._chats.move_to_end(chat_id)
+            return bucket
+
+        if len(self._chats) >= self.max_chats:
+            for old_id in [old_id for old_id, old in self._chats.items() if old.idle(now)]:
+                del self._chats[old_id]
+            while len(self._chats) >= self.max_chats:
+                self._chats.popitem(last=False)
+
+        # Группы и каналы имеют отрицательный chat_id (или @username канала).
+        group = isinstance(chat_id, str) or chat_id < 0
+        bucket = TokenBucket(self.group_rate / 60, self.burst) if group else TokenBucket(self.chat_rate, self.burst)
+        self._chats[chat_id] = bucket
+        return bucket
+
+    async def _wait_turn(self, chat_id: int | str | None) -> None:
+        now = time.monotonic()
+        send_at = now
+        if chat_id is not None:
+            send_at = self._chat_bucket(chat_id, now).reserve(send_at)
+        send_at = self.global_bucket.reserve(send_at)
+
+        delay = send_at - now
+        self.requests += 1
+        self.total_delay += delay
+        self.max_delay = max(self.max_delay, delay)
+        if delay > 0:
+            self.delayed += 1
+            self.queued += 1
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self.queued -= 1
+
+    async def __call__(self, make_request: NextRequestMiddlewareType[TelegramType], bot: Bot,
+                       method: TelegramMethod[TelegramType]) -> Response[TelegramType]:
+        if not self.limited(method):
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, 'chat_id', None)
+        for attempt in range(self.max_retries + 1):
+            await self._wait_turn(chat_id)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as error:
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    raise
+                self.retries += 1
+                self.retry_after_total += error.retry_after
+                logger.warning('Telegram: %s в чат %s, повтор через %d сек',
+                               method.__api_method__, chat_id, error.retry_after)
+                until = time.monotonic() + error.retry_after
+                bucket = self._chat_bucket(chat_id, until) if chat_id is not None else self.global_bucket
+                bucket.block_until(until)
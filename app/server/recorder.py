@@ -0,0 +1,125 @@
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+logger = logging.getLogger(__name__)
+
+# Объекты обновления, чей id — идентификатор пользователя или чата.
+ID_OBJECTS = ('from', 'chat', 'user', 'sender_chat', 'forward_from', 'forward_from_chat', 'via_bot')
+# Поля, по которым можно узнать человека: необязательные в запись не попадают, обязательные
+# для Telegram (имя пользователя, название группы) заменяются заглушкой.
+PERSONAL_FIELDS = ('last_name', 'username', 'phone_number', 'bio')
+PLACEHOLDERS = {'first_name': 'user', 'title': 'chat'}
+
+
+class Pseudonymizer:
+    """
+    Замена идентификаторов пользователей и чатов псевдонимами: HMAC-SHA256 от id с секретом salt.
+
+    Один и тот же id всегда дает один и тот же псевдоним (диалоги в записи не перемешиваются), знак id
+    сохраняется (группы остаются группами). Без salt восстановить id по псевдониму нельзя.
+    """
+
+    def __init__(self, salt: str):
+        self._key = salt.encode()
+
+    def pseudonym(self, value: int) -> int:
+        digest = hmac.new(self._key, str(value).encode(), hashlib.sha256).digest()
+        pseudonym = int.from_bytes(digest[:6], 'big') or 1
+        return -pseudonym if value < 0 else pseudonym
+
+    def clean(self, data: Any) -> Any:
+        """Копия данных обновления без личных полей и с псевдонимами вместо id."""
+        if isinstance(data, list):
+            return [self.clean(item) for item in data]
+        if not isinstance(data, dict):
+            return data
+
+        result = {}
+        for name, value in data.items():
+            if name in PERSONAL_FIELDS:
+                continue
+            if name in PLACEHOLDERS:
+                result[name] = PLACEHOLDERS[name]
+                continue
+            if name in ID_OBJECTS and isinstance(value, dict) and isinstance(value.get('id'), int):
+                value = {**self.clean(value), 'id': self.pseudonym(value['id'])}
+            elif name in ('user_id', 'chat_id') and isinstance(value, int):
+                value = self.pseudonym(value)
+            elif name == 'chat_instance':
+                value = hmac.new(self._key, str(value).encode(), hashlib.sha256).hexdigest()[:16]
+            else:
+                value = self.clean(value)
+            result[name] = value
+        return result
+
+
+class UpdateRecorder(BaseMiddleware):
+    """
+    Outer-middleware обновлений: записывает каждое входящее обновление в сжатый JSONL
+    (одна строка — {"t": время получения, "update": обновление}) до передачи его обработчикам.
+
+    Идентификаторы пользователей и чатов заменяются псевдонимами, имена и username не записываются
+    (обязательные поля заменяются заглушкой, чтобы запись оставалась обновлением Telegram).
+    Каждый процесс пишет в свой файл updates-<время старта>-<воркер>.jsonl.gz в каталоге directory.
+    Запись воспроизводится командой python -m benchmarks.replay.
+
+    :param directory: Каталог для файлов записи.
+    :param salt: Секрет псевдонимов. Одинаковый salt у всех воркеров дает одинаковые псевдонимы.
+    :param flush_every: Через сколько обновлений сбрасывать буфер на диск.
+    """
+
+    def __init__(self, directory: str | Path, salt: str, flush_every: int = 100):
+        self.directory = Path(directory)
+        self.pseudonymizer = Pseudonymizer(salt)
+        self.flush_every = flush_every
+        self.recorded = 0
+        self.path: Path | None = None
+        self._file = None
+
+    def open(self, worker_index: int = 0) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f'updates-{time.strftime("%Y%m%d-%H%M%S")}-{worker_index}.jsonl.gz'
+        self._file = gzip.open(self.path, 'at', encoding='utf-8')
+        logger.info('Запись обновлений в %s', self.path)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            logger.info('Записано обновлений: %d (%s)', self.recorded, self.path)
+
+    def record(self, update: Update) -> None:
+        data = self.pseudonymizer.clean(update.model_dump(mode='json', exclude_none=True, by_alias=True))
+        self._file.write(json.dumps({'t': time.time(), 'update': data}, ensure_ascii=False) + '\n')
+        self.recorded += 1
+        if self.recorded % self.flush_every == 0:
+            self._file.flush()
+
+    async def __call__(self, handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: dict[str, Any]) -> Any:
+        if self._file is not None:
+            try:
+                self.record(event)
+            except Exception:
+                logger.exception('Не удалось записать обновление')
+        return await handler(event, data)
+
+
+def read_recording(*paths: str | os.PathLike) -> Iterator[tuple[float, dict]]:
+    """Обновления из файлов записи в порядке времени получения: (время, данные обновления)."""
+    records = []
+    for path in paths:
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            records.extend((record['t'], record['update']) for record in map(json.loads, file))
+    records.sort(key=lambda record: record[0])
+    return iter(records)
@@ -0,0 +1,87 @@
+# Сводка счетчиков процесса для команды администратора /stats (app/other_files/admin_stats.py).
+import os
+import resource
+import time
+from collections import defaultdict
+from typing import Any
+
+from app.server.metrics import Histogram, Metrics
+from app.storage.sessions import SweepReport
+
+PERCENTILES = (50, 95, 99)
+
+
+def rss_mb() -> tuple[float, float]:
+    """Текущий и пиковый RSS процесса, МБ. Текущий — из /proc/self/statm (Linux), иначе равен пиковому."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    try:
+        with open('/proc/self/statm') as statm:
+            current = int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        current = peak
+    return current, peak
+
+
+def _latency(histogram: Histogram) -> str:
+    return ' · '.join(f'p{percent} {histogram.quantile(percent / 100) * 1000:.0f}' for percent in PERCENTILES)
+
+
+def _ago(seconds: float) -> str:
+    return f'{seconds:.0f} с' if seconds < 120 else f'{seconds / 60:.0f} мин'
+
+
+def format_stats(metrics: Metrics, sessions: SweepReport | None, cache: dict[str, Any], pool: dict[str, Any],
+                 outbound: dict[str, Any], executor: dict[str, Any], loop: dict[str, Any],
+                 pool_max: int) -> str:
+    """
+    Текст ответа /stats (HTML) из счетчиков процесса. Все значения уже накоплены в памяти,
+    сбор сводки не обращается ни к Redis, ни к базе данных.
+
+    :param metrics: Метрики обработчиков (config.metrics).
+    :param sessions: Последний проход SessionSweeper или None, если проходов в этом процессе не было.
+    :param cache: CachedStorage.stats().
+    :param pool: DatabasePool.stats().
+    :param outbound: OutboundLimiter.stats().
+    :param executor: ChatOrderedExecutor.snapshot().
+    :param loop: LoopWatchdog.stats().
+    :param pool_max: Максимум соединений пула.
+    """
+    now = time.time()
+    total = sum(metrics.updates.values())
+    errors = sum(metrics.update_errors.values())
+    lines = [f'<b>📊 Процесс {os.getpid()}, работает {_ago(now - metrics.started)}</b>',
+             f'Обновления: {metrics.update_rate.per_second(time.perf_counter()):.1f}/с за минуту, '
+             f'всего {total}, с ошибкой {errors}',
+             f'В обработке: {executor["active"]} из {executor["limit"]}, ждут очереди чата: {executor["queued"]}']
+    for chat in executor.get('chats', ()):
+        lines.append(f'Чат {chat["chat_id"]}: в очереди {chat["depth"]} (максимум {chat["max_depth"]}), '
+                     f'ожидание в среднем {chat["avg_wait"] * 1000:.0f} мс, максимум {chat["max_wait"] * 1000:.0f} мс')
+
+    by_router: dict[str, list[Histogram]] = defaultdict(list)
+    for (router, _), histogram in metrics.handler_latency.items():
+        by_router[router].append(histogram)
+    all_handlers = Histogram.merged([item for items in by_router.values() for item in items], metrics.buckets)
+    lines.append(f'\n<b>Задержка обработчиков, мс</b>: {_latency(all_handlers)}')
+    for router, histograms in sorted(by_router.items()):
+        merged = Histogram.merged(histograms, metrics.buckets)
+        lines.append(f'{router}: {_latency(merged)} ({merged.count})')
+
+    if sessions is None:
+        lines.append('\n<b>Сессии FSM</b>: проверка сессий в этом процессе еще не выполнялась')
+    else:
+        counts = ', '.join(f'{name} {count}' for name, count in sorted(sessions.sessions.items()))
+        lines.append(f'\n<b>Сессии FSM</b> ({_ago(now - sessions.finished_at)} назад): {counts}')
+    lines.append(f'Кэш FSM: {cache["hit_rate"]:.0%} попаданий, {cache["size"]} чатов'
+                 + ('' if cache['enabled'] else ', выключен'))
+
+    busy = pool['size'] - pool['idle']
+    lines.append(f'PostgreSQL: занято {busy} из {pool["size"]} (максимум {pool_max}), '
+                 f'ожидание соединения в среднем {pool["wait"].avg * 1000:.1f} мс')
+    lines.append(f'Исходящие: в очереди {outbound["queued"]}, задержано {outbound["delayed"]} '
+                 f'из {outbound["requests"]}, повторов после 429: {outbound["retries"]}')
+    lines.append(f'Цикл событий: отставание p99 {loop["lag_p99"] * 1000:.1f} мс, '
+                 f'максимум {loop["lag_max"] * 1000:.0f} мс, блокировок {loop["stalls"]}')
+
+    current, peak = rss_mb()
+    lines.append(f'Память: RSS {current:.0f} МБ (пик {peak:.0f} МБ)')
+    return '\n'.join(lines)
@@ -0,0 +1,109 @@
+import asyncio
+import unittest
+
+from aiogram import Bot, Dispatcher, Router, F, types
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import Update
+
+from app.server.executor import ChatOrderedExecutor
+from app.testing.fake_telegram import make_message_update
+
+
+def key(chat_id: int) -> StorageKey:
+    return StorageKey(bot_id=42, chat_id=chat_id, user_id=chat_id)
+
+
+class TestChatOrderedExecutor(unittest.IsolatedAsyncioTestCase):
+
+    async def test_same_chat_sequential_in_order(self):
+        executor = ChatOrderedExecutor(limit=10)
+        order = []
+
+        async def work(number):
+            async with executor.lock(key(1)):
+                order.append(('start', number))
+                await asyncio.sleep(0.01)
+                order.append(('end', number))
+
+        await asyncio.gather(*(work(number) for number in range(3)))
+
+        self.assertEqual(order, [('start', 0), ('end', 0), ('start', 1), ('end', 1), ('start', 2), ('end', 2)])
+
+    async def test_different_chats_bounded_by_limit(self):
+        executor = ChatOrderedExecutor(limit=2)
+        running = peak = 0
+
+        async def work(chat_id):
+            nonlocal running, peak
+            async with executor.lock(key(chat_id)):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(work(chat_id) for chat_id in range(5)))
+
+        self.assertEqual(peak, 2)
+
+    async def test_snapshot_reports_depth_and_wait(self):
+        executor = ChatOrderedExecutor(limit=10)
+        release = asyncio.Event()
+
+        async def work():
+            async with executor.lock(key(7)):
+                await release.wait()
+
+        tasks = [asyncio.create_task(work()) for _ in range(3)]
+        await asyncio.sleep(0.02)
+
+        snapshot = executor.snapshot()
+        self.assertEqual(snapshot['active'], 1)
+        self.assertEqual(snapshot['queued'], 2)
+        self.assertEqual(snapshot['chats'][0]['chat_id'], 7)
+        self.assertEqual(snapshot['chats'][0]['depth'], 3)
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+        chat = executor.snapshot()['chats'][0]
+        self.assertEqual((chat['depth'], chat['max_depth'], chat['updates']), (0, 3, 3))
+        self.assertGreater(chat['max_wait'], 0.01)
+        self.assertEqual(executor.snapshot()['queued'], 0)
+
+    async def test_stats_labels_top_chats(self):
+        executor = ChatOrderedExecutor(limit=10)
+        for chat_id in (1, 2, 3):
+            async with executor.lock(key(chat_id)):
+                pass
+
+        stats = executor.stats(top=2)
+        self.assertEqual(stats['queued'], 0)
+        self.assertEqual(len(stats['depth']), 2)
+        self.assertEqual(stats['depth'].keys(), stats['max_wait'].keys())
+        self.assertNotIn('chats', stats)
+
+
+class TestExecutorWithDispatcher(unittest.IsolatedAsyncioTestCase):
+    """Параллельно поданные обновления одного чата не теряют изменения данных FSM."""
+
+    async def test_concurrent_updates_do_not_race_on_fsm(self):
+        router = Router()
+
+        @router.message(F.text)
+        async def count(message: types.Message, state: FSMContext):
+            data = await state.get_data()
+            await asyncio.sleep(0.005)
+            await state.update_data(count=data.get('count', 0) + 1)
+
+        dp = Dispatcher(events_isolation=ChatOrderedExecutor(limit=10))
+        dp.include_router(router)
+        bot = Bot('42:TEST-token')
+
+        updates = [Update.model_validate({'update_id': number, **make_message_update(5, 'tap')},
+                                         context={'bot': bot}) for number in range(10)]
+        await asyncio.gather(*(dp.feed_update(bot, update) for update in updates))
+
+        data = await dp.storage.get_data(key=StorageKey(bot_id=bot.id, chat_id=5, user_id=5))
+        self.assertEqual(data['count'], 10)
+        await bot.session.close()
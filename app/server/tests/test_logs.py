@@ -0,0 +1,109 @@
+import io
+import json
+import logging
+import unittest
+
+from aiogram import Bot, Dispatcher, types
+from aiogram.filters import Command
+from aiogram.types import Update
+
+from app.server.logs import (JsonFormatter, LogContext, SamplingFilter, log_context, parse_rates, setup_logging,
+                             stop_logging)
+from app.testing.fake_telegram import make_message_update
+
+logger = logging.getLogger('app.tests.logs')
+
+
+class TestSamplingFilter(unittest.TestCase):
+
+    def record(self, name: str, level: int = logging.INFO) -> logging.LogRecord:
+        return logging.makeLogRecord({'name': name, 'levelno': level})
+
+    def test_longest_prefix_and_warnings(self):
+        sampling = SamplingFilter({'aiogram': 1.0, 'aiogram.event': 0.0})
+        self.assertFalse(sampling.filter(self.record('aiogram.event')))
+        self.assertTrue(sampling.filter(self.record('aiogram.event', logging.WARNING)))
+        self.assertTrue(sampling.filter(self.record('aiogram.dispatcher')))
+        self.assertTrue(sampling.filter(self.record('aiogram.eventual')))
+        self.assertTrue(sampling.filter(self.record('app.storage')))
+
+    def test_rate(self):
+        sampling = SamplingFilter({'aiogram.event': 0.25})
+        values = iter([0.1, 0.3, 0.2, 0.9])
+        sampling._random = lambda: next(values)
+        self.assertEqual([sampling.filter(self.record('aiogram.event')) for _ in range(4)],
+                         [True, False, True, False])
+
+    def test_parse_rates(self):
+        self.assertEqual(parse_rates('aiogram.event=0.01, app.storage=0.5'),
+                         {'aiogram.event': 0.01, 'app.storage': 0.5})
+        self.assertEqual(parse_rates(''), {})
+
+
+class TestQueueLogging(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        root = logging.getLogger()
+        handlers, level = root.handlers[:], root.level
+        root.handlers.clear()
+
+        def restore():
+            stop_logging()
+            root.handlers[:] = handlers
+            root.setLevel(level)
+
+        self.addCleanup(restore)
+        self.stream = io.StringIO()
+        setup_logging(logging.INFO, 'json', {'app.tests.logs.sampled': 0.0}, stream=self.stream)
+
+    def lines(self) -> list[dict]:
+        stop_logging()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    async def test_json_with_update_context(self):
+        logger.info('вне обновления %s', 1)
+        token = log_context.set((7, 100))
+        try:
+            logger.info('в обновлении')
+            logging.getLogger('app.tests.logs.sampled').info('не попадает в выборку')
+            try:
+                raise ValueError('ошибка')
+            except ValueError:
+                logger.exception('с исключением')
+        finally:
+            log_context.reset(token)
+
+        first, second, third = self.lines()
+        self.assertEqual((first['logger'], first['msg'], first['level']),
+                         ('app.tests.logs', 'вне обновления 1', 'INFO'))
+        self.assertNotIn('update_id', first)
+        self.assertEqual((second['update_id'], second['chat_id']), (7, 100))
+        self.assertEqual(third['level'], 'ERROR')
+        self.assertIn('ValueError: ошибка', third['exc'])
+
+    async def test_middleware_sets_update_and_chat(self):
+        dp = Dispatcher()
+        dp.update.outer_middleware(LogContext())
+
+        @dp.message(Command('start'))
+        async def start(message: types.Message):
+            logger.info('обработчик')
+
+        bot = Bot('42:TEST-token')
+        self.addAsyncCleanup(bot.session.close)
+        update = Update.model_validate({'update_id': 5, **make_message_update(321, '/start')}, context={'bot': bot})
+        await dp.feed_update(bot, update)
+
+        self.assertEqual([(line['msg'], line.get('update_id'), line.get('chat_id')) for line in self.lines()
+                          if line['logger'] == 'app.tests.logs'], [('обработчик', 5, 321)])
+
+
+class TestJsonFormatter(unittest.TestCase):
+
+    def test_plain_record(self):
+        record = logging.makeLogRecord({'name': 'x', 'levelname': 'INFO', 'msg': 'a %s', 'args': ('b',)})
+        self.assertEqual(json.loads(JsonFormatter().format(record))['msg'], 'a b')
+
+
+if __name__ == '__main__':
+    unittest.main()
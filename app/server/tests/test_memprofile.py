@@ -0,0 +1,44 @@
+import tracemalloc
+import unittest
+
+from app.server.memprofile import MemoryProfiler
+
+
+class Leak:
+    pass
+
+
+class TestMemoryProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = MemoryProfiler(frames=5, top=10, traces=1)
+        self.addCleanup(self.profiler.stop)
+
+    def test_off_by_default(self):
+        self.assertFalse(self.profiler.running)
+        self.assertFalse(tracemalloc.is_tracing())
+        with self.assertRaises(RuntimeError):
+            self.profiler.report()
+
+    def test_report_shows_growth_since_previous_snapshot(self):
+        self.profiler.start()
+        self.assertTrue(self.profiler.running)
+        leaked = [Leak() for _ in range(5000)]
+
+        report = self.profiler.report()
+        self.assertIn(__file__, report)
+        self.assertIn('+5000  Leak (всего 5000)', report)
+
+        # Второй отчет сравнивается уже со снимком, в котором объекты были.
+        self.assertNotIn(' Leak ', self.profiler.report())
+        del leaked
+
+    def test_stop(self):
+        self.profiler.start()
+        self.profiler.stop()
+        self.assertFalse(self.profiler.running)
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+if __name__ == '__main__':
+    unittest.main()
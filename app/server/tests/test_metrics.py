@@ -0,0 +1,117 @@
+import unittest
+
+from aiogram import Bot, Dispatcher, F, Router, types
+from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import Update
+from aiohttp import ClientSession
+
+from app.database.pool import Timing
+from app.server.metrics import Histogram, Metrics, create_metrics_app, setup_metrics
+from app.server.webhook import start_server
+from app.storage.transitions import advance_state, finish_state, restart_state
+from app.testing.fake_telegram import make_message_update
+
+TOKEN = '42:TEST-token'
+
+
+class Reg(StatesGroup):
+    first = State()
+    second = State()
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_cumulative_buckets(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.cumulative(), [('0.1', 2), ('1.0', 3), ('+Inf', 4)])
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 3.65)
+
+
+class TestMetrics(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        router = Router(name='wizard_router')
+
+        @router.message(Command('wizard'))
+        async def start(message: types.Message, state: FSMContext):
+            await restart_state(state, Reg.first)
+
+        @router.message(Reg.first, F.text == 'next')
+        async def step(message: types.Message, state: FSMContext):
+            await advance_state(state, Reg.second, answer=message.text)
+
+        @router.message(Reg.first)
+        async def wrong(message: types.Message):
+            pass
+
+        @router.message(Reg.second)
+        async def finish(message: types.Message, state: FSMContext):
+            await finish_state(state)
+            raise ValueError('ошибка в обработчике')
+
+        self.metrics = Metrics()
+        self.dp = Dispatcher()
+        self.dp.include_router(router)
+        setup_metrics(self.dp, self.metrics)
+        self.bot = Bot(TOKEN)
+        self.update_id = 0
+
+    async def feed(self, text: str) -> None:
+        self.update_id += 1
+        update = Update.model_validate({'update_id': self.update_id, **make_message_update(100, text)},
+                                       context={'bot': self.bot})
+        await self.dp.feed_update(self.bot, update)
+
+    async def test_counts_handlers_and_transitions(self):
+        for text in ('/wizard', 'wrong', 'next'):
+            await self.feed(text)
+        with self.assertRaises(ValueError):
+            await self.feed('done')
+
+        self.assertEqual(self.metrics.updates, {'message': 4})
+        self.assertEqual(self.metrics.update_errors, {'message': 1})
+        self.assertEqual(self.metrics.update_latency['message'].count, 4)
+        self.assertEqual({key: histogram.count for key, histogram in self.metrics.handler_latency.items()},
+                         {('wizard_router', 'start'): 1, ('wizard_router', 'wrong'): 1,
+                          ('wizard_router', 'step'): 1, ('wizard_router', 'finish'): 1})
+        self.assertEqual(self.metrics.handler_errors, {('wizard_router', 'finish', 'ValueError'): 1})
+        # Неверный ответ (wrong) не меняет состояние и переходом не считается.
+        self.assertEqual(self.metrics.transitions, {
+            ('wizard_router', 'none', 'Reg:first'): 1,
+            ('wizard_router', 'Reg:first', 'Reg:second'): 1,
+            ('wizard_router', 'Reg:second', 'finished'): 1,
+        })
+
+    async def test_render(self):
+        await self.feed('/wizard')
+        self.metrics.add_source('pool', lambda: {'opened': True, 'size': 2, 'state': 'closed',
+                                                 'queries': {'donor.lookup': Timing(count=3, total=0.5)}})
+
+        text = self.metrics.render()
+        self.assertIn('# TYPE bot_handler_seconds histogram\n', text)
+        self.assertIn('bot_updates_total{type="message"} 1\n', text)
+        self.assertIn('bot_handler_seconds_bucket{router="wizard_router",handler="start",le="+Inf"} 1\n', text)
+        self.assertIn('bot_handler_seconds_count{router="wizard_router",handler="start"} 1\n', text)
+        self.assertIn('bot_wizard_transitions_total{router="wizard_router",from="none",to="Reg:first"} 1\n', text)
+        self.assertIn('bot_pool_opened 1\n', text)
+        self.assertIn('bot_pool_size 2\n', text)
+        self.assertIn('bot_pool_state{value="closed"} 1\n', text)
+        self.assertIn('bot_pool_queries_count{name="donor.lookup"} 3\n', text)
+
+    async def test_endpoint(self):
+        await self.feed('/wizard')
+        runner = await start_server(create_metrics_app(self.metrics), '127.0.0.1', 0)
+        self.addAsyncCleanup(runner.cleanup)
+        port = runner.addresses[0][1]
+
+        async with ClientSession() as session:
+            async with session.get(f'http://127.0.0.1:{port}/metrics') as response:
+                self.assertEqual(response.status, 200)
+                self.assertTrue(response.headers['Content-Type'].startswith('text/plain; version=0.0.4'))
+                self.assertIn('bot_updates_total{type="message"} 1', await response.text())
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import time
+import unittest
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramRetryAfter
+
+from app.server.outbound import OutboundLimiter, TokenBucket
+from app.testing.fake_telegram import FakeTelegramServer
+
+TOKEN = '42:TEST'
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=10, capacity=3)
+        moments = [bucket.reserve(100.0) for _ in range(5)]
+        self.assertEqual(moments[:3], [100.0, 100.0, 100.0])
+        self.assertAlmostEqual(moments[3], 100.1)
+        self.assertAlmostEqual(moments[4], 100.2)
+
+    def test_refills_when_idle(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        bucket.reserve(100.0)
+        bucket.reserve(100.0)
+        self.assertEqual(bucket.reserve(101.0), 101.0)
+        self.assertTrue(TokenBucket(rate=1).idle(0.0))
+
+    def test_block_until(self):
+        bucket = TokenBucket(rate=10, capacity=3)
+        bucket.block_until(105.0)
+        self.assertEqual(bucket.reserve(100.0), 105.0)
+
+
+class TestOutboundLimiter(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        logger = logging.getLogger('app.server.outbound')
+        logger.setLevel(logging.ERROR)
+        self.addCleanup(logger.setLevel, logging.NOTSET)
+
+        self.telegram = FakeTelegramServer()
+        await self.telegram.start()
+        self.addAsyncCleanup(self.telegram.close)
+
+    async def make_bot(self, limiter: OutboundLimiter) -> Bot:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(self.telegram.url))
+        session.middleware(limiter)
+        bot = Bot(TOKEN, session=session)
+        self.addAsyncCleanup(bot.session.close)
+        return bot
+
+    async def test_chat_limit_delays_burst(self):
+        limiter = OutboundLimiter(global_rate=1000, chat_rate=20, burst=2)
+        bot = await self.make_bot(limiter)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(bot.send_message(1, str(number)) for number in range(4)))
+        elapsed = time.perf_counter() - started
+
+        self.assertGreaterEqual(elapsed, 0.09)  # 2 сразу, затем по одному раз в 50 мс
+        self.assertEqual([call.params['text'] for call in self.telegram.calls_of('sendMessage')],
+                         ['0', '1', '2', '3'])
+        stats = limiter.stats()
+        self.assertEqual((stats['requests'], stats['delayed'], stats['queued']), (4, 2, 0))
+        self.assertGreater(stats['max_delay'], 0.08)
+
+    async def test_chats_limited_separately(self):
+        limiter = OutboundLimiter(global_rate=1000, chat_rate=1, burst=1)
+        bot = await self.make_bot(limiter)
+
+        await asyncio.wait_for(asyncio.gather(*(bot.send_message(chat_id, 'ok') for chat_id in range(1, 6))), 1)
+        self.assertEqual(limiter.stats()['delayed'], 0)
+
+    async def test_retry_after_is_retried(self):
+        limiter = OutboundLimiter(max_retries=2)
+        bot = await self.make_bot(limiter)
+        self.telegram.flood_next('sendMessage', count=1, retry_after=1)
+
+        started = time.perf_counter()
+        message = await bot.send_message(1, 'ok')
+
+        self.assertEqual(message.text, 'ok')
+        self.assertGreaterEqual(time.perf_counter() - started, 0.9)
+        self.assertEqual(len(self.telegram.calls_of('sendMessage')), 2)
+        self.assertEqual((limiter.stats()['retries'], limiter.stats()['retry_after_total']), (1, 1))
+
+    async def test_retry_after_gives_up(self):
+        limiter = OutboundLimiter(max_retries=0)
+        bot = await self.make_bot(limiter)
+        self.telegram.flood_next('sendMessage', count=1)
+
+        with self.assertRaises(TelegramRetryAfter):
+            await bot.send_message(1, 'ok')
+        self.assertEqual(limiter.stats()['failed'], 1)
+
+    async def test_other_methods_not_limited(self):
+        limiter = OutboundLimiter()
+        bot = await self.make_bot(limiter)
+
+        await bot.send_chat_action(1, 'typing')
+        await bot.answer_callback_query('1')
+        self.assertEqual(limiter.stats()['requests'], 0)
@@ -0,0 +1,103 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from aiogram import Bot, Dispatcher, Router, F, types
+from aiogram.types import Update
+
+from app.server.recorder import Pseudonymizer, UpdateRecorder, read_recording
+from app.testing.fake_telegram import make_callback_update, make_message_update
+
+TOKEN = '42:TEST-token'
+ROOT = Path(__file__).resolve().parents[3]
+
+
+class TestPseudonymizer(unittest.TestCase):
+
+    def test_stable_and_keyed(self):
+        first, second = Pseudonymizer('salt'), Pseudonymizer('other')
+        self.assertEqual(first.pseudonym(100), first.pseudonym(100))
+        self.assertNotEqual(first.pseudonym(100), 100)
+        self.assertNotEqual(first.pseudonym(100), second.pseudonym(100))
+        self.assertLess(first.pseudonym(-100), 0)
+
+    def test_clean_removes_personal_fields(self):
+        update = make_callback_update(chat_id=100, data='/sofa')
+        update['callback_query']['from']['username'] = 'doctor'
+
+        cleaned = Pseudonymizer('salt').clean(update)
+        query = cleaned['callback_query']
+        self.assertEqual(query['from']['first_name'], 'user')
+        self.assertNotIn('username', query['from'])
+        self.assertEqual(query['from']['id'], query['message']['chat']['id'])
+        self.assertNotEqual(query['from']['id'], 100)
+        self.assertNotEqual(query['chat_instance'], '100')
+        self.assertEqual(query['data'], '/sofa')
+
+
+class TestUpdateRecorder(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.recorder = UpdateRecorder(self.directory.name, salt='salt')
+        self.recorder.open(worker_index=1)
+
+        self.handled = []
+        router = Router()
+
+        @router.message(F.text)
+        async def handler(message: types.Message):
+            self.handled.append(message.text)
+
+        self.dp = Dispatcher()
+        self.dp.include_router(router)
+        self.dp.update.outer_middleware(self.recorder)
+        self.bot = Bot(TOKEN)
+
+    async def feed(self, update_id: int, update: dict) -> None:
+        await self.dp.feed_update(self.bot, Update.model_validate({'update_id': update_id, **update},
+                                                                  context={'bot': self.bot}))
+
+    async def test_records_before_handlers(self):
+        await self.feed(1, make_message_update(chat_id=100, text='/sofa'))
+        await self.feed(2, make_message_update(chat_id=100, text='80'))
+        self.recorder.close()
+
+        self.assertEqual(self.handled, ['/sofa', '80'])
+        self.assertTrue(self.recorder.path.name.endswith('-1.jsonl.gz'))
+        with gzip.open(self.recorder.path, 'rt', encoding='utf-8') as file:
+            self.assertNotIn('"id": 100', file.read())
+
+        records = list(read_recording(self.recorder.path))
+        self.assertEqual([update['message']['text'] for _, update in records], ['/sofa', '80'])
+        self.assertLessEqual(records[0][0], records[1][0])
+        # Запись снова разбирается как обновление Telegram.
+        Update.model_validate(records[0][1])
+
+    async def test_closed_recorder_passes_updates(self):
+        self.recorder.close()
+        await self.feed(1, make_message_update(chat_id=100, text='/skf'))
+        self.assertEqual(self.handled, ['/skf'])
+        self.assertEqual(self.recorder.recorded, 0)
+
+
+class TestReplayCommand(unittest.TestCase):
+    """python -m benchmarks.replay запускается без .env: настройки бота ему не нужны."""
+
+    def test_runs_without_bot_settings(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'updates.jsonl.gz'
+            with gzip.open(path, 'wt', encoding='utf-8') as file:
+                update = {'update_id': 1, **make_message_update(chat_id=100, text='/sofa')}
+                file.write(json.dumps({'t': 0.0, 'update': update}) + '\n')
+            env = {name: value for name, value in os.environ.items()
+                   if name not in ('BOT_TOKEN', 'ADMIN_ID', 'REDIS_URL')}
+            result = subprocess.run([sys.executable, '-m', 'benchmarks.replay', str(path), '--speed', '0'],
+                                    cwd=ROOT, env=env, capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
@@ -0,0 +1,80 @@
+import time
+import unittest
+
+from app.database.pool import Timing
+from app.server.metrics import Histogram, Metrics, RateMeter
+from app.server.stats import format_stats
+from app.storage.sessions import SweepReport
+
+
+class TestHistogramQuantile(unittest.TestCase):
+
+    def test_interpolates_inside_bucket(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in [0.05] * 50 + [0.5] * 50:
+            histogram.observe(value)
+
+        self.assertAlmostEqual(histogram.quantile(0.5), 0.1)
+        self.assertAlmostEqual(histogram.quantile(0.75), 0.55)
+        self.assertEqual(Histogram().quantile(0.99), 0.0)
+
+    def test_merged(self):
+        first, second = Histogram(buckets=(0.1, 1.0)), Histogram(buckets=(0.1, 1.0))
+        first.observe(0.05)
+        second.observe(0.5)
+        merged = Histogram.merged([first, second], buckets=(0.1, 1.0))
+        self.assertEqual((merged.counts, merged.count), ([1, 1, 0], 2))
+
+
+class TestRateMeter(unittest.TestCase):
+
+    def test_window(self):
+        rate = RateMeter(window=10)
+        for tick in range(100):
+            rate.add(1000 + tick * 0.1)  # 10 событий в секунду
+
+        self.assertEqual(rate.per_second(1010), 9.0)
+        self.assertEqual(rate.per_second(1015), 4.0)
+        self.assertEqual(rate.per_second(1100), 0.0)
+
+
+class TestFormatStats(unittest.TestCase):
+
+    def test_text(self):
+        metrics = Metrics()
+        metrics.updates['message'] = 10
+        metrics.update_errors['message'] = 1
+        for value in (0.004, 0.02, 0.3):
+            metrics.histogram(metrics.handler_latency, ('sofa_router', 'step')).observe(value)
+        metrics.update_rate.add(time.perf_counter())
+
+        text = format_stats(
+            metrics,
+            SweepReport(sessions={'sofa': 3, 'skf': 1}, finished_at=time.time() - 30),
+            cache={'hit_rate': 0.9, 'size': 12, 'enabled': True},
+            pool={'size': 2, 'idle': 1, 'wait': Timing(count=2, total=0.004)},
+            outbound={'queued': 4, 'delayed': 5, 'requests': 50, 'retries': 1},
+            executor={'active': 3, 'limit': 100, 'queued': 2,
+                      'chats': [{'chat_id': 7, 'depth': 2, 'max_depth': 4, 'updates': 9, 'avg_wait': 0.012,
+                                 'max_wait': 1.5}]},
+            loop={'lag_p99': 0.002, 'lag_max': 0.05, 'stalls': 0},
+            pool_max=10)
+
+        self.assertIn('всего 10, с ошибкой 1', text)
+        self.assertIn('В обработке: 3 из 100, ждут очереди чата: 2', text)
+        self.assertIn('Чат 7: в очереди 2 (максимум 4), ожидание в среднем 12 мс, максимум 1500 мс', text)
+        self.assertIn('sofa_router: p50 18 · p95 462 · p99 492 (3)', text)
+        self.assertIn('(30 с назад): skf 1, sofa 3', text)
+        self.assertIn('Кэш FSM: 90% попаданий, 12 чатов', text)
+        self.assertIn('PostgreSQL: занято 1 из 2 (максимум 10), ожидание соединения в среднем 2.0 мс', text)
+        self.assertIn('Исходящие: в очереди 4', text)
+        self.assertIn('Память: RSS', text)
+
+    def test_without_sweep(self):
+        text = format_stats(Metrics(), None, {'hit_rate': 0.0, 'size': 0, 'enabled': False},
+                            {'size': 0, 'idle': 0, 'wait': Timing()},
+                            {'queued': 0, 'delayed': 0, 'requests': 0, 'retries': 0},
+                            {'active': 0, 'limit': 100, 'queued': 0}, {'lag_p99': 0.0, 'lag_max': 0.0, 'stalls': 0},
+                            pool_max=10)
+        self.assertIn('проверка сессий в этом процессе еще не выполнялась', text)
+        self.assertIn('выключен', text)
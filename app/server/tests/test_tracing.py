@@ -0,0 +1,158 @@
+import json
+import tempfile
+import unittest
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+from aiogram import Bot, Dispatcher, Router, types
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import Update
+from fakeredis import FakeAsyncRedis
+
+from app.database.pool import DatabasePool
+from app.server.tracing import TracedStorage, TraceRequests, Tracer, critical_path, setup_tracing, span
+from app.storage.cached import CachedStorage
+from app.storage.redis_hash import HashRedisStorage
+from app.storage.transitions import advance_state
+from app.testing.fake_telegram import FakeTelegramServer, make_message_update
+
+TOKEN = '42:TEST-token'
+
+
+class Reg(StatesGroup):
+    step = State()
+
+
+class FakeConnection:
+
+    async def fetchrow(self, query, *args):
+        return {'compatible': 'CcDee'}
+
+
+class TestCriticalPath(unittest.TestCase):
+
+    def test_sequential_spans_and_own_time(self):
+        record = {'duration': 1.0, 'spans': [
+            {'kind': 'fsm', 'name': 'get_state', 'start': 0.0, 'duration': 0.1},
+            {'kind': 'db', 'name': 'donor.lookup', 'start': 0.2, 'duration': 0.5},
+            {'kind': 'telegram', 'name': 'sendMessage', 'start': 0.7, 'duration': 0.2},
+        ]}
+        path = critical_path(record)
+        self.assertEqual([(item['kind'], item['name']) for item in path],
+                         [('fsm', 'get_state'), ('self', ''), ('db', 'donor.lookup'), ('telegram', 'sendMessage'),
+                          ('self', '')])
+        self.assertAlmostEqual(sum(item['duration'] for item in path), 1.0)
+
+    def test_parallel_spans_keep_latest(self):
+        record = {'duration': 0.5, 'spans': [
+            {'kind': 'telegram', 'name': 'sendMessage', 'start': 0.0, 'duration': 0.5},
+            {'kind': 'telegram', 'name': 'sendChatAction', 'start': 0.0, 'duration': 0.1},
+        ]}
+        self.assertEqual([item['name'] for item in critical_path(record)], ['sendMessage'])
+
+
+class TestTracer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.telegram = FakeTelegramServer()
+        await self.telegram.start()
+        self.addAsyncCleanup(self.telegram.close)
+        session = AiohttpSession(api=TelegramAPIServer.from_base(self.telegram.url))
+        session.middleware(TraceRequests())
+        self.bot = Bot(TOKEN, session=session)
+        self.addAsyncCleanup(self.bot.session.close)
+
+        self.pool = DatabasePool('postgresql://localhost/test')
+
+        @asynccontextmanager
+        async def acquire():
+            yield FakeConnection()
+
+        patcher = patch.object(self.pool, 'acquire', acquire)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        router = Router(name='wizard_router')
+
+        @router.message(Command('step'))
+        async def step(message: types.Message, state: FSMContext):
+            await self.pool.fetchrow('SELECT 1', name='donor.lookup')
+            await advance_state(state, Reg.step, answer=1)
+            await message.answer('готово')
+
+        @router.message(Command('fail'))
+        async def fail(message: types.Message):
+            raise RuntimeError('ошибка')
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.tracer = Tracer(self.directory.name, sample_rate=1.0)
+        self.tracer.open(worker_index=2)
+        self.addCleanup(self.tracer.close)
+
+        storage = CachedStorage(HashRedisStorage(FakeAsyncRedis()), shared=False)
+        self.dp = Dispatcher(storage=TracedStorage(storage))
+        self.dp.include_router(router)
+        setup_tracing(self.dp, self.tracer)
+
+    async def feed(self, update_id: int, text: str) -> None:
+        update = Update.model_validate({'update_id': update_id, **make_message_update(100, text)},
+                                       context={'bot': self.bot})
+        await self.dp.feed_update(self.bot, update)
+
+    def records(self) -> list[dict]:
+        self.tracer.close()
+        with open(self.tracer.path, encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+    async def test_records_spans_of_update(self):
+        await self.feed(7, '/step')
+
+        [record] = self.records()
+        self.assertTrue(self.tracer.path.name.endswith('trace-2.jsonl'))
+        self.assertEqual((record['update_id'], record['type'], record['handler']),
+                         (7, 'message', 'wizard_router.step'))
+        self.assertIsNone(record['error'])
+        self.assertEqual([(item['kind'], item['name']) for item in record['spans']],
+                         [('fsm', 'get_state'), ('db', 'donor.lookup'),
+                          ('fsm', 'update_data_and_set_state'), ('telegram', 'sendMessage')])
+        for item in record['spans']:
+            self.assertLessEqual(item['start'] + item['duration'], record['duration'])
+
+    async def test_tracer_directly_before_fsm(self):
+        # Middleware, подключенные после FSM-middleware, остаются внутри блокировки чата.
+        dp = Dispatcher()
+
+        async def later(handler, event, data):
+            return await handler(event, data)
+
+        dp.update.outer_middleware(later)
+        before = [middleware for middleware in dp.update.outer_middleware if middleware is not dp.fsm]
+        setup_tracing(dp, self.tracer)
+
+        middlewares = list(dp.update.outer_middleware)
+        fsm = middlewares.index(dp.fsm)
+        self.assertIs(middlewares[fsm - 1], self.tracer)
+        self.assertLess(fsm, middlewares.index(later))
+        self.assertEqual([middleware for middleware in middlewares if middleware not in (dp.fsm, self.tracer)],
+                         before)
+
+    async def test_sampling(self):
+        self.tracer.sample_rate = 0.0
+        await self.feed(1, '/step')
+        with self.assertRaises(RuntimeError):
+            await self.feed(2, '/fail')
+
+        # Обновление без ошибки не попало в выборку, с ошибкой записывается всегда.
+        self.assertEqual([(record['update_id'], record['error']) for record in self.records()],
+                         [(2, 'RuntimeError')])
+
+    async def test_span_outside_update(self):
+        with span('db', 'startup'):
+            pass
+        await self.pool.fetchrow('SELECT 1', name='donor.lookup')
+        self.assertEqual(self.records(), [])
@@ -0,0 +1,62 @@
+import asyncio
+import time
+import unittest
+
+from aiogram import Bot, Dispatcher, Router, types
+from aiogram.filters import Command
+from aiogram.types import Update
+
+from app.server.watchdog import LoopWatchdog
+from app.testing.fake_telegram import make_message_update
+
+TOKEN = '42:TEST-token'
+
+
+class TestLoopWatchdog(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        router = Router(name='slow_router')
+
+        @router.message(Command('block'))
+        async def blocking_handler(message: types.Message):
+            time.sleep(0.4)  # синхронный вызов в обработчике блокирует цикл событий
+
+        @router.message(Command('wait'))
+        async def waiting_handler(message: types.Message):
+            await asyncio.sleep(0.4)
+
+        self.dp = Dispatcher()
+        self.dp.include_router(router)
+        self.bot = Bot(TOKEN)
+
+        self.watchdog = LoopWatchdog(interval=0.02, threshold=0.15)
+        self.watchdog.watch_router(self.dp)
+        self.watchdog.start()
+        self.addAsyncCleanup(self.watchdog.stop)
+        await asyncio.sleep(0.05)
+
+    async def feed(self, text: str) -> None:
+        update = Update.model_validate({'update_id': 1, **make_message_update(100, text)}, context={'bot': self.bot})
+        await self.dp.feed_update(self.bot, update)
+
+    async def test_logs_blocking_handler_stack(self):
+        with self.assertLogs('app.server.watchdog', 'WARNING') as logs:
+            await self.feed('/block')
+            await asyncio.sleep(0.05)
+
+        self.assertEqual(self.watchdog.stalls, 1)
+        blocked = next(line for line in logs.output if 'заблокирован' in line)
+        self.assertIn('обновление message, роутер slow_router, обработчик blocking_handler', blocked)
+        self.assertIn('time.sleep(0.4)', blocked)
+        self.assertTrue(any('отставал' in line for line in logs.output))
+
+        stats = self.watchdog.stats()
+        self.assertGreaterEqual(stats['lag_max'], 0.3)
+        self.assertEqual(self.watchdog.lag.count, len(self.watchdog._recent))
+
+    async def test_awaiting_handler_does_not_stall(self):
+        await self.feed('/wait')
+
+        self.assertEqual(self.watchdog.stalls, 0)
+        self.assertLess(self.watchdog.stats()['lag_max'], 0.15)
+        self.assertGreater(self.watchdog.lag.count, 5)
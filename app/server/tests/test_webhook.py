@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import unittest
+
+from aiogram import Bot, Dispatcher, Router, F, types
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import ClientSession
+
+from app.server.webhook import create_app, start_server
+from app.testing.fake_telegram import FakeTelegramServer, make_message_update
+
+TOKEN = '42:TEST-token'
+
+logger = logging.getLogger(__name__)
+
+
+def create_dispatcher() -> Dispatcher:
+    """Диспетчер с одним обработчиком, отвечающим на любое текстовое сообщение."""
+    router = Router()
+
+    @router.message(F.text)
+    async def reply(message: types.Message):
+        await message.answer(f'echo: {message.text}')
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp
+
+
+class TestWebhookLatency(unittest.IsolatedAsyncioTestCase):
+    """
+    Замер задержки "обновление -> ответ" в режимах polling и webhook на локальной имитации Bot API.
+
+    Задержка считается от момента появления обновления в имитации Telegram до запроса sendMessage
+    от бота и выводится в лог теста.
+    """
+
+    async def asyncSetUp(self):
+        self.telegram = FakeTelegramServer()
+        await self.telegram.start()
+        self.bot = Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(self.telegram.url)))
+        self.dp = create_dispatcher()
+
+    async def asyncTearDown(self):
+        await self.bot.session.close()
+        await self.telegram.close()
+
+    async def measure(self, count: int = 20) -> list[float]:
+        """Отправляет count сообщений по одному и возвращает задержки ответа в секундах."""
+        latencies = []
+        for number in range(1, count + 1):
+            update_id = self.telegram.push_update(make_message_update(chat_id=100, text=f'msg {number}'))
+            call = await self.telegram.wait_for_call('sendMessage', count=number)
+            self.assertEqual(call.params['text'], f'echo: msg {number}')
+            latencies.append(call.timestamp - self.telegram.pushed_at[update_id])
+        return latencies
+
+    async def test_polling(self):
+        polling = asyncio.create_task(self.dp.start_polling(self.bot, handle_signals=False,
+                                                            close_bot_session=False, polling_timeout=5))
+        await self.telegram.wait_for_call('getUpdates')
+
+        latencies = await self.measure()
+
+        await self.dp.stop_polling()
+        await polling
+
+        logger.info('polling: средняя задержка %.2f мс', 1000 * sum(latencies) / len(latencies))
+        self.assertLess(max(latencies), 1)
+
+    async def test_webhook(self):
+        app = create_app(self.dp, self.bot, '/webhook', secret_token='secret')
+        runner = await start_server(app, '127.0.0.1', 0)
+        port = runner.addresses[0][1]
+        await self.bot.set_webhook(url=f'http://127.0.0.1:{port}/webhook', secret_token='secret')
+
+        latencies = await self.measure()
+
+        await runner.cleanup()
+
+        logger.info('webhook: средняя задержка %.2f мс', 1000 * sum(latencies) / len(latencies))
+        self.assertLess(max(latencies), 1)
+
+    async def test_webhook_rejects_wrong_secret(self):
+        app = create_app(self.dp, self.bot, '/webhook', secret_token='secret')
+        runner = await start_server(app, '127.0.0.1', 0)
+        port = runner.addresses[0][1]
+
+        async with ClientSession() as session:
+            async with session.post(f'http://127.0.0.1:{port}/webhook', json={'update_id': 1},
+                                    headers={'X-Telegram-Bot-Api-Secret-Token': 'wrong'}) as response:
+                status = response.status
+
+        await runner.cleanup()
+
+        self.assertEqual(status, 401)
+        self.assertEqual(self.telegram.calls_of('sendMessage'), [])
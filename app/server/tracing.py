@@ -0,0 +1,251 @@
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.fsm.storage.base import StateType, StorageKey
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+
+from app.server.executor import register_before_fsm
+from app.storage.base import WizardStorage
+
+logger = logging.getLogger(__name__)
+
+
+class Trace:
+    """
+    Трасса одного обновления: обращения к хранилищу FSM, базе данных и Bot API за время его обработки.
+
+    spans — список (вид, имя, начало от начала обновления, длительность, исключение или None), сек.
+    """
+    __slots__ = ('update_id', 'update_type', 'handler', 'state', 'started', 'spans')
+
+    def __init__(self, update_id: int, update_type: str):
+        self.update_id = update_id
+        self.update_type = update_type
+        self.handler: str | None = None
+        self.state: str | None = None
+        self.started = time.perf_counter()
+        self.spans: list[tuple[str, str, float, float, str | None]] = []
+
+
+# Трасса обновления, которое обрабатывается в текущей задаче; None — трассировка выключена.
+current_trace: ContextVar[Trace | None] = ContextVar('current_trace', default=None)
+
+
+@contextmanager
+def span(kind: str, name: str) -> Iterator[None]:
+    """
+    Участок трассы текущего обновления. Вне обновления (или без Tracer) ничего не записывает.
+
+    :param kind: Вид обращения: 'fsm', 'db', 'telegram'.
+    :param name: Операция: метод хранилища, имя запроса, метод Bot API.
+    """
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as exception:
+        error = type(exception).__name__
+        raise
+    finally:
+        trace.spans.append((kind, name, started - trace.started, time.perf_counter() - started, error))
+
+
+class Tracer(BaseMiddleware):
+    """
+    Трассировка обновлений: outer-middleware обновлений собирает участки (span) каждого обновления
+    и пишет трассу одной строкой JSON в файл trace-<воркер>.jsonl каталога directory.
+
+    Записываются доля sample_rate случайных обновлений и все обновления дольше slow секунд, поэтому
+    медленные обновления попадают в файл при любой доле. Файл ротируется по размеру (max_bytes,
+    backup_count старых файлов). Трассы читает python -m benchmarks.trace_report.
+
+    :param directory: Каталог для файлов трасс.
+    :param sample_rate: Доля обновлений, которые записываются всегда (0..1).
+    :param slow: Обновления дольше этого значения (сек) записываются независимо от sample_rate.
+    :param max_bytes: Размер файла, после которого он ротируется.
+    :param backup_count: Сколько старых файлов хранить.
+    """
+
+    def __init__(self, directory: str | Path, sample_rate: float = 0.01, slow: float = 1.0,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5):
+        self.directory = Path(directory)
+        self.sample_rate = sample_rate
+        self.slow = slow
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.written = 0
+        self.path: Path | None = None
+        self._handler: RotatingFileHandler | None = None
+        self._random = random.random
+
+    def open(self, worker_index: int = 0) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f'trace-{worker_index}.jsonl'
+        self._handler = RotatingFileHandler(self.path, maxBytes=self.max_bytes, backupCount=self.backup_count,
+                                            encoding='utf-8')
+        logger.info('Трассы обновлений пишутся в %s', self.path)
+
+    def close(self) -> None:
+        if self._handler is not None:
+            self._handler.close()
+            self._handler = None
+
+    def write(self, trace: Trace, duration: float, error: str | None) -> None:
+        record = {
+            't': time.time() - duration,
+            'update_id': trace.update_id,
+            'type': trace.update_type,
+            'handler': trace.handler,
+            'state': trace.state,
+            'duration': round(duration, 6),
+            'error': error,
+            'spans': [{'kind': kind, 'name': name, 'start': round(start, 6), 'duration': round(length, 6),
+                       **({'error': failure} if failure else {})}
+                      for kind, name, start, length, failure in trace.spans],
+        }
+        self._handler.emit(logging.makeLogRecord({'msg': json.dumps(record, ensure_ascii=False)}))
+        self.written += 1
+
+    async def __call__(self, handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: Update, data: dict[str, Any]) -> Any:
+        if self._handler is None:
+            return await handler(event, data)
+
+        trace = Trace(event.update_id, event.event_type)
+        token = current_trace.set(trace)
+        error = None
+        try:
+            return await handler(event, data)
+        except Exception as exception:
+            error = type(exception).__name__
+            raise
+        finally:
+            current_trace.reset(token)
+            duration = time.perf_counter() - trace.started
+            if duration >= self.slow or error or self._random() < self.sample_rate:
+                try:
+                    self.write(trace, duration, error)
+                except Exception:
+                    logger.exception('Не удалось записать трассу обновления')
+
+
+class TraceHandler(BaseMiddleware):
+    """Inner-middleware событий: имя обработчика и состояние FSM до шага в трассе обновления."""
+
+    async def __call__(self, handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: dict[str, Any]) -> Any:
+        trace = current_trace.get()
+        if trace is not None:
+            trace.handler = f'{data["event_router"].name}.{data["handler"].callback.__name__}'
+            trace.state = data.get('raw_state')
+        return await handler(event, data)
+
+
+class TraceRequests(BaseRequestMiddleware):
+    """Request-middleware сессии бота: каждый метод Bot API — участок 'telegram' трассы обновления."""
+
+    async def __call__(self, make_request: NextRequestMiddlewareType[TelegramType], bot: Bot,
+                       method: TelegramMethod[TelegramType]) -> Response[TelegramType]:
+        with span('telegram', method.__api_method__):
+            return await make_request(bot, method)
+
+
+class TracedStorage(WizardStorage):
+    """Хранилище FSM, записывающее каждое обращение к storage как участок 'fsm' трассы обновления."""
+
+    def __init__(self, storage: WizardStorage):
+        self.storage = storage
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        with span('fsm', 'set_state'):
+            await self.storage.set_state(key, state)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        with span('fsm', 'get_state'):
+            return await self.storage.get_state(key)
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        with span('fsm', 'set_data'):
+            await self.storage.set_data(key, data)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        with span('fsm', 'get_data'):
+            return await self.storage.get_data(key)
+
+    async def update_data(self, key: StorageKey, data: dict[str, Any]) -> dict[str, Any]:
+        with span('fsm', 'update_data'):
+            return await self.storage.update_data(key, data)
+
+    async def update_data_and_set_state(self, key: StorageKey, data: dict[str, Any], state: StateType) -> None:
+        with span('fsm', 'update_data_and_set_state'):
+            await self.storage.update_data_and_set_state(key, data, state)
+
+    async def reset(self, key: StorageKey, state: StateType = None, data: dict[str, Any] | None = None) -> None:
+        with span('fsm', 'reset'):
+            await self.storage.reset(key, state, data)
+
+    async def pop_data(self, key: StorageKey, data: dict[str, Any] | None = None) -> dict[str, Any]:
+        with span('fsm', 'pop_data'):
+            return await self.storage.pop_data(key, data)
+
+    async def close(self) -> None:
+        await self.storage.close()
+
+
+def setup_tracing(dispatcher: Dispatcher, tracer: Tracer) -> None:
+    """
+    Подключает Tracer к обновлениям и TraceHandler ко всем типам событий диспетчера.
+    TracedStorage и TraceRequests подключаются при создании диспетчера и сессии бота (config.py).
+
+    Tracer должен стоять перед FSM-middleware диспетчера, чтобы в трассу попали чтение состояния
+    и ожидание очереди чата, поэтому он вставляется прямо перед ним (register_before_fsm): остальные
+    middleware остаются на своих местах, и bot_update_seconds с трассировкой и без нее означает одно и то же.
+    """
+    register_before_fsm(dispatcher, tracer)
+    trace_handler = TraceHandler()
+    for name, observer in dispatcher.observers.items():
+        if name not in ('update', 'error'):
+            observer.middleware(trace_handler)
+
+
+def critical_path(record: dict) -> list[dict]:
+    """
+    Критический путь трассы: участки, определившие длительность обновления, по порядку.
+
+    От конца обновления назад выбирается участок, закончившийся последним до текущей точки; промежуток
+    между ним и точкой — собственное время бота (участок вида 'self'). Из параллельных участков
+    на путь попадает только самый поздний.
+    """
+    spans = sorted(record['spans'], key=lambda item: item['start'] + item['duration'])
+    path = []
+    cursor = record['duration']
+    while True:
+        candidates = [item for item in spans if item['start'] + item['duration'] <= cursor + 1e-9
+                      and item['start'] < cursor]
+        if not candidates:
+            break
+        item = candidates[-1]
+        end = item['start'] + item['duration']
+        if cursor - end > 1e-6:
+            path.append({'kind': 'self', 'name': '', 'start': end, 'duration': cursor - end})
+        path.append(item)
+        cursor = item['start']
+    if cursor > 1e-6:
+        path.append({'kind': 'self', 'name': '', 'start': 0.0, 'duration': cursor})
+    path.reverse()
+    return path
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from types import CodeType, FrameType
+from typing import Any
+
+from aiogram import Router
+
+from app.server.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограммы отставания цикла событий, сек.
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class LoopWatchdog:
+    """
+    Сторож цикла событий: непрерывно измеряет его отставание и ловит блокирующие вызовы.
+
+    Задача в цикле каждые interval секунд засыпает и измеряет, насколько позже срока проснулась —
+    это отставание (lag) попадает в гистограмму и в окно последних window замеров для перцентилей.
+    Отдельный поток проверяет, что задача просыпается вовремя. Если цикл не отвечает дольше threshold
+    секунд (синхронный запрос к базе данных, разбор большого файла, тяжелый расчет), поток снимает стек
+    потока цикла и пишет его в лог вместе с типом обновления и обработчиком из этого стека.
+    Обработчики известны сторожу после watch_router.
+
+    :param interval: Пауза между замерами, сек.
+    :param threshold: Блокировка цикла дольше этого значения (сек) пишется в лог со стеком.
+    :param window: По скольким последним замерам считаются перцентили в stats().
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.5, window: int = 1000):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = Histogram(LAG_BUCKETS)
+        self.stalls = 0
+        self.max_lag = 0.0
+
+        self._recent: deque[float] = deque(maxlen=window)
+        # код функции-обработчика -> (тип события, роутер, имя обработчика)
+        self._handlers: dict[CodeType, tuple[str, str, str]] = {}
+        self._heartbeat = 0.0
+        self._reported = 0.0
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def watch_router(self, router: Router) -> None:
+        """Запоминает обработчики роутера и всех вложенных роутеров, чтобы находить их в стеке."""
+        for nested in router.chain_tail:
+            for event_type, observer in nested.observers.items():
+                for handler in observer.handlers:
+                    code = getattr(handler.callback, '__code__', None)
+                    if code is not None:
+                        self._handlers[code] = (event_type, nested.name, handler.callback.__name__)
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._measure())
+        self._thread = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await asyncio.to_thread(self._thread.join)
+        self._thread = None
+
+    def stats(self) -> dict[str, Any]:
+        """Перцентили отставания цикла по последним замерам и число блокировок для мониторинга."""
+        recent = sorted(self._recent)
+
+        def percentile(percent: float) -> float:
+            if not recent:
+                return 0.0
+            return recent[max(0, min(len(recent) - 1, round(percent / 100 * len(recent)) - 1))]
+
+        return {'lag_p50': percentile(50), 'lag_p90': percentile(90), 'lag_p99': percentile(99),
+                'lag_max': self.max_lag, 'stalls': self.stalls}
+
+    async def _measure(self) -> None:
+        while True:
+            started = self._heartbeat = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.lag.observe(lag)
+            self._recent.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                logger.warning('Цикл событий отставал на %.3f сек', lag)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            heartbeat = self._heartbeat
+            stalled = time.perf_counter() - heartbeat - self.interval
+            if stalled > self.threshold and heartbeat != self._reported:
+                # Одна запись в лог на одну блокировку.
+                self._reported = heartbeat
+                self.stalls += 1
+                self._report(stalled)
+
+    def _report(self, stalled: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return
+        event_type, router, handler = self._find_handler(frame)
+        stack = ''.join(traceback.format_stack(frame))
+        logger.warning('Цикл событий заблокирован дольше %.3f сек: обновление %s, роутер %s, обработчик %s\n%s',
+                       stalled, event_type, router, handler, stack)
+
+    def _find_handler(self, frame: FrameType | None) -> tuple[str, str, str]:
+        """Ближайший к месту блокировки обработчик в стеке: (тип события, роутер, обработчик)."""
+        while frame is not None:
+            found = self._handlers.get(frame.f_code)
+            if found is not None:
+                return found
+            frame = frame.f_back
+        return '—', '—', '—'
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import secrets
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class WebhookHandler:
+    """
+    Обработчик POST-запросов Telegram с обновлениями.
+
+    Каждое обновление передается в dp.feed_update в отдельной задаче, а Telegram сразу получает
+    ответ 200, поэтому медленный обработчик не задерживает доставку следующих обновлений.
+
+    :param dispatcher: Диспетчер с зарегистрированными роутерами.
+    :param bot: Экземпляр бота, от имени которого обрабатываются обновления.
+    :param secret_token: Секрет из setWebhook. Запросы без него отклоняются (401).
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, secret_token: str | None = None):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.secret_token = secret_token
+        self._tasks: set[asyncio.Task] = set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.secret_token and not secrets.compare_digest(request.headers.get(SECRET_HEADER, ''),
+                                                            self.secret_token):
+            return web.Response(status=401, text='Unauthorized')
+
+        update = Update.model_validate(await request.json(loads=self.bot.session.json_loads),
+                                       context={'bot': self.bot})
+
+        task = asyncio.create_task(self._feed_update(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        return web.Response()
+
+    async def _feed_update(self, update: Update) -> None:
+        """Передает обновление диспетчеру; ошибки логируются, как при polling."""
+        try:
+            result = await self.dispatcher.feed_update(self.bot, update)
+            if isinstance(result, TelegramMethod):
+                await self.dispatcher.silent_call_request(bot=self.bot, result=result)
+        except Exception:
+            logger.exception('Ошибка при обработке обновления id=%d', update.update_id)
+
+    async def close(self, app: web.Application | None = None) -> None:
+        """Дожидается обработки уже принятых обновлений."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+def create_app(dispatcher: Dispatcher, bot: Bot, path: str, secret_token: str | None = None) -> web.Application:
+    """
+    Создает aiohttp-приложение, принимающее обновления Telegram по адресу path.
+
+    :return web.Application: Приложение с маршрутом POST path.
+    """
+    handler = WebhookHandler(dispatcher, bot, secret_token)
+
+    app = web.Application()
+    app.router.add_post(path, handler.handle)
+    app.on_shutdown.append(handler.close)
+
+    return app
+
+
+async def start_server(app: web.Application, host: str, port: int, reuse_port: bool = False) -> web.AppRunner:
+    """
+    Запускает aiohttp-приложение на host:port.
+
+    При reuse_port=True сокет открывается с SO_REUSEPORT: несколько процессов-воркеров
+    слушают один порт, а ядро распределяет между ними входящие соединения.
+
+    :return web.AppRunner: Запущенный runner, для остановки вызвать runner.cleanup().
+    """
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port, reuse_port=reuse_port).start()
+
+    return runner
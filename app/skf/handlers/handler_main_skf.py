@@ -9,9 +9,10 @@ from app.skf.handlers.calc_GenAgeCreatinin import calc_skf
 from app.skf.handlers.get_gender_user import get_gender
 from app.skf.handlers.get_number_creatinine_age import get_answer_age, get_answer_creatinine
 from app.skf.keyboards.inline_kb_skf import inline_skf
-from app.skf.keyboards.reply_kb_skf import reply_skf
+from app.skf.keyboards.reply_kb_skf import reply_skf, gender_codec
+from app.storage.transitions import restart_state, advance_state, finish_state
 
-skf_router = Router()
+skf_router = Router(name='skf_router')
 
 
 class Reg(StatesGroup):
@@ -23,6 +24,11 @@ class Reg(StatesGroup):
     creatinin = State()  # креатинин.
 
 
+def calculate_skf(data: dict) -> str:
+    """Результат расчета СКФ по данным сценария (пол хранится номером варианта)."""
+    return calc_skf(gender_codec.decode(data['gender']), data['age'], data['creatinin'])
+
+
 @skf_router.message(Command('skf'))
 async def cmd_skf(message: types.Message, state: FSMContext):
     """
@@ -42,21 +48,20 @@ async def cmd_skf(message: types.Message, state: FSMContext):
     соответствующую клавиатуру для выбора. Устанавливает состояние
     Reg.gender для ожидания ввода данных о поле пользователя.
     """
-    await state.clear()  # автоматический сброс закрытие сценария заполнения.
+    # автоматический сброс закрытие сценария заполнения и установка состояния Reg.gender
+    await restart_state(state, Reg.gender)
 
     await message.answer(f'Выбрали: скорость клубочковой фильтрации для взрослых (CKD-EPI)')
 
-    await state.set_state(Reg.gender)  # Установка состояния Reg.gender
     await message.answer(f'Выберите пол: ', reply_markup=reply_skf())
 
 
 @skf_router.callback_query(F.data == '/skf')
 async def start_callback(callback: CallbackQuery, state: FSMContext):
-    await state.clear()
+    await restart_state(state, Reg.gender)
     await callback.message.answer(f'Выбрали: скорость клубочковой фильтрации для взрослых (CKD-EPI)')
     await callback.answer(f'Cкорость клубочковой фильтрации')
 
-    await state.set_state(Reg.gender)
     await callback.message.answer(f'Выберите пол: ', reply_markup=reply_skf())
 
 
@@ -86,9 +91,9 @@ async def reg_gender(message: types.Message, state: FSMContext):
         await message.reply(f'<b>Введите корректный пол!</b>')
         return
 
-    await state.update_data(gender=message.text.lower())  # Сохраняет введенное пользователем значение пол.
+    # Сохраняет введенное пользователем значение пол, установка состояния Reg.age.
+    await advance_state(state, Reg.age, gender=gender_codec.encode(message.text.lower()))
 
-    await state.set_state(Reg.age)
     await message.answer(f'Введите возраст: ')
 
 
@@ -121,11 +126,10 @@ async def reg_age(message: types.Message, state: FSMContext):
         await message.reply(f'<b>Пожалуйста, введите корректный возраст! (число от 18 до 100)</b>')
         return
 
-    # Сохраняет введенное пользователем значение возраст.
-    await state.update_data(age=message.text)
+    # Сохраняет введенное пользователем значение возраст, установка состояния Reg.creatinin.
+    await advance_state(state, Reg.creatinin, age=message.text)
 
     await message.answer(f'Введите креатинин (мкмоль/л): ')
-    await state.set_state(Reg.creatinin)
 
 
 @skf_router.message(F.text, Reg.creatinin)
@@ -159,18 +163,15 @@ async def reg_creatinin(message: types.Message, state: FSMContext):
         await message.reply(f'<b>Пожалуйста, введите корректный креатинин! (от 0 до 1000)</b>')
         return
 
-    # Сохраняет введенное пользователем значение креатинин
-    await state.update_data(creatinin=message.text)
-
-    # извлекаем данные полученные от пользователя: пол, возраст, креатинин.
-    data = await state.get_data()
+    # Сохраняет введенное пользователем значение креатинин, извлекаем данные полученные
+    # от пользователя: пол, возраст, креатинин и очищаем состояние.
+    data = await finish_state(state, creatinin=message.text)
 
     # Расчет результата.
-    total = calc_skf(data['gender'], data['age'], data['creatinin'])
+    total = calculate_skf(data)
 
     # Распечатка полученного результата.
     await message.answer(f'{total}')
-    await state.clear()
 
     # Меню: на стартовую страницу или вернуться назад
     await message.answer(f'Выберите действие: ', reply_markup=inline_skf())
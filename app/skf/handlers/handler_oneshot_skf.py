@@ -0,0 +1,34 @@
+import html
+
+from aiogram import Router, types, F
+from aiogram.filters import Command, CommandObject
+
+from app.skf.handlers.handler_main_skf import calculate_skf
+from app.skf.handlers.parse_skf import USAGE, SkfInputError, parse_skf
+from app.skf.keyboards.inline_kb_skf import inline_skf
+from app.skf.keyboards.reply_kb_skf import gender_codec
+
+# Команда /skf с аргументами: расчет по одному сообщению, без сценария и без записи в хранилище FSM.
+# Команда /skf без аргументов обрабатывается сценарием (skf_router или skf_inline_router).
+skf_oneshot_router = Router(name='skf_oneshot_router')
+
+
+@skf_oneshot_router.message(Command('skf', magic=F.args))
+async def skf_oneshot(message: types.Message, command: CommandObject):
+    """
+    Обрабатывает команду '/skf ж 67 94': разбирает пол, возраст и креатинин из одного сообщения,
+    проверяет их теми же функциями, что и сценарий, и одним сообщением отвечает результатом с меню.
+    При ошибках во вводе отвечает списком ошибок и форматом команды. Состояние FSM не меняется.
+
+    :param message: Сообщение с командой.
+    :param command: Команда и ее аргументы.
+    """
+    try:
+        data = parse_skf(command.args)
+    except SkfInputError as error:
+        problems = '\n'.join(f'• {problem}' for problem in error.problems)
+        await message.reply(f'<b>Не удалось рассчитать СКФ:</b>\n{html.escape(problems)}\n\n{USAGE}')
+        return
+
+    inputs = f'Пол: {gender_codec.decode(data["gender"])}, возраст: {data["age"]}, креатинин: {data["creatinin"]}'
+    await message.answer(f'{inputs}\n\n{calculate_skf(data)}', reply_markup=inline_skf())
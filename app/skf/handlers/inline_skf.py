@@ -0,0 +1,20 @@
+# Расчет СКФ в одном сообщении (WIZARD_MODE=inline): те же шаги, что в handler_main_skf.py.
+from app.skf.handlers.get_number_creatinine_age import get_answer_age
+from app.skf.handlers.handler_main_skf import Reg, calculate_skf
+from app.skf.handlers.parse_skf import CREATININE_RANGE, check_creatinine
+from app.skf.keyboards.inline_kb_skf import inline_skf
+from app.skf.keyboards.reply_kb_skf import ONE, TWO, gender_codec
+from app.wizard.inline import Choice, InlineWizard, Number
+
+skf_wizard = InlineWizard(
+    'skf', 'Скорость клубочковой фильтрации для взрослых (CKD-EPI)',
+    [
+        Choice(Reg.gender, 'gender', 'Пол', 'Выберите пол:', gender_codec, buttons=(ONE, TWO), normalize=str.lower),
+        Number(Reg.age, 'age', 'Возраст', 'Введите возраст:', get_answer_age,
+               'Пожалуйста, введите корректный возраст! (число от 18 до 100)'),
+        Number(Reg.creatinin, 'creatinin', 'Креатинин', 'Введите креатинин (мкмоль/л):', check_creatinine,
+               f'Пожалуйста, введите корректный креатинин! ({CREATININE_RANGE})'),
+    ],
+    result=calculate_skf, menu=inline_skf)
+
+skf_inline_router = skf_wizard.router
@@ -0,0 +1,92 @@
+# Расчет СКФ одной командой: пол, возраст и креатинин в одном сообщении вместо трех шагов сценария.
+# /skf ж 67 94, /skf муж 45 лет кр 110, /skf возраст=70, креатинин=88, женщина
+import re
+
+from app.skf.handlers.get_gender_user import get_gender
+from app.skf.handlers.get_number_creatinine_age import get_answer_age, get_answer_creatinine
+from app.skf.keyboards.reply_kb_skf import gender_codec
+
+USAGE = ('Формат: <code>/skf ж 67 94</code> — пол, возраст (лет) и креатинин (мкмоль/л). '
+         'Возраст и креатинин можно подписать: <code>/skf муж возраст 45 кр 110</code>.')
+
+# Слова (числа с дробной частью — одним словом, чтобы «94.5» не разбивалось на два значения).
+TOKEN = re.compile(r'\d+(?:[.,]\d+)?|[^\W\d_]+')
+
+# Варианты записи пола -> значение, которое принимает get_gender.
+GENDERS = {'ж': 'жен', 'жен': 'жен', 'женский': 'женский', 'женщина': 'жен', 'f': 'жен', 'female': 'жен',
+           'м': 'муж', 'муж': 'муж', 'мужской': 'мужской', 'мужчина': 'муж', 'm': 'муж', 'male': 'муж'}
+
+# Подписи значений: следующее число относится к этому полю.
+LABELS = {'возраст': 'age', 'age': 'age',
+          'кр': 'creatinin', 'креатинин': 'creatinin', 'cr': 'creatinin', 'creat': 'creatinin'}
+
+NAMES = {'gender': 'пол', 'age': 'возраст', 'creatinin': 'креатинин'}
+
+# Единицы измерения пропускаются.
+UNITS = {'лет', 'год', 'года', 'мкмоль', 'л'}
+
+
+# Креатинин, который принимают /skf и сценарий в одном сообщении.
+CREATININE_RANGE = 'число от 1 до 1000'
+
+
+def check_creatinine(value: str) -> int | None:
+    """
+    Проверка креатинина: get_answer_creatinine без нуля. get_answer_creatinine пропускает 0,
+    но calc_skf на нем делит на ноль.
+    """
+    return get_answer_creatinine(value) or None
+
+
+class SkfInputError(ValueError):
+    """Ошибки во входных данных команды: список сообщений для пользователя."""
+
+    def __init__(self, problems: list[str]):
+        super().__init__('; '.join(problems))
+        self.problems = problems
+
+
+def parse_skf(args: str) -> dict[str, str | int]:
+    """
+    Разбирает аргументы команды /skf в данные сценария СКФ в том виде, в каком их сохраняет сценарий:
+    пол — номером варианта клавиатуры, возраст и креатинин — текстом. Пол можно указать в любом месте,
+    числа без подписи — по порядку: возраст, затем креатинин. Значения проверяются теми же функциями,
+    что и ответы в сценарии (get_gender, get_answer_age, get_answer_creatinine).
+
+    :raises SkfInputError: Непонятные слова, лишние или пропущенные значения, некорректные значения.
+    """
+    values: dict[str, str] = {}
+    problems = []
+    label = None
+    for token in TOKEN.findall(args.lower()):
+        if token in UNITS:
+            continue
+        if token in LABELS:
+            label = LABELS[token]
+            continue
+        if token in GENDERS:
+            field, token = 'gender', GENDERS[token]
+        elif token[0].isdigit():
+            field = label or next((name for name in ('age', 'creatinin') if name not in values), None)
+            label = None
+        else:
+            problems.append(f'не понял «{token}»')
+            continue
+        if field is None:
+            problems.append(f'лишнее значение {token}')
+        elif field in values:
+            problems.append(f'{NAMES[field]} указан дважды')
+        else:
+            values[field] = token
+
+    checks = (('gender', 'ж или м', lambda value: get_gender(value) != 'Ошибка'),
+              ('age', 'число от 18 до 100', get_answer_age),
+              ('creatinin', CREATININE_RANGE, check_creatinine))
+    for field, expected, check in checks:
+        if field not in values:
+            problems.append(f'не хватает: {NAMES[field]} ({expected})')
+        elif not check(values[field]):
+            problems.append(f'некорректный {NAMES[field]} {values[field]}: нужно {expected}')
+    if problems:
+        raise SkfInputError(problems)
+    return {'gender': gender_codec.encode(values['gender']), 'age': values['age'], 'creatinin': values['creatinin']}
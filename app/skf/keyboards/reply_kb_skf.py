@@ -1,10 +1,14 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 
+from app.storage.codec import OptionCodec
 
 ONE = ('Женский')
 
 TWO = ('Мужской')
 
+# В данных FSM пол хранится номером варианта. Обработчик приводит ввод к нижнему регистру.
+gender_codec = OptionCodec('женский', 'мужской', aliases={'жен': 'женский', 'муж': 'мужской'})
+
 def reply_skf() -> ReplyKeyboardMarkup:
     """
     Создает клавиатуру для команды /skf.
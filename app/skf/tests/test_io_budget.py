@@ -0,0 +1,51 @@
+import unittest
+
+from app.skf.handlers.inline_skf import skf_inline_router
+from app.skf.keyboards.reply_kb_skf import gender_codec
+from app.testing.fake_telegram import make_callback_update
+from app.testing.io_budget import IOBudgetTestCase
+from app.wizard.inline import WizardCallback
+
+
+class TestSkfIOBudget(IOBudgetTestCase):
+    """Обращения к Bot API и Redis за полный расчет СКФ: команда, пол, возраст, креатинин."""
+
+    async def test_command(self):
+        counts = await self.converse(100, '/skf', gender_codec.options[1], '40', '90')
+        self.assertWithinBudget(counts, telegram=6, redis=6)
+
+    async def test_menu_button(self):
+        counts = await self.converse(100, make_callback_update(100, '/skf'), gender_codec.options[0], '65', '120')
+        self.assertWithinBudget(counts, telegram=7, redis=6)
+
+
+class TestOneShotSkfIOBudget(IOBudgetTestCase):
+    """Расчет СКФ одной командой '/skf ж 67 94': одно сообщение, хранилище FSM только читается."""
+
+    async def test_command(self):
+        counts = await self.converse(100, '/skf ж 67 94')
+        self.assertEqual(counts.telegram['sendMessage'], 1)
+        self.assertNotIn('EVALSHA', counts.redis)
+        self.assertWithinBudget(counts, telegram=1, redis=2)
+
+
+class TestInlineSkfIOBudget(IOBudgetTestCase):
+    """Те же ответы в сценарии в одном сообщении: одно новое сообщение, остальные шаги правят его."""
+    routers = (skf_inline_router,)
+
+    async def test_command(self):
+        gender = make_callback_update(100, WizardCallback(wizard='skf', step=0, code=1).pack())
+        counts = await self.converse(100, '/skf', gender, '40', '90')
+        self.assertEqual(counts.telegram['sendMessage'], 1)
+        self.assertWithinBudget(counts, telegram=5, redis=6)
+
+    async def test_zero_creatinine(self):
+        # Креатинин 0 отклоняется (calc_skf на нем делит на ноль): бот переспрашивает, а не падает.
+        gender = make_callback_update(100, WizardCallback(wizard='skf', step=0, code=1).pack())
+        await self.converse(100, '/skf', gender, '40', '0')
+        text = self.telegram.calls_of('editMessageText')[-1].params['text']
+        self.assertIn('корректный креатинин! (число от 1 до 1000)', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
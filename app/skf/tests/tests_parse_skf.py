@@ -0,0 +1,48 @@
+import unittest
+
+from app.skf.handlers.handler_main_skf import calculate_skf
+from app.skf.handlers.parse_skf import SkfInputError, parse_skf
+
+
+class TestParseSkf(unittest.TestCase):
+    """Разбор команды '/skf ж 67 94' в данные сценария СКФ."""
+
+    def test_short_form(self):
+        self.assertEqual(parse_skf('ж 67 94'), {'gender': 0, 'age': '67', 'creatinin': '94'})
+        self.assertEqual(parse_skf('М 45 110'), {'gender': 1, 'age': '45', 'creatinin': '110'})
+
+    def test_natural_variants(self):
+        expected = {'gender': 0, 'age': '70', 'creatinin': '88'}
+        for args in ('женщина, 70 лет, креатинин 88', 'возраст=70 кр=88 жен', 'кр 88 возраст 70 женский',
+                     '70 88 мкмоль/л f'):
+            with self.subTest(args=args):
+                self.assertEqual(parse_skf(args), expected)
+
+    def test_same_result_as_wizard(self):
+        self.assertEqual(calculate_skf(parse_skf('ж 67 94')),
+                         calculate_skf({'gender': 0, 'age': '67', 'creatinin': '94'}))
+
+    def test_problems(self):
+        with self.assertRaises(SkfInputError) as raised:
+            parse_skf('x ж м 15 94.5 3')
+        self.assertEqual(raised.exception.problems, [
+            'не понял «x»',
+            'пол указан дважды',
+            'лишнее значение 3',
+            'некорректный возраст 15: нужно число от 18 до 100',
+            'некорректный креатинин 94.5: нужно число от 1 до 1000'])
+
+    def test_zero_creatinine(self):
+        with self.assertRaises(SkfInputError) as raised:
+            parse_skf('ж 67 0')
+        self.assertEqual(raised.exception.problems, ['некорректный креатинин 0: нужно число от 1 до 1000'])
+
+    def test_missing(self):
+        with self.assertRaises(SkfInputError) as raised:
+            parse_skf('67')
+        self.assertEqual(raised.exception.problems,
+                         ['не хватает: пол (ж или м)', 'не хватает: креатинин (число от 1 до 1000)'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import CallbackQuery
 
-from app.anesthetic_risk.keyboards.keyboard_hypotension import kb_hypotension
+from app.anesthetic_risk.keyboards.keyboard_hypotension import kb_hypotension, hypotension_codec
 from app.sofa.handlers.calc_EyeVerbalMotor import (calculation_Eye_response, calculation_Verbal_response,
                                                    calculation_Motor_response, final_calculation_EyeVerbalMotor)
 from app.sofa.handlers.calc_hypotension import calculate_hypotension
@@ -20,13 +20,14 @@ from app.sofa.handlers.check_Correct_values import (check_correct_values_FioPao,
                                                     check_correct_kb_motor)
 from app.sofa.handlers.result_calculating_functions import total_result_functions
 from app.sofa.keyboards.inline_kb_sofa import inline_sofa
-from app.sofa.keyboards.kb_creatinin import kb_creatinin
-from app.sofa.keyboards.kb_eye import kb_eye
-from app.sofa.keyboards.kb_liver import kb_liver
-from app.sofa.keyboards.kb_motor import kb_motor
-from app.sofa.keyboards.kb_platelet import kb_platelet
-from app.sofa.keyboards.kb_respiratory import kb_respiratory
-from app.sofa.keyboards.kb_verbal import kb_verbal
+from app.sofa.keyboards.kb_creatinin import kb_creatinin, creatinin_codec
+from app.sofa.keyboards.kb_eye import kb_eye, eye_codec
+from app.sofa.keyboards.kb_liver import kb_liver, liver_codec
+from app.sofa.keyboards.kb_motor import kb_motor, motor_codec
+from app.sofa.keyboards.kb_platelet import kb_platelet, platelet_codec
+from app.sofa.keyboards.kb_respiratory import kb_respiratory, respiratory_codec
+from app.sofa.keyboards.kb_verbal import kb_verbal, verbal_codec
+from app.storage.transitions import restart_state, advance_state, finish_state
 
 
 class Reg(StatesGroup):
@@ -64,8 +65,51 @@ class Reg(StatesGroup):
     motor_response = State()  # Двигательная реакция
 
 
+def calculate_sofa(data: dict) -> str:
+    """
+    Итог шкалы SOFA (HTML) по данным сценария: PaO₂, FiO₂ и номерам выбранных вариантов.
+    Общий для сценария с обычной клавиатурой и сценария в одном сообщении (inline_sofa.py).
+    """
+    # Ответы с клавиатур хранятся номерами кнопок (app/storage/codec.py), текст восстанавливается перед расчетом.
+
+    # получение значения Дыхание pao2, fio2
+    total_PaoFio = calculation_PaoFio(data['pao2'], data['fio2'])
+
+    # получение значения Респираторная поддержка respiratory
+    total_respiratory = calculation_respiratory(respiratory_codec.decode(data['respiratory']))
+
+    # получение значения тромбоциты platelet
+    total_platelet = calculation_platelet(platelet_codec.decode(data['platelet']))
+
+    # получение значения Печень
+    total_liver = calculation_liver(liver_codec.decode(data['liver']))
+
+    # получение значения Креатинин
+    total_kidney = calculation_creatinin(creatinin_codec.decode(data['creatinin_kidney']))
+
+    # получение значения Гипотензия
+    total_hypotension = calculate_hypotension(hypotension_codec.decode(data['hypotension']))
+
+    # Расчет Шкала комы Глазго:
+    #     eye_response: Открывание глаз.
+    #     verbal_response: Речевая реакция.
+    #     motor_response: Двигательная реакция.
+    total_EyeVerbalMotor = final_calculation_EyeVerbalMotor(
+        calculation_Eye_response(eye_codec.decode(data['eye_response'])),
+        calculation_Verbal_response(verbal_codec.decode(data['verbal_response'])),
+        calculation_Motor_response(motor_codec.decode(data['motor_response'])))
+
+    # Финальный расчет, вывод результата
+    final_number = total_result_functions(total_PaoFio, total_respiratory,
+                                        total_platelet, total_liver,
+                                        total_kidney, total_hypotension,
+                                        total_EyeVerbalMotor)
+
+    return final_number
+
+
 # Экземпляр класса Router, представляющий маршрутизатор для управления сетевыми соединениями.
-sofa_router = Router()
+sofa_router = Router(name='sofa_router')
 
 
 @sofa_router.message(Command('sofa'))
@@ -84,13 +128,12 @@ async def start_command(message: types.Message, state: FSMContext):
     - message (types.Message): Сообщение, содержащее команду от пользователя.
     - state (FSMContext): Контекст состояния для управления состоянием пользователя в сценарии.
     """
-    await state.clear()  # автоматический сброс закрытие сценария заполнения.
+    # автоматический сброс закрытие сценария заполнения и установка состояния Reg.pao2.
+    await restart_state(state, Reg.pao2)
 
     await message.answer(f'Выбрали: шкала SOFA (оценка прогноза смертности и степени органной недостаточности'
                          f' у пациентов ОРИТ)')
 
-    await state.set_state(Reg.pao2)  # Установка состояния Reg.pao2.
-
     await message.answer(f'Введите PaO₂ (мм рт. ст.): ')
 
 
@@ -114,14 +157,13 @@ async def start_callback(callback: CallbackQuery, state: FSMContext):
     :return
     - None: Функция не возвращает значения, но отправляет сообщения пользователю.
     """
-    await state.clear()  # автоматический сброс закрытие сценария заполнения.
+    # автоматический сброс закрытие сценария заполнения и установка состояния Reg.pao2.
+    await restart_state(state, Reg.pao2)
 
     await callback.message.answer(f'Выбрали: шкала SOFA (оценка прогноза смертности и степени органной недостаточности'
                                   f' у пациентов ОРИТ)')
     await callback.answer(f'шкала SOFA')
 
-    await state.set_state(Reg.pao2)  # Установка состояния Reg.pao2.
-
     await callback.message.answer(f'Введите PaO₂ (мм рт. ст.): ')
 
 
@@ -145,8 +187,8 @@ async def write_user_pao(message: types.Message, state: FSMContext):
         await message.reply(f'<b>Пожалуйста, введите корректное значение!</b>')
         return
 
-    await state.update_data(pao2=message.text)  # сохраняет введенное пользователем значение PaO₂
-    await state.set_state(Reg.fio2)  # Установка состояния Reg.fio2.
+    # сохраняет введенное пользователем значение PaO₂, установка состояния Reg.fio2.
+    await advance_state(state, Reg.fio2, pao2=message.text)
 
     await message.answer(f'Введите FiO₂ (мм рт. ст.): ')
 
@@ -172,8 +214,8 @@ async def write_user_fio(message: types.Message, state: FSMContext):
         await message.reply(f'<b>Пожалуйста, введите корректное значение!</b>')
         return
 
-    await state.update_data(fio2=message.text)  # Cохраняет введенное пользователем значение FiO₂
-    await state.set_state(Reg.respiratory)  # Установка состояния Reg.respiratory.
+    # Cохраняет введенное пользователем значение FiO₂, установка состояния Reg.respiratory.
+    await advance_state(state, Reg.respiratory, fio2=message.text)
 
     await message.answer(f'Требуется респираторная поддержка? ', reply_markup=kb_respiratory())
 
@@ -187,10 +229,9 @@ async def write_user_fio(message: types.Message, state: FSMContext):
         await message.reply(f'<b>Выберите корректное значение из предложенного!</b>', reply_markup=kb_respiratory())
         return
 
-    await state.update_data(respiratory=message.text)  # Cохраняет введенное пользователем значение respiratory
+    # Cохраняет введенное пользователем значение respiratory, установка состояния Reg.platelet.
+    await advance_state(state, Reg.platelet, respiratory=respiratory_codec.encode(message.text))
 
-    await state.set_state(Reg.platelet)  # Установка состояния Reg.platelet.
-    
     await message.answer(f'Выберите уровень тромбоцитов (10⁹/мл): ', reply_markup=kb_platelet())
 
 
@@ -203,9 +244,8 @@ async def write_user_platelet(message: types.Message, state: FSMContext):
         await message.reply(f'<b>Выберите корректное значение из предложенного!</b>', reply_markup=kb_platelet())
         return
 
-    await state.update_data(platelet=message.text)  # Сохраняет введенное пользователем значение platelet
-
-    await state.set_state(Reg.liver)  # Установка состояния Reg.liver.
+    # Сохраняет введенное пользователем значение platelet, установка состояния Reg.liver.
+    await advance_state(state, Reg.liver, platelet=platelet_codec.encode(message.text))
 
     await message.answer(f'Выберите билирубин сыворотки (мкмоль/л): ', reply_markup=kb_liver())
 
@@ -219,9 +259,8 @@ async def write_user_liver(message: types.Message, state: FSMContext):
         await message.reply(f'<b>Выберите корректное значение из предложенного!</b>', reply_markup=kb_liver())
         return
 
-    await state.update_data(liver=message.text)  # Сохраняет введенное пользователем значение liver
-
-    await state.set_state(Reg.creatinin_kidney)  # Установка состояния Reg.creatinin_kidney.
+    # Сохраняет введенное пользователем значение liver, установка состояния Reg.creatinin_kidney.
+    await advance_state(state, Reg.creatinin_kidney, liver=liver_codec.encode(message.text))
 
     await message.answer(f'Выберите креатинин (мкмоль/л) или диурез: ', reply_markup=kb_creatinin())
 
@@ -235,9 +274,8 @@ async def write_user_hypotension(message: types.Message, state: FSMContext):
         await message.reply(f'<b>Выберите корректное значение из предложенного!</b>', reply_markup=kb_creatinin())
         return
 
-    await state.update_data(creatinin_kidney=message.text)  # Сохраняет введенное пользователем значение creat_kidney
-
-    await state.set_state(Reg.hypotension)  # Установка состояния Reg.hypotension.
+    # Сохраняет введенное пользователем значение creat_kidney, установка состояния Reg.hypotension.
+    await advance_state(state, Reg.hypotension, creatinin_kidney=creatinin_codec.encode(message.text))
 
     await message.answer(f'Выберите уровень гипотензии или степень инотропной '
                          f'поддержки: ', reply_markup=kb_hypotension())
@@ -252,9 +290,8 @@ async def write_user_eye(message: types.Message, state: FSMContext):
         await message.reply(f'<b>Выберите корректное значение из предложенного!</b>', reply_markup=kb_hypotension())
         return
 
-    await state.update_data(hypotension=message.text)  # Сохраняет введенное пользователем значение hypotension
-
-    await state.set_state(Reg.eye_response)  # Установка состояния Reg.eye_response
+    # Сохраняет введенное пользователем значение hypotension, установка состояния Reg.eye_response
+    await advance_state(state, Reg.eye_response, hypotension=hypotension_codec.encode(message.text))
 
     await message.answer(f'Для дальнейшего расчета требуется вычисление по шкале комы Глазго '
                          f'(взрослые и дети старше 4 лет)')
@@ -270,9 +307,8 @@ async def write_user_eye(message: types.Message, state: FSMContext):
         await message.reply(f'<b>Выберите корректное значение из предложенного!</b>', reply_markup=kb_eye())
         return
 
-    await state.update_data(eye_response=message.text)  # Сохраняет введенное пользователем значение eye_response
-
-    await state.set_state(Reg.verbal_response)  # Установка состояния Reg.verbal_response
+    # Сохраняет введенное пользователем значение eye_response, установка состояния Reg.verbal_response
+    await advance_state(state, Reg.verbal_response, eye_response=eye_codec.encode(message.text))
 
     await message.answer(f'Речевая реакция: ', reply_markup=kb_verbal())
 
@@ -286,9 +322,8 @@ async def write_user_verbal(message: types.Message, state: FSMContext):
         await message.reply(f'<b>Выберите корректное значение из предложенного!</b>', reply_markup=kb_verbal())
         return
 
-    await state.update_data(verbal_response=message.text)  # Сохраняет введенное пользователем значение verbal_response
-
-    await state.set_state(Reg.motor_response)  # Установка состояния Reg.motor_response
+    # Сохраняет введенное пользователем значение verbal_response, установка состояния Reg.motor_response
+    await advance_state(state, Reg.motor_response, verbal_response=verbal_codec.encode(message.text))
 
     await message.answer(f'Двигательная реакция: ', reply_markup=kb_motor())
 
@@ -322,48 +357,15 @@ async def write_user_motor(message: types.Message, state: FSMContext):
         await message.reply(f'<b>Выберите корректное значение из предложенного!</b>', reply_markup=kb_motor())
         return
 
-    await state.update_data(motor_response=message.text)  # Сохраняет введенное пользователем значение motor_response
-
-    data = await state.get_data()
-
-    # получение значения Дыхание pao2, fio2
-    total_PaoFio = calculation_PaoFio(data['pao2'], data['fio2'])
-
-    # получение значения Респираторная поддержка respiratory
-    total_respiratory = calculation_respiratory(data['respiratory'])
+    # Сохраняет введенное пользователем значение motor_response, получает все данные и очищает состояние.
+    data = await finish_state(state, motor_response=motor_codec.encode(message.text))
 
-    # получение значения тромбоциты platelet
-    total_platelet = calculation_platelet(data['platelet'])
-
-    # получение значения Печень
-    total_liver = calculation_liver(data['liver'])
-
-    # получение значения Креатинин
-    total_kidney = calculation_creatinin(data['creatinin_kidney'])
-
-    # получение значения Гипотензия
-    total_hypotension = calculate_hypotension(data['hypotension'])
-
-    # Расчет Шкала комы Глазго:
-    #     eye_response: Открывание глаз.
-    #     verbal_response: Речевая реакция.
-    #     motor_response: Двигательная реакция.
-    total_EyeVerbalMotor = final_calculation_EyeVerbalMotor(calculation_Eye_response(data['eye_response']),
-                                                 calculation_Verbal_response(data['verbal_response']),
-                                                 calculation_Motor_response(data['motor_response']))
-
-    # Финальный расчет, вывод результата
-    final_number = total_result_functions(total_PaoFio, total_respiratory,
-                                        total_platelet, total_liver,
-                                        total_kidney, total_hypotension,
-                                        total_EyeVerbalMotor)
+    # Расчет результата по всем ответам сценария.
+    final_number = calculate_sofa(data)
 
     # Вывод результата пользователю
     await message.answer(f'{final_number}')
 
-    # очистка состояния.
-    await state.clear()
-
     # Меню: на стартовую страницу или вернуться назад
     await message.answer(f'Выберите действие: ', reply_markup=inline_sofa())
 
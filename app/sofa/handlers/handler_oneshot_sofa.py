@@ -0,0 +1,33 @@
+import html
+
+from aiogram import Router, types, F
+from aiogram.filters import Command, CommandObject
+
+from app.sofa.handlers.handler_main_sofa import calculate_sofa
+from app.sofa.handlers.parse_sofa import USAGE, SofaInputError, format_inputs, parse_sofa
+from app.sofa.keyboards.inline_kb_sofa import inline_sofa
+
+# Команда /sofa с аргументами: расчет по одному сообщению, без сценария и без записи в хранилище FSM.
+# Команда /sofa без аргументов обрабатывается сценарием (sofa_router или sofa_inline_router).
+sofa_oneshot_router = Router(name='sofa_oneshot_router')
+
+
+@sofa_oneshot_router.message(Command('sofa', magic=F.args))
+async def sofa_oneshot(message: types.Message, command: CommandObject):
+    """
+    Обрабатывает команду '/sofa pao2=80 fio2=0.4 ...': разбирает все показатели из одного сообщения,
+    проверяет их теми же правилами, что и сценарий, и одним сообщением отвечает результатом с меню.
+    При ошибках во вводе отвечает списком ошибок и форматом команды. Состояние FSM не меняется:
+    начатый сценарий SOFA продолжается со своего шага.
+
+    :param message: Сообщение с командой.
+    :param command: Команда и ее аргументы.
+    """
+    try:
+        data = parse_sofa(command.args)
+    except SofaInputError as error:
+        problems = '\n'.join(f'• {problem}' for problem in error.problems)
+        await message.reply(f'<b>Не удалось рассчитать SOFA:</b>\n{html.escape(problems)}\n\n{USAGE}')
+        return
+
+    await message.answer(f'{format_inputs(data)}\n\n{calculate_sofa(data)}', reply_markup=inline_sofa())
@@ -0,0 +1,37 @@
+# Шкала SOFA в одном сообщении (WIZARD_MODE=inline): те же шаги, что в handler_main_sofa.py.
+from app.anesthetic_risk.keyboards.keyboard_hypotension import hypotension_codec
+from app.sofa.handlers.handler_main_sofa import Reg, calculate_sofa
+from app.sofa.handlers.parse_sofa import check_pao_fio
+from app.sofa.keyboards.inline_kb_sofa import inline_sofa
+from app.sofa.keyboards.kb_creatinin import creatinin_codec
+from app.sofa.keyboards.kb_eye import eye_codec
+from app.sofa.keyboards.kb_liver import liver_codec
+from app.sofa.keyboards.kb_motor import motor_codec
+from app.sofa.keyboards.kb_platelet import platelet_codec
+from app.sofa.keyboards.kb_respiratory import respiratory_codec
+from app.sofa.keyboards.kb_verbal import verbal_codec
+from app.wizard.inline import Choice, InlineWizard, Number
+
+INCORRECT_VALUE = 'Пожалуйста, введите корректное значение!'
+
+sofa_wizard = InlineWizard(
+    'sofa', 'Шкала SOFA (оценка прогноза смертности и степени органной недостаточности у пациентов ОРИТ)',
+    [
+        Number(Reg.pao2, 'pao2', 'PaO₂', 'Введите PaO₂ (мм рт. ст.):', check_pao_fio, INCORRECT_VALUE),
+        Number(Reg.fio2, 'fio2', 'FiO₂', 'Введите FiO₂ (мм рт. ст.):', check_pao_fio, INCORRECT_VALUE),
+        Choice(Reg.respiratory, 'respiratory', 'Респираторная поддержка', 'Требуется респираторная поддержка?',
+               respiratory_codec),
+        Choice(Reg.platelet, 'platelet', 'Тромбоциты', 'Выберите уровень тромбоцитов (10⁹/мл):', platelet_codec),
+        Choice(Reg.liver, 'liver', 'Билирубин', 'Выберите билирубин сыворотки (мкмоль/л):', liver_codec),
+        Choice(Reg.creatinin_kidney, 'creatinin_kidney', 'Креатинин',
+               'Выберите креатинин (мкмоль/л) или диурез:', creatinin_codec),
+        Choice(Reg.hypotension, 'hypotension', 'Гипотензия',
+               'Выберите уровень гипотензии или степень инотропной поддержки:', hypotension_codec),
+        Choice(Reg.eye_response, 'eye_response', 'Открывание глаз',
+               'Шкала комы Глазго (взрослые и дети старше 4 лет). Открывание глаз:', eye_codec),
+        Choice(Reg.verbal_response, 'verbal_response', 'Речевая реакция', 'Речевая реакция:', verbal_codec),
+        Choice(Reg.motor_response, 'motor_response', 'Двигательная реакция', 'Двигательная реакция:', motor_codec),
+    ],
+    result=calculate_sofa, menu=inline_sofa)
+
+sofa_inline_router = sofa_wizard.router
@@ -0,0 +1,156 @@
+# Расчет SOFA одной командой: все значения в одном сообщении вместо десяти шагов сценария.
+# /sofa pao2=80 fio2=0.4 resp=да plt=120 bili=25 creat=150 hypo=0 eye=4 verbal=5 motor=6
+import html
+import re
+
+from app.anesthetic_risk.keyboards.keyboard_hypotension import hypotension_codec
+from app.sofa.handlers.check_Correct_values import (check_correct_values_FioPao, check_correct_kb_respiratory,
+                                                    check_correct_kb_platelet, check_correct_kb_liver,
+                                                    check_correct_kb_creatinin, check_correct_kb_hypotension,
+                                                    check_correct_kb_eye, check_correct_kb_verbal,
+                                                    check_correct_kb_motor)
+from app.sofa.keyboards.kb_creatinin import creatinin_codec
+from app.sofa.keyboards.kb_eye import eye_codec
+from app.sofa.keyboards.kb_liver import liver_codec
+from app.sofa.keyboards.kb_motor import motor_codec
+from app.sofa.keyboards.kb_platelet import platelet_codec
+from app.sofa.keyboards.kb_respiratory import respiratory_codec
+from app.sofa.keyboards.kb_verbal import verbal_codec
+from app.storage.codec import OptionCodec
+
+USAGE = ('Формат: <code>/sofa pao2=80 fio2=0.4 resp=да plt=120 bili=25 creat=150 hypo=0 eye=4 verbal=5 motor=6</code>\n'
+         'pao2, fio2 — как в сценарии; resp — да/нет; plt — тромбоциты (10⁹/мл); bili — билирубин (мкмоль/л); '
+         'creat — креатинин (мкмоль/л); hypo — вариант гипотензии от 0 (нет) до 4; '
+         'eye (1–4), verbal (1–5), motor (1–6) — баллы шкалы комы Глазго.')
+
+
+class SofaInputError(ValueError):
+    """Ошибки во входных данных команды: список сообщений для пользователя."""
+
+    def __init__(self, problems: list[str]):
+        super().__init__('; '.join(problems))
+        self.problems = problems
+
+
+def _number(value: str) -> float:
+    number = float(value)
+    if not 0 <= number < float('inf'):
+        raise ValueError(value)
+    return number
+
+
+def check_pao_fio(value: str) -> str | None:
+    """
+    Проверка PaO₂ и FiO₂: check_correct_values_FioPao и конечное положительное число. Отдельно от
+    check_correct_values_FioPao, который пропускает '0.0', 'nan', 'inf' и отрицательные числа:
+    на них calculation_PaoFio падает (FiO₂ = 0 — деление на ноль).
+    """
+    try:
+        number = _number(value)
+    except ValueError:
+        return None
+    return value if number > 0 and check_correct_values_FioPao(value) is not None else None
+
+
+def _platelet(codec: OptionCodec, value: str) -> str:
+    number = _number(value)
+    code = 0 if number > 150 else 1 if number > 100 else 2 if number > 50 else 3 if number > 20 else 4
+    return codec.options[code]
+
+
+def _liver(codec: OptionCodec, value: str) -> str:
+    number = _number(value)
+    code = 0 if number < 20 else 1 if number < 33 else 2 if number < 102 else 3 if number <= 204 else 4
+    return codec.options[code]
+
+
+def _creatinin(codec: OptionCodec, value: str) -> str:
+    number = _number(value)
+    code = 0 if number < 110 else 1 if number < 171 else 2 if number < 300 else 3 if number <= 440 else 4
+    return codec.options[code]
+
+
+def _score(codec: OptionCodec, value: str) -> str:
+    """Балл шкалы комы Глазго -> вариант клавиатуры (варианты идут от высшего балла к низшему)."""
+    score = int(value)
+    if not 1 <= score <= len(codec.options):
+        raise ValueError(value)
+    return codec.options[len(codec.options) - score]
+
+
+def _index(codec: OptionCodec, value: str) -> str:
+    index = int(value)
+    if not 0 <= index < len(codec.options):
+        raise ValueError(value)
+    return codec.options[index]
+
+
+def _respiratory(codec: OptionCodec, value: str) -> str:
+    return {'да': 'Да', 'нет': 'Нет', '1': 'Да', '0': 'Нет'}.get(value.lower(), value)
+
+
+# Ключ команды -> (поле данных сценария, подпись, варианты, перевод значения в вариант, проверка значения).
+# Диапазоны — те же, что у кнопок клавиатур kb_platelet, kb_liver и kb_creatinin.
+FIELDS = {
+    'pao2': ('pao2', 'PaO₂', None, None, check_pao_fio),
+    'fio2': ('fio2', 'FiO₂', None, None, check_pao_fio),
+    'resp': ('respiratory', 'Респираторная поддержка', respiratory_codec, _respiratory, check_correct_kb_respiratory),
+    'plt': ('platelet', 'Тромбоциты', platelet_codec, _platelet, check_correct_kb_platelet),
+    'bili': ('liver', 'Билирубин', liver_codec, _liver, check_correct_kb_liver),
+    'creat': ('creatinin_kidney', 'Креатинин', creatinin_codec, _creatinin, check_correct_kb_creatinin),
+    'hypo': ('hypotension', 'Гипотензия', hypotension_codec, _index, check_correct_kb_hypotension),
+    'eye': ('eye_response', 'Открывание глаз', eye_codec, _score, check_correct_kb_eye),
+    'verbal': ('verbal_response', 'Речевая реакция', verbal_codec, _score, check_correct_kb_verbal),
+    'motor': ('motor_response', 'Двигательная реакция', motor_codec, _score, check_correct_kb_motor),
+}
+
+
+def parse_sofa(args: str) -> dict[str, str | int]:
+    """
+    Разбирает аргументы команды /sofa (пары ключ=значение через пробел) в данные сценария SOFA в том виде,
+    в каком их сохраняет сценарий: PaO₂ и FiO₂ — текстом, остальное — номерами вариантов клавиатур.
+    Значение переводится в вариант клавиатуры и проверяется той же функцией, что и ответ в сценарии.
+
+    :raises SofaInputError: Неизвестные, повторенные, пропущенные ключи или некорректные значения.
+    """
+    data: dict[str, str | int] = {}
+    invalid = set()  # ключи с некорректным значением: в «не хватает» они не повторяются
+    problems = []
+    for pair in filter(None, re.split(r'[\s;]+', args.strip())):
+        key, separator, value = pair.partition('=')
+        key = key.lower()
+        if not separator or not value:
+            problems.append(f'не понял «{pair}»: нужно ключ=значение')
+            continue
+        if key not in FIELDS:
+            problems.append(f'неизвестный ключ {key}')
+            continue
+        field, label, codec, option, check = FIELDS[key]
+        if field in data:
+            problems.append(f'{key} указан дважды')
+            continue
+        try:
+            answer = option(codec, value) if option else value
+        except ValueError:
+            answer = None
+        if answer is None or check(answer) is None:
+            problems.append(f'некорректное значение {key}={value}')
+            invalid.add(key)
+            continue
+        data[field] = codec.encode(answer) if codec else answer
+
+    missing = [key for key, (field, *_) in FIELDS.items() if field not in data and key not in invalid]
+    if missing:
+        problems.append(f'не хватает: {", ".join(missing)}')
+    if problems:
+        raise SofaInputError(problems)
+    return data
+
+
+def format_inputs(data: dict[str, str | int]) -> str:
+    """Принятые значения, как их понял бот (вариант клавиатуры для каждого показателя), HTML."""
+    lines = []
+    for field, label, codec, _, _ in FIELDS.values():
+        value = codec.decode(data[field]) if codec else data[field]
+        lines.append(f'{label}: {html.escape(str(value))}')
+    return '\n'.join(lines)
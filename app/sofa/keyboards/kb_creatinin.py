@@ -1,5 +1,7 @@
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
 
+from app.storage.codec import OptionCodec
+
 # Определение текстов для кнопок
 ONE = ('< 110')
 
@@ -11,6 +13,9 @@ FOUR = ('300 - 440 или диурез <500 мл в сутки')
 
 FIVE = ('> 440 или < 200 мл мочи/сутки')
 
+# В данных FSM ответ хранится номером кнопки.
+creatinin_codec = OptionCodec(ONE, TWO, THREE, FOUR, FIVE)
+
 
 def kb_creatinin() -> ReplyKeyboardMarkup:
     """
@@ -1,5 +1,7 @@
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
 
+from app.storage.codec import OptionCodec
+
 # четыре строки, каждая из которых описывает уровень реакции
 ONE = ('Открывает самопроизвольно, наблюдает')
 
@@ -9,6 +11,8 @@ THREE = ('Открывает, как реакция на болевое разд
 
 FOUR = ('Не открывает')
 
+# В данных FSM ответ хранится номером кнопки.
+eye_codec = OptionCodec(ONE, TWO, THREE, FOUR)
 
 
 def kb_eye() -> ReplyKeyboardMarkup:
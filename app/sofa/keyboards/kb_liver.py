@@ -1,5 +1,7 @@
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
 
+from app.storage.codec import OptionCodec
+
 # Определение текстов для кнопок
 ONE = ('< 20')
 TWO = ('20 - 32')
@@ -7,6 +9,9 @@ THREE = ('33 - 101')
 FOUR = ('102 - 204')
 FIVE = ('> 204')
 
+# В данных FSM ответ хранится номером кнопки.
+liver_codec = OptionCodec(ONE, TWO, THREE, FOUR, FIVE)
+
 
 def kb_liver() -> ReplyKeyboardMarkup:
     """
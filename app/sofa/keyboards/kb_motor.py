@@ -1,5 +1,7 @@
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
 
+from app.storage.codec import OptionCodec
+
 ONE = ('Выполнение движений по голосовой команде')
 
 TWO = ('Локализует боль, пытается её избежать')
@@ -12,6 +14,8 @@ FIVE = ('Патологическое разгибание в ответ на б
 
 SIX = ('Не двигается')
 
+# В данных FSM ответ хранится номером кнопки.
+motor_codec = OptionCodec(ONE, TWO, THREE, FOUR, FIVE, SIX)
 
 
 def kb_motor() -> ReplyKeyboardMarkup:
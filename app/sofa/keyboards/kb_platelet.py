@@ -1,5 +1,7 @@
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
 
+from app.storage.codec import OptionCodec
+
 # Определение текстов для кнопок
 ONE = ('> 151')
 
@@ -11,6 +13,9 @@ FOUR = ('<= 50')
 
 FIVE = ('<= 20')
 
+# В данных FSM ответ хранится номером кнопки.
+platelet_codec = OptionCodec(ONE, TWO, THREE, FOUR, FIVE)
+
 
 def kb_platelet() -> ReplyKeyboardMarkup:
     """
@@ -1,9 +1,13 @@
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
 
+from app.storage.codec import OptionCodec
+
 ONE = ('Да')
 
 TWO = ('Нет')
 
+# В данных FSM ответ хранится номером кнопки.
+respiratory_codec = OptionCodec(ONE, TWO)
 
 
 def kb_respiratory() -> ReplyKeyboardMarkup:
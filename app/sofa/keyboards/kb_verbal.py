@@ -1,5 +1,7 @@
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
 
+from app.storage.codec import OptionCodec
+
 ONE = ('Ориентирован и контактен (осмысленный ответ)')
 
 TWO = ('Произносит фразы, но речь бессвязная')
@@ -10,6 +12,8 @@ FOUR = ('Издает звуки, но не слова')
 
 FIVE = ('Отсутствие речи')
 
+# В данных FSM ответ хранится номером кнопки.
+verbal_codec = OptionCodec(ONE, TWO, THREE, FOUR, FIVE)
 
 
 def kb_verbal() -> ReplyKeyboardMarkup:
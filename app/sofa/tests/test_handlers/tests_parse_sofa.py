@@ -0,0 +1,65 @@
+import unittest
+
+from app.sofa.handlers.handler_main_sofa import calculate_sofa
+from app.sofa.handlers.parse_sofa import SofaInputError, format_inputs, parse_sofa
+
+VALUES = {'pao2': '80', 'fio2': '0.4', 'resp': 'да', 'plt': '120', 'bili': '25', 'creat': '150', 'hypo': '0',
+          'eye': '4', 'verbal': '5', 'motor': '6'}
+
+
+def command_args(**changes: str) -> str:
+    return ' '.join(f'{key}={value}' for key, value in dict(VALUES, **changes).items())
+
+
+class TestParseSofa(unittest.TestCase):
+
+    def test_complete_input(self):
+        self.assertEqual(parse_sofa(command_args()), {
+            'pao2': '80', 'fio2': '0.4', 'respiratory': 0, 'platelet': 1, 'liver': 1, 'creatinin_kidney': 1,
+            'hypotension': 0, 'eye_response': 0, 'verbal_response': 0, 'motor_response': 0})
+
+    def test_separators_and_case(self):
+        args = command_args(resp='Нет').replace(' ', '; ').upper()
+        self.assertEqual(parse_sofa(args), dict(parse_sofa(command_args()), respiratory=1))
+
+    def test_thresholds_match_keyboards(self):
+        cases = {('plt', 'platelet'): [('151', 0), ('150', 1), ('100', 2), ('50', 3), ('20', 4)],
+                 ('bili', 'liver'): [('19.9', 0), ('20', 1), ('32.5', 1), ('33', 2), ('204', 3), ('205', 4)],
+                 ('creat', 'creatinin_kidney'): [('109', 0), ('110', 1), ('299', 2), ('440', 3), ('441', 4)]}
+        for (key, field), values in cases.items():
+            for value, code in values:
+                with self.subTest(key=key, value=value):
+                    self.assertEqual(parse_sofa(command_args(**{key: value}))[field], code)
+
+    def test_glasgow_scores(self):
+        data = parse_sofa(command_args(eye='1', verbal='3', motor='2'))
+        self.assertEqual((data['eye_response'], data['verbal_response'], data['motor_response']), (3, 2, 4))
+
+    def test_problems(self):
+        with self.assertRaises(SofaInputError) as raised:
+            parse_sofa('pao2=0 fio2=abc plt=-5 eye=5 hb=120 motor resp=да resp=нет')
+        self.assertEqual(raised.exception.problems, [
+            'некорректное значение pao2=0',
+            'некорректное значение fio2=abc',
+            'некорректное значение plt=-5',
+            'некорректное значение eye=5',
+            'неизвестный ключ hb',
+            'не понял «motor»: нужно ключ=значение',
+            'resp указан дважды',
+            'не хватает: bili, creat, hypo, verbal, motor'])
+
+    def test_pao_fio_must_be_positive(self):
+        for key, value in (('fio2', '0.0'), ('fio2', 'nan'), ('fio2', 'inf'), ('pao2', '-80'), ('pao2', '0.0')):
+            with self.subTest(key=key, value=value):
+                with self.assertRaises(SofaInputError) as raised:
+                    parse_sofa(command_args(**{key: value}))
+                self.assertEqual(raised.exception.problems, [f'некорректное значение {key}={value}'])
+
+    def test_same_data_as_wizard(self):
+        data = parse_sofa(command_args())
+        self.assertIn('Тромбоциты: &lt;= 150', format_inputs(data))
+        self.assertEqual(calculate_sofa(data), '<b>Баллов: 4 \nСмертность: &lt; 10%</b>')
+
+
+if __name__ == '__main__':
+    unittest.main()
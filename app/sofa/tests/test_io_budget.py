@@ -0,0 +1,93 @@
+import unittest
+
+from app.anesthetic_risk.keyboards.keyboard_hypotension import hypotension_codec
+from app.sofa.handlers.inline_sofa import sofa_inline_router
+from app.sofa.keyboards.kb_creatinin import creatinin_codec
+from app.sofa.keyboards.kb_eye import eye_codec
+from app.sofa.keyboards.kb_liver import liver_codec
+from app.sofa.keyboards.kb_motor import motor_codec
+from app.sofa.keyboards.kb_platelet import platelet_codec
+from app.sofa.keyboards.kb_respiratory import respiratory_codec
+from app.sofa.keyboards.kb_verbal import verbal_codec
+from app.testing.fake_telegram import make_callback_update
+from app.testing.io_budget import IOBudgetTestCase
+from app.wizard.inline import WizardCallback
+from bot_start import wizard_links
+
+# Ответы с клавиатур сценария после PaO2 и FiO2, по порядку шагов.
+ANSWERS = [codec.options[1] for codec in (respiratory_codec, platelet_codec, liver_codec, creatinin_codec,
+                                          hypotension_codec, eye_codec, verbal_codec, motor_codec)]
+
+
+class TestSofaIOBudget(IOBudgetTestCase):
+    """Обращения к Bot API и Redis за полный расчет SOFA: команда, PaO2, FiO2 и восемь шагов с клавиатуры."""
+
+    async def test_command(self):
+        counts = await self.converse(100, '/sofa', '80', '40', *ANSWERS)
+        self.assertWithinBudget(counts, telegram=14, redis=13)
+
+    async def test_menu_button(self):
+        counts = await self.converse(100, make_callback_update(100, '/sofa'), '80', '40', *ANSWERS)
+        self.assertWithinBudget(counts, telegram=15, redis=13)
+
+
+class TestOneShotSofaIOBudget(IOBudgetTestCase):
+    """Расчет SOFA одной командой с показателями: одно сообщение, хранилище FSM только читается."""
+
+    async def test_command(self):
+        counts = await self.converse(100, '/sofa pao2=80 fio2=40 resp=да plt=120 bili=25 creat=150 hypo=1 '
+                                          'eye=3 verbal=4 motor=5')
+        self.assertEqual(counts.telegram['sendMessage'], 1)
+        self.assertNotIn('EVALSHA', counts.redis)
+        self.assertWithinBudget(counts, telegram=1, redis=2)
+
+
+class TestSofaLinkIOBudget(IOBudgetTestCase):
+    """Ссылка на бота с известными ответами SOFA (/start <payload>): вопросы только о неизвестных."""
+
+    async def test_all_but_glasgow(self):
+        payload = wizard_links.payload('sofa', pao2='80', fio2='40', respiratory=1, platelet=1, liver=1,
+                                       creatinin_kidney=1, hypotension=1)
+        counts = await self.converse(100, f'/start {payload}', *ANSWERS[-3:])
+        self.assertWithinBudget(counts, telegram=5, redis=6)
+
+    async def test_all_answers(self):
+        payload = wizard_links.payload('sofa', pao2='80', fio2='40', respiratory=1, platelet=1, liver=1,
+                                       creatinin_kidney=1, hypotension=1, eye_response=1, verbal_response=1,
+                                       motor_response=1)
+        counts = await self.converse(100, f'/start {payload}')
+        self.assertEqual(counts.telegram['sendMessage'], 1)
+        self.assertWithinBudget(counts, telegram=1, redis=3)
+
+    async def test_zero_fio2(self):
+        # FiO₂ = 0 из ссылки считается неизвестным: бот спрашивает его, а не падает на расчете.
+        payload = wizard_links.payload('sofa', pao2='80', fio2='0.0', respiratory=1, platelet=1, liver=1,
+                                       creatinin_kidney=1, hypotension=1, eye_response=1, verbal_response=1,
+                                       motor_response=1)
+        counts = await self.converse(100, f'/start {payload}')
+        (call,) = self.telegram.calls_of('sendMessage')
+        self.assertTrue(call.params['text'].endswith('Введите FiO₂ (мм рт. ст.):'))
+        self.assertWithinBudget(counts, telegram=1, redis=3)
+
+
+class TestInlineSofaIOBudget(IOBudgetTestCase):
+    """Те же ответы в сценарии в одном сообщении: одно новое сообщение, остальные шаги правят его."""
+    routers = (sofa_inline_router,)
+
+    def buttons(self) -> list[dict]:
+        return [make_callback_update(100, WizardCallback(wizard='sofa', step=step, code=1).pack())
+                for step in range(2, 2 + len(ANSWERS))]
+
+    async def test_command(self):
+        counts = await self.converse(100, '/sofa', '80', '40', *self.buttons())
+        self.assertEqual(counts.telegram['sendMessage'], 1)
+        self.assertWithinBudget(counts, telegram=19, redis=13)
+
+    async def test_menu_button(self):
+        counts = await self.converse(100, make_callback_update(100, '/sofa'), '80', '40', *self.buttons())
+        self.assertEqual(counts.telegram['sendMessage'], 1)
+        self.assertWithinBudget(counts, telegram=20, redis=13)
+
+
+if __name__ == '__main__':
+    unittest.main()
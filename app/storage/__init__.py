@@ -0,0 +1 @@
+# Хранилища FSM для сценариев (wizard) бота: данные сценария в хэше Redis и атомарные переходы состояний.
@@ -0,0 +1,37 @@
+from typing import Any
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+
+def state_name(state: StateType) -> str | None:
+    """Приводит State или строку к имени состояния, как его хранит FSM."""
+    return state.state if isinstance(state, State) else state
+
+
+class WizardStorage(BaseStorage):
+    """
+    Хранилище FSM с составными операциями для шагов сценария.
+
+    Каждая операция заменяет несколько вызовов FSMContext (update_data + set_state, clear + set_state,
+    update_data + get_data + clear). Здесь они выражены через базовые методы; хранилище, умеющее
+    выполнять их за одно обращение к серверу (HashRedisStorage), переопределяет их.
+    """
+
+    async def update_data_and_set_state(self, key: StorageKey, data: dict[str, Any], state: StateType) -> None:
+        """Сохраняет поля data и переводит сценарий в состояние state."""
+        if data:
+            await self.update_data(key, data)
+        await self.set_state(key, state)
+
+    async def reset(self, key: StorageKey, state: StateType = None, data: dict[str, Any] | None = None) -> None:
+        """Заменяет все данные сценария на data и устанавливает состояние state (начало сценария)."""
+        await self.set_data(key, data or {})
+        await self.set_state(key, state)
+
+    async def pop_data(self, key: StorageKey, data: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Дописывает поля data, возвращает все данные сценария и завершает его (как state.clear())."""
+        result = await self.update_data(key, data or {})
+        await self.set_state(key, None)
+        await self.set_data(key, {})
+        return result
@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any
+
+from aiogram.fsm.storage.base import StateType, StorageKey
+
+from app.storage.base import WizardStorage, state_name
+from app.storage.redis_hash import HashRedisStorage
+
+logger = logging.getLogger(__name__)
+
+# Значение "в кэше нет": состояние None и пустые данные — тоже допустимые закэшированные значения.
+_MISSING = object()
+# Срок жизни сессии в Redis после записи неизвестен (запись без смены состояния).
+_UNKNOWN = object()
+
+
+class _Entry:
+    __slots__ = ('state', 'data', 'expires')
+
+    def __init__(self):
+        self.state: Any = _MISSING
+        self.data: Any = _MISSING
+        self.expires = 0.0
+
+
+class CachedStorage(WizardStorage):
+    """
+    Кэш сессий FSM в памяти процесса поверх HashRedisStorage.
+
+    Запись идет сразу в Redis (write-through) и обновляет кэш, поэтому get_state/get_data для чата,
+    который этот же процесс только что обработал, не обращаются к Redis. Кэш ограничен по размеру,
+    первыми вытесняются чаты, которые дольше всех не обновлялись. Запись кэша живет idle_ttl секунд
+    после последней записи или чтения из Redis, но не дольше самой сессии в Redis (state_ttl хранилища).
+
+    Если Redis общий для нескольких процессов (shared=True), каждая запись публикует ключ сессии в
+    канал notify_channel, и остальные процессы удаляют его из кэша. Пока подписка на канал не
+    установлена (старт, разрыв соединения), кэш не используется и все запросы идут в Redis;
+    после переподключения кэш очищается целиком.
+
+    :param storage: Хранилище, в которое пишутся данные.
+    :param max_size: Максимальное количество чатов в кэше.
+    :param idle_ttl: Через сколько секунд без записи чат вытесняется из кэша.
+    :param shared: Redis используется несколькими процессами — нужна инвалидация через канал.
+    :param channel: Канал уведомлений об изменении сессий.
+    :param reconnect_delay: Пауза перед повторной подпиской после ошибки, в секундах.
+    """
+
+    def __init__(self, storage: HashRedisStorage, max_size: int = 10_000, idle_ttl: float = 600.0,
+                 shared: bool = True, channel: str = 'fsm:invalidate', reconnect_delay: float = 1.0):
+        self.storage = storage
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.shared = shared
+        self.reconnect_delay = reconnect_delay
+        if shared:
+            storage.notify_channel = channel
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        # Увеличивается при каждой инвалидации: значение, прочитанное из Redis до нее, не кэшируется.
+        self._epoch = 0
+        self._subscribed = not shared
+        self._listener: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Кэш обслуживает чтения (подписка на инвалидацию активна или она не нужна)."""
+        return self._subscribed
+
+    def stats(self) -> dict[str, Any]:
+        """Счетчики кэша для мониторинга."""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+    def invalidate(self, redis_key: str | None = None) -> None:
+        """Удаляет из кэша одну сессию по ключу Redis или, без аргумента, все сессии."""
+        self._epoch += 1
+        self.invalidations += 1
+        if redis_key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(redis_key, None)
+
+    def peek(self, key: StorageKey) -> tuple[str | None, dict[str, Any]] | None:
+        """
+        Последние известные процессу состояние и данные сессии, без проверки срока и подписки.
+        Используется FailoverStorage, когда Redis недоступен.
+        """
+        entry = self._entries.get(self.storage.key_builder.build(key))
+        if entry is None or entry.state is _MISSING:
+            return None
+        return entry.state, ({} if entry.data is _MISSING else entry.data)
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        self._entries.clear()
+        await self.storage.close()
+
+    def _ensure_listener(self) -> None:
+        if self.shared and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        prefix = f'{self.storage.origin} '
+        while True:
+            pubsub = self.storage.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.storage.notify_channel)
+                async for message in pubsub.listen():
+                    if message['type'] == 'subscribe':
+                        # Все, что было в кэше до подписки, могло устареть.
+                        self.invalidate()
+                        self._subscribed = True
+                        continue
+                    if message['type'] != 'message':
+                        continue
+                    data = message['data']
+                    data = data.decode() if isinstance(data, bytes) else data
+                    if not data.startswith(prefix):
+                        self.invalidate(data.partition(' ')[2])
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.warning('Подписка на инвалидацию кэша FSM прервана: %r', error)
+            finally:
+                self._subscribed = False
+                await pubsub.aclose()
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _lookup(self, key: StorageKey) -> _Entry | None:
+        """Запись кэша для чтения, если кэш включен и срок записи не истек."""
+        if not self.enabled:
+            return None
+        entry = self._entries.get(self.storage.key_builder.build(key))
+        if entry is not None and entry.expires > time.monotonic():
+            return entry
+        return None
+
+    def _store(self, key: StorageKey, ttl: float | None | object) -> _Entry | None:
+        """
+        Запись кэша для сохранения значения, прочитанного из Redis или только что записанного.
+
+        Запись живет не дольше idle_ttl и не дольше сессии в Redis: ttl — оставшийся срок жизни
+        ключа в секундах (None — ключ не истекает), _UNKNOWN — срок неизвестен, тогда используется
+        срок уже имеющейся записи, а новая не создается. Возвращает None, если кэш выключен.
+        """
+        redis_key = self.storage.key_builder.build(key)
+        if not self.enabled:
+            self._entries.pop(redis_key, None)
+            return None
+
+        now = time.monotonic()
+        entry = self._entries.get(redis_key)
+        if ttl is _UNKNOWN and self.storage.state_ttl is not None:
+            if entry is None:
+                return None
+            expires = min(entry.expires, now + self.idle_ttl)
+        elif ttl is _UNKNOWN:
+            # Хранилище без срока жизни сессий.
+            expires = now + self.idle_ttl
+        else:
+            expires = now + min(self.idle_ttl, ttl or self.idle_ttl)
+
+        if entry is None:
+            entry = self._entries[redis_key] = _Entry()
+        else:
+            self._entries.move_to_end(redis_key)
+        entry.expires = expires
+
+        # Записи упорядочены по последнему обновлению, поэтому устаревшие — в начале.
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if len(self._entries) <= self.max_size and oldest.expires > now:
+                break
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return self._entries.get(redis_key)
+
+    def _ttl(self, state: StateType) -> float | None | object:
+        """Срок жизни сессии после записи состояния state."""
+        if not state_name(state):
+            return _UNKNOWN
+        if self.storage.state_ttl is None:
+            return None
+        return self.storage.state_ttl(state_name(state))
+
+    async def _write(self, key: StorageKey, operation, *args) -> Any:
+        """Выполняет запись в хранилище; если она не удалась, состояние сессии в кэше неизвестно."""
+        self._ensure_listener()
+        try:
+            return await operation(key, *args)
+        except BaseException:
+            self._entries.pop(self.storage.key_builder.build(key), None)
+            raise
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._write(key, self.storage.set_state, state)
+        if entry := self._store(key, self._ttl(state)):
+            entry.state = state_name(state)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        self._ensure_listener()
+        entry = self._lookup(key)
+        if entry is not None and entry.state is not _MISSING:
+            self.hits += 1
+            return entry.state
+
+        self.misses += 1
+        epoch = self._epoch
+        state, ttl = await self.storage.get_state_ttl(key)
+        if epoch == self._epoch and (entry := self._store(key, ttl)):
+            entry.state = state
+        return state
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        await self._write(key, self.storage.set_data, data)
+        if entry := self._store(key, _UNKNOWN):
+            entry.data = data.copy()
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        self._ensure_listener()
+        entry = self._lookup(key)
+        if entry is not None and entry.data is not _MISSING:
+            self.hits += 1
+            return entry.data.copy()
+
+        self.misses += 1
+        epoch = self._epoch
+        data, ttl = await self.storage.get_data_ttl(key)
+        if epoch == self._epoch and (entry := self._store(key, ttl)):
+            entry.data = data.copy()
+        return data
+
+    async def update_data(self, key: StorageKey, data: dict[str, Any]) -> dict[str, Any]:
+        result = await self._write(key, self.storage.update_data, data)
+        if entry := self._store(key, _UNKNOWN):
+            entry.data = result.copy()
+        return result
+
+    async def update_data_and_set_state(self, key: StorageKey, data: dict[str, Any], state: StateType) -> None:
+        await self._write(key, self.storage.update_data_and_set_state, data, state)
+        if entry := self._store(key, self._ttl(state)):
+            entry.state = state_name(state)
+            if entry.data is not _MISSING:
+                entry.data.update(data)
+
+    async def reset(self, key: StorageKey, state: StateType = None, data: dict[str, Any] | None = None) -> None:
+        await self._write(key, self.storage.reset, state, data)
+        # Без состояния сессия удалена целиком, такой записи нечему истекать.
+        if entry := self._store(key, self._ttl(state) if state_name(state) else None):
+            entry.state = state_name(state)
+            entry.data = dict(data or {})
+
+    async def pop_data(self, key: StorageKey, data: dict[str, Any] | None = None) -> dict[str, Any]:
+        result = await self._write(key, self.storage.pop_data, data)
+        if entry := self._store(key, None):
+            entry.state = None
+            entry.data = {}
+        return result
@@ -0,0 +1,38 @@
+# Компактное хранение ответов сценариев. Вместо полного текста кнопки (до ~90 символов кириллицей,
+# ~170 байт в UTF-8 и ~500 байт в JSON с \u-экранированием) в данные FSM пишется номер кнопки.
+
+
+class OptionCodec:
+    """
+    Кодирует выбранный вариант ответа номером кнопки клавиатуры и обратно.
+
+    Номер — позиция варианта в options, поэтому новые варианты добавляются только в конец.
+    decode принимает и строки: сессии, начатые до перехода на коды, хранят текст ответа,
+    и он возвращается без изменений.
+
+    :param options: Тексты кнопок в порядке клавиатуры.
+    :param aliases: Дополнительные допустимые тексты и вариант, которому они соответствуют
+        (например, 'муж' -> 'мужской').
+    """
+
+    def __init__(self, *options: str, aliases: dict[str, str] | None = None):
+        self.options = options
+        self._codes = {option: code for code, option in enumerate(options)}
+        for alias, option in (aliases or {}).items():
+            self._codes[alias] = self._codes[option]
+
+    def __contains__(self, label: str) -> bool:
+        return label in self._codes
+
+    def encode(self, label: str) -> int:
+        """Возвращает код варианта. Текст должен быть проверен заранее, иначе ValueError."""
+        try:
+            return self._codes[label]
+        except KeyError:
+            raise ValueError(f'Неизвестный вариант ответа: {label!r}') from None
+
+    def decode(self, value: int | str) -> str:
+        """Возвращает текст варианта по коду (строка из старой сессии возвращается как есть)."""
+        if isinstance(value, str):
+            return value
+        return self.options[value]
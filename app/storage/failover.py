@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from aiogram.fsm.storage.base import StateType, StorageKey
+from redis.exceptions import RedisError
+
+from app.storage.base import WizardStorage, state_name
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+# Ошибки хранилища, после которых запрос обслуживается из памяти. Остальные исключения пробрасываются.
+STORAGE_ERRORS = (asyncio.TimeoutError, RedisError, OSError)
+
+
+class _Session:
+    __slots__ = ('state', 'data', 'dirty', 'version')
+
+    def __init__(self, state: str | None = None, data: dict[str, Any] | None = None):
+        self.state = state
+        self.data = data or {}
+        self.dirty = False
+        self.version = 0
+
+    def changed(self) -> None:
+        self.dirty = True
+        self.version += 1
+
+
+class FailoverStorage(WizardStorage):
+    """
+    Хранилище FSM с переключением на память процесса, когда основное хранилище (Redis) недоступно.
+
+    Каждый вызов основного хранилища ограничен timeout. После failure_threshold ошибок подряд
+    предохранитель размыкается (open): запросы больше не ждут Redis и обслуживаются из памяти,
+    сценарии, начатые на этом узле, продолжаются. Первое обращение к сессии в памяти заполняется
+    последним известным процессу состоянием (last_known, например CachedStorage.peek).
+
+    Через recovery_time секунд выполняется проверка health_check (half_open). Если Redis отвечает,
+    измененные в памяти сессии переписываются в Redis (данные из памяти новее), память очищается и
+    предохранитель замыкается (closed). Если нет — снова open.
+
+    Память ограничена max_sessions сессиями: при переполнении вытесняется самая давняя, ее изменения
+    теряются (счетчик dropped).
+
+    :param primary: Основное хранилище.
+    :param health_check: Проверка доступности основного хранилища (например, redis.ping).
+    :param last_known: Последние известные состояние и данные сессии или None.
+    :param timeout: Ограничение времени одного вызова основного хранилища, в секундах.
+    :param failure_threshold: Сколько ошибок подряд размыкают предохранитель.
+    :param recovery_time: Через сколько секунд после размыкания проверять восстановление.
+    :param max_sessions: Максимум сессий в памяти.
+    """
+
+    def __init__(self, primary: WizardStorage, health_check: Callable[[], Awaitable[Any]],
+                 last_known: Callable[[StorageKey], tuple[str | None, dict[str, Any]] | None] | None = None,
+                 timeout: float = 0.5, failure_threshold: int = 3, recovery_time: float = 10.0,
+                 max_sessions: int = 10_000):
+        self.primary = primary
+        self.health_check = health_check
+        self.last_known = last_known
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.max_sessions = max_sessions
+
+        self.state = CLOSED
+        self.failures = 0  # ошибок подряд
+        self.opened = 0  # сколько раз предохранитель размыкался
+        self.timeouts = 0
+        self.errors = 0
+        self.fallback_calls = 0
+        self.reconciled = 0
+        self.dropped = 0
+
+        self._sessions: OrderedDict[StorageKey, _Session] = OrderedDict()
+        self._opened_at = 0.0
+        self._recovery: asyncio.Lock = asyncio.Lock()
+
+    def stats(self) -> dict[str, Any]:
+        """Состояние предохранителя и счетчики для мониторинга."""
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'opened': self.opened,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'fallback_calls': self.fallback_calls,
+            'fallback_sessions': len(self._sessions),
+            'dirty': sum(1 for session in self._sessions.values() if session.dirty),
+            'reconciled': self.reconciled,
+            'dropped': self.dropped,
+        }
+
+    async def close(self) -> None:
+        dirty = sum(1 for session in self._sessions.values() if session.dirty)
+        if dirty:
+            logger.warning('Остановка с %d несохраненными в Redis сессиями FSM', dirty)
+        await self.primary.close()
+
+    def _set_state(self, state: str) -> None:
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state != self.state:
+            logger.warning('Хранилище FSM: предохранитель %s -> %s', self.state, state)
+            self.opened += state == OPEN
+            self.state = state
+
+    def _record_failure(self, error: BaseException) -> None:
+        if isinstance(error, asyncio.TimeoutError):
+            self.timeouts += 1
+        else:
+            self.errors += 1
+        self.failures += 1
+        if self.state == CLOSED and self.failures >= self.failure_threshold:
+            self._set_state(OPEN)
+        logger.debug('Ошибка хранилища FSM: %r', error)
+
+    async def _available(self) -> bool:
+        """Можно ли обращаться к основному хранилищу; при необходимости проверяет восстановление."""
+        if self.state == CLOSED:
+            return True
+        if time.monotonic() - self._opened_at < self.recovery_time or self._recovery.locked():
+            return False
+
+        async with self._recovery:
+            self._set_state(HALF_OPEN)
+            try:
+                await asyncio.wait_for(self.health_check(), self.timeout)
+                await self._reconcile()
+            except STORAGE_ERRORS as error:
+                self._record_failure(error)
+                self._set_state(OPEN)
+                return False
+            self.failures = 0
+            self._set_state(CLOSED)
+            return True
+
+    async def _reconcile(self) -> None:
+        """Переписывает измененные в памяти сессии в основное хранилище и очищает память."""
+        while self._sessions:
+            await self._flush(next(iter(self._sessions)))
+
+    async def _flush(self, key: StorageKey) -> None:
+        """Переносит сессию из памяти в основное хранилище (если она менялась) и удаляет из памяти."""
+        session = self._sessions[key]
+        version, state, data = session.version, session.state, session.data.copy()
+        if session.dirty:
+            await asyncio.wait_for(self.primary.reset(key, state, data), self.timeout)
+            self.reconciled += 1
+        # Удаляется только после успешной записи и если за время записи сессия не изменилась
+        # (другие чаты в это время обслуживаются из памяти).
+        if session.version == version:
+            self._sessions.pop(key, None)
+
+    def _session(self, key: StorageKey, known: tuple[str | None, dict[str, Any]] | None = None) -> _Session:
+        """Сессия в памяти; новая заполняется последним известным состоянием."""
+        session = self._sessions.get(key)
+        if session is not None:
+            self._sessions.move_to_end(key)
+            return session
+
+        if known is None and self.last_known is not None:
+            known = self.last_known(key)
+        session = self._sessions[key] = _Session(*known) if known else _Session()
+        if known:
+            session.data = dict(session.data)
+
+        while len(self._sessions) > self.max_sessions:
+            _, evicted = self._sessions.popitem(last=False)
+            if evicted.dirty:
+                self.dropped += 1
+        return session
+
+    async def _call(self, key: StorageKey, method: str, *args: Any) -> tuple[bool, Any]:
+        """
+        Вызывает метод основного хранилища. Возвращает (True, результат) или (False, None), если
+        запрос нужно обслужить из памяти.
+        """
+        if not await self._available():
+            self.fallback_calls += 1
+            return False, None
+
+        # Последнее известное состояние берется до вызова: при ошибке кэш его забудет.
+        known = self.last_known(key) if self.last_known is not None else None
+        try:
+            if key in self._sessions:
+                # Сессия попала в память при единичной ошибке: сначала возвращаем ее в Redis.
+                await self._flush(key)
+            result = await asyncio.wait_for(getattr(self.primary, method)(key, *args), self.timeout)
+        except STORAGE_ERRORS as error:
+            self._record_failure(error)
+            self.fallback_calls += 1
+            self._session(key, known)
+            return False, None
+
+        self.failures = 0
+        return True, result
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        done, _ = await self._call(key, 'set_state', state)
+        if not done:
+            session = self._session(key)
+            session.state = state_name(state)
+            session.changed()
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        done, result = await self._call(key, 'get_state')
+        return result if done else self._session(key).state
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        done, _ = await self._call(key, 'set_data', data)
+        if not done:
+            session = self._session(key)
+            session.data = data.copy()
+            session.changed()
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        done, result = await self._call(key, 'get_data')
+        return result if done else self._session(key).data.copy()
+
+    async def update_data(self, key: StorageKey, data: dict[str, Any]) -> dict[str, Any]:
+        done, result = await self._call(key, 'update_data', data)
+        if done:
+            return result
+        session = self._session(key)
+        session.data.update(data)
+        session.changed()
+        return session.data.copy()
+
+    async def update_data_and_set_state(self, key: StorageKey, data: dict[str, Any], state: StateType) -> None:
+        done, _ = await self._call(key, 'update_data_and_set_state', data, state)
+        if not done:
+            session = self._session(key)
+            session.data.update(data)
+            session.state = state_name(state)
+            session.changed()
+
+    async def reset(self, key: StorageKey, state: StateType = None, data: dict[str, Any] | None = None) -> None:
+        done, _ = await self._call(key, 'reset', state, data)
+        if not done:
+            session = self._session(key)
+            session.state, session.data = state_name(state), dict(data or {})
+            session.changed()
+
+    async def pop_data(self, key: StorageKey, data: dict[str, Any] | None = None) -> dict[str, Any]:
+        done, result = await self._call(key, 'pop_data', data)
+        if done:
+            return result
+        session = self._session(key)
+        result = {**session.data, **(data or {})}
+        session.state, session.data = None, {}
+        session.changed()
+        return result
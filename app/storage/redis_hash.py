@@ -0,0 +1,185 @@
+import json
+import uuid
+from typing import Any, Callable
+
+from aiogram.fsm.storage.base import StateType, StorageKey
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, KeyBuilder
+from redis.asyncio import Redis
+
+from app.storage.base import WizardStorage, state_name
+
+# Поле хэша, в котором хранится состояние. Остальные поля — данные сценария в JSON.
+STATE_FIELD = '@state'
+
+# Единственный скрипт записи: все изменения сессии выполняются за одно обращение к Redis.
+# KEYS[1] — хэш сессии.
+# ARGV[1] — что сделать с состоянием: 'keep' (не менять), 'set' (установить ARGV[2]), 'clear' (удалить).
+# ARGV[3] — флаги: 'c' — удалить данные перед записью, 'r' — вернуть HGETALL после записи,
+#           'd' — удалить сессию после чтения.
+# ARGV[4] — канал уведомлений об изменении сессии ('' — не уведомлять), ARGV[5] — текст уведомления.
+# ARGV[6] — время жизни сессии в секундах: > 0 — установить (продлить), < 0 — установить abs(ttl),
+#           только если у ключа еще нет срока жизни, '0' — не менять.
+# ARGV[7..] — пары поле/значение для HSET.
+WRITE_SCRIPT = """
+local key = KEYS[1]
+local state_mode, state, flags = ARGV[1], ARGV[2], ARGV[3]
+local channel, message = ARGV[4], ARGV[5]
+local ttl = tonumber(ARGV[6])
+
+if string.find(flags, 'c', 1, true) then
+    local current = redis.call('HGET', key, '@state')
+    redis.call('DEL', key)
+    if current and state_mode == 'keep' then
+        redis.call('HSET', key, '@state', current)
+    end
+end
+
+if #ARGV > 6 then
+    redis.call('HSET', key, unpack(ARGV, 7))
+end
+
+if state_mode == 'set' then
+    redis.call('HSET', key, '@state', state)
+elseif state_mode == 'clear' then
+    redis.call('HDEL', key, '@state')
+end
+
+local result = false
+if string.find(flags, 'r', 1, true) then
+    result = redis.call('HGETALL', key)
+end
+if string.find(flags, 'd', 1, true) then
+    redis.call('DEL', key)
+elseif ttl > 0 then
+    redis.call('EXPIRE', key, ttl)
+elseif ttl < 0 and redis.call('TTL', key) == -1 then
+    redis.call('EXPIRE', key, -ttl)
+end
+if channel ~= '' then
+    redis.call('PUBLISH', channel, message)
+end
+return result
+"""
+
+
+def dump_value(value: Any, json_dumps: Callable[..., str] = json.dumps) -> str:
+    """
+    Сериализует значение поля в JSON. Коды ответов (int) записываются через str():
+    результат тот же, но без кодировщика json, который для чисел в несколько раз медленнее, чем для строк.
+    """
+    if type(value) is int:
+        return str(value)
+    return json_dumps(value)
+
+
+class HashRedisStorage(WizardStorage):
+    """
+    Хранилище FSM в Redis: одна сессия — один хэш.
+
+    В отличие от aiogram RedisStorage, который хранит данные одной JSON-строкой и на update_data
+    делает GET + SET всего объекта, здесь каждое поле данных — отдельное поле хэша. Запись выполняется
+    Lua-скриптом WRITE_SCRIPT, поэтому шаг сценария "сохранить ответ + перейти к следующему состоянию"
+    стоит одного обращения к Redis, а не трех.
+
+    :param redis: Клиент redis.asyncio.
+    :param key_builder: Построитель ключей, по умолчанию ключ вида 'fsm:<chat_id>:<user_id>'.
+    :param notify_channel: Канал Redis, в который каждая запись публикует '<origin> <ключ сессии>'
+        (используется CachedStorage для сброса кэша в других процессах). None — не публиковать.
+    :param state_ttl: Время жизни сессии в секундах по имени состояния (None — сессия без состояния),
+        например SessionRegistry.ttl. Каждый переход в новое состояние продлевает сессию на этот срок;
+        запись без смены состояния только задает срок ключу, у которого его нет. None — без срока жизни.
+    """
+
+    def __init__(self, redis: Redis, key_builder: KeyBuilder | None = None,
+                 json_loads: Callable[..., Any] = json.loads, json_dumps: Callable[..., str] = json.dumps,
+                 notify_channel: str | None = None, state_ttl: Callable[[str | None], int | None] | None = None):
+        self.redis = redis
+        self.key_builder = key_builder or DefaultKeyBuilder()
+        self.json_loads = json_loads
+        self.json_dumps = json_dumps
+        self.notify_channel = notify_channel
+        self.state_ttl = state_ttl
+        # Идентификатор процесса в уведомлениях: свои записи процесс пропускает.
+        self.origin = uuid.uuid4().hex
+        self._write = redis.register_script(WRITE_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str, connection_kwargs: dict[str, Any] | None = None, **kwargs: Any) -> 'HashRedisStorage':
+        """Создает хранилище по адресу Redis (redis://HOST:PORT/NUM_DB)."""
+        redis = Redis.from_url(url, **(connection_kwargs or {}))
+        return cls(redis=redis, **kwargs)
+
+    async def close(self) -> None:
+        await self.redis.aclose(close_connection_pool=True)
+
+    async def _execute(self, key: StorageKey, state_mode: str = 'keep', state: StateType = None,
+                       flags: str = '', data: dict[str, Any] | None = None) -> dict[str, Any] | None:
+        redis_key = self.key_builder.build(key)
+        if self.state_ttl is None:
+            ttl = 0
+        elif state_mode == 'set':
+            ttl = self.state_ttl(state_name(state)) or 0
+        else:
+            ttl = -(self.state_ttl(None) or 0)
+
+        args = [state_mode, state_name(state) or '', flags,
+                self.notify_channel or '', f'{self.origin} {redis_key}', ttl]
+        for field, value in (data or {}).items():
+            args += [field, dump_value(value, self.json_dumps)]
+
+        result = await self._write(keys=[redis_key], args=args)
+        return self._decode(result) if result else None
+
+    def _decode(self, raw: list | dict) -> dict[str, Any]:
+        """Разбирает ответ HGETALL (список или dict) в данные сценария без поля состояния."""
+        pairs = raw.items() if isinstance(raw, dict) else zip(raw[::2], raw[1::2])
+        data = {}
+        for field, value in pairs:
+            field = field.decode() if isinstance(field, bytes) else field
+            if field != STATE_FIELD:
+                data[field] = self.json_loads(value)
+        return data
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._execute(key, 'set' if state_name(state) else 'clear', state)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        value = await self.redis.hget(self.key_builder.build(key), STATE_FIELD)
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def _read_with_ttl(self, key: StorageKey, command: str, *args: Any) -> tuple[Any, float | None]:
+        """Выполняет команду чтения вместе с PTTL за одно обращение; срок None — ключ не истекает."""
+        redis_key = self.key_builder.build(key)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            getattr(pipe, command)(redis_key, *args)
+            pipe.pttl(redis_key)
+            value, pttl = await pipe.execute()
+        return value, pttl / 1000 if pttl > 0 else None
+
+    async def get_state_ttl(self, key: StorageKey) -> tuple[str | None, float | None]:
+        """Состояние и оставшееся время жизни сессии в секундах."""
+        value, ttl = await self._read_with_ttl(key, 'hget', STATE_FIELD)
+        return (value.decode() if isinstance(value, bytes) else value), ttl
+
+    async def get_data_ttl(self, key: StorageKey) -> tuple[dict[str, Any], float | None]:
+        """Данные и оставшееся время жизни сессии в секундах."""
+        value, ttl = await self._read_with_ttl(key, 'hgetall')
+        return self._decode(value), ttl
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        await self._execute(key, flags='c', data=data)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return self._decode(await self.redis.hgetall(self.key_builder.build(key)))
+
+    async def update_data(self, key: StorageKey, data: dict[str, Any]) -> dict[str, Any]:
+        return await self._execute(key, flags='r', data=data) or {}
+
+    async def update_data_and_set_state(self, key: StorageKey, data: dict[str, Any], state: StateType) -> None:
+        await self._execute(key, 'set' if state_name(state) else 'clear', state, data=data)
+
+    async def reset(self, key: StorageKey, state: StateType = None, data: dict[str, Any] | None = None) -> None:
+        await self._execute(key, 'set' if state_name(state) else 'clear', state, flags='c', data=data)
+
+    async def pop_data(self, key: StorageKey, data: dict[str, Any] | None = None) -> dict[str, Any]:
+        return await self._execute(key, flags='rd', data=data) or {}
@@ -0,0 +1,213 @@
+# Срок жизни сессий сценариев в Redis и фоновая проверка сессий (количество, объем, истекшие).
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+from aiogram.fsm.state import StatesGroup
+from redis.exceptions import ResponseError
+
+from app.storage.redis_hash import HashRedisStorage, STATE_FIELD
+
+logger = logging.getLogger(__name__)
+
+# Сессия без состояния или с состоянием, не принадлежащим ни одному сценарию.
+UNKNOWN_WIZARD = 'other'
+
+
+class SessionRegistry:
+    """
+    Сценарии бота и время жизни их сессий.
+
+    Состояния сценария регистрируются вместе с группой состояний (StatesGroup), по имени состояния
+    определяется сценарий и срок жизни его сессии. Передается в HashRedisStorage как state_ttl.
+
+    :param default_ttl: Срок жизни сессии вне зарегистрированных сценариев, в секундах.
+    """
+
+    def __init__(self, default_ttl: int):
+        self.default_ttl = default_ttl
+        self._wizards: dict[str, int] = {}
+        self._by_state: dict[str, str] = {}
+
+    @property
+    def wizards(self) -> dict[str, int]:
+        """Сценарии и сроки жизни их сессий."""
+        return dict(self._wizards)
+
+    def register(self, name: str, group: type[StatesGroup], ttl: int | None = None) -> None:
+        """Регистрирует сценарий name с состояниями group; ttl по умолчанию — default_ttl."""
+        for state in group.__all_states_names__:
+            owner = self._by_state.get(state)
+            if owner is not None and owner != name:
+                raise ValueError(f'Состояние {state} уже зарегистрировано сценарием {owner}')
+            self._by_state[state] = name
+        self._wizards[name] = ttl or self.default_ttl
+
+    def wizard(self, state: str | None) -> str:
+        """Сценарий, которому принадлежит состояние."""
+        return self._by_state.get(state, UNKNOWN_WIZARD)
+
+    def ttl(self, state: str | None) -> int:
+        """Срок жизни сессии в состоянии state, в секундах."""
+        return self._wizards.get(self.wizard(state), self.default_ttl)
+
+
+@dataclass
+class SweepReport:
+    """Результат одного прохода SessionSweeper."""
+    sessions: dict[str, int] = field(default_factory=dict)  # сессий по сценариям
+    bytes: dict[str, int] = field(default_factory=dict)  # объем ключей по сценариям
+    ttl_fixed: int = 0  # ключей без срока жизни, которым он был назначен
+    expired: int | None = None  # истекших ключей в Redis с прошлого прохода (по всему серверу)
+    duration: float = 0.0
+    finished_at: float = 0.0
+
+    @property
+    def total_sessions(self) -> int:
+        return sum(self.sessions.values())
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self.bytes.values())
+
+
+class SessionSweeper:
+    """
+    Фоновая задача: раз в interval секунд проходит по ключам сессий (SCAN), считает сессии и их объем
+    по сценариям, назначает срок жизни ключам, у которых его нет (сессии, созданные до введения
+    сроков жизни), и считает истекшие ключи по INFO stats. Результат пишется в лог и в last_report.
+
+    Объем ключа берется из MEMORY USAGE; если команда недоступна, считается размер полей и значений.
+
+    :param storage: Хранилище сессий.
+    :param registry: Сценарии и сроки жизни.
+    :param interval: Пауза между проходами, в секундах.
+    :param batch: Сколько ключей обрабатывать за одно обращение к Redis.
+    """
+
+    def __init__(self, storage: HashRedisStorage, registry: SessionRegistry,
+                 interval: float = 300.0, batch: int = 500):
+        self.storage = storage
+        self.registry = registry
+        self.interval = interval
+        self.batch = batch
+        self.last_report: SweepReport | None = None
+
+        self._task: asyncio.Task | None = None
+        self._expired_keys: int | None = None
+        self._memory_usage = True
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                report = await self.sweep()
+                logger.info('Сессии FSM: %d (%s), %.1f КБ, назначен срок жизни: %d, истекло: %s',
+                            report.total_sessions,
+                            ', '.join(f'{name}={count}' for name, count in sorted(report.sessions.items())),
+                            report.total_bytes / 1024, report.ttl_fixed,
+                            'н/д' if report.expired is None else report.expired)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Ошибка при проверке сессий FSM')
+            await asyncio.sleep(self.interval)
+
+    async def sweep(self) -> SweepReport:
+        """Один проход по всем сессиям."""
+        started = time.perf_counter()
+        report = SweepReport(sessions={name: 0 for name in self.registry.wizards},
+                             bytes={name: 0 for name in self.registry.wizards})
+        redis = self.storage.redis
+        pattern = f'{self.storage.key_builder.prefix}{self.storage.key_builder.separator}*'
+
+        keys = []
+        async for key in redis.scan_iter(match=pattern, count=self.batch):
+            keys.append(key)
+            if len(keys) >= self.batch:
+                await self._process(keys, report)
+                keys = []
+        if keys:
+            await self._process(keys, report)
+
+        report.expired = await self._expired_since_last()
+        report.duration = time.perf_counter() - started
+        report.finished_at = time.time()
+        self.last_report = report
+        return report
+
+    async def _process(self, keys: list, report: SweepReport) -> None:
+        redis = self.storage.redis
+        async with redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.type(key)
+                pipe.hget(key, STATE_FIELD)
+                pipe.ttl(key)
+            # Для ключей другого типа (строки старого RedisStorage) HGET вернет WRONGTYPE.
+            replies = await pipe.execute(raise_on_error=False)
+
+        sizes = await self._sizes(keys)
+        expire = []
+        for index, key in enumerate(keys):
+            key_type, state, ttl = replies[index * 3:index * 3 + 3]
+            if key_type in (b'none', 'none'):
+                continue  # ключ истек или удален во время прохода
+            if isinstance(state, (bytes, bytearray)):
+                state = state.decode()
+            elif not isinstance(state, str):
+                state = None
+
+            wizard = self.registry.wizard(state)
+            report.sessions[wizard] = report.sessions.get(wizard, 0) + 1
+            report.bytes[wizard] = report.bytes.get(wizard, 0) + sizes[index]
+            if ttl == -1:
+                expire.append((key, self.registry.ttl(state)))
+
+        if expire:
+            async with redis.pipeline(transaction=False) as pipe:
+                for key, ttl in expire:
+                    # NX: не перезаписывать срок, назначенный сценарием между чтением и записью.
+                    pipe.expire(key, ttl, nx=True)
+                results = await pipe.execute(raise_on_error=False)
+            report.ttl_fixed += sum(1 for result in results if result is True or result == 1)
+
+    async def _sizes(self, keys: list) -> list[int]:
+        """Объем ключей в байтах: MEMORY USAGE или, если команда недоступна, сумма полей и значений."""
+        redis = self.storage.redis
+        if self._memory_usage:
+            async with redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.memory_usage(key)
+                replies = await pipe.execute(raise_on_error=False)
+            if not any(isinstance(reply, ResponseError) and 'unknown command' in str(reply) for reply in replies):
+                return [reply if isinstance(reply, int) else 0 for reply in replies]
+            self._memory_usage = False
+
+        async with redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.hgetall(key)
+            replies = await pipe.execute(raise_on_error=False)
+        return [sum(len(name) + len(value) for name, value in reply.items()) if isinstance(reply, dict) else 0
+                for reply in replies]
+
+    async def _expired_since_last(self) -> int | None:
+        """Прирост expired_keys из INFO stats с прошлого прохода (None при первом проходе или без INFO)."""
+        try:
+            expired_keys = (await self.storage.redis.info('stats'))['expired_keys']
+        except (ResponseError, KeyError):
+            return None
+        previous, self._expired_keys = self._expired_keys, expired_keys
+        return None if previous is None else expired_keys - previous
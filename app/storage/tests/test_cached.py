@@ -0,0 +1,127 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from fakeredis import FakeServer
+
+from app.storage.cached import CachedStorage
+from app.storage.redis_hash import HashRedisStorage
+from app.storage.tests.test_redis_hash import CountingRedis
+from app.storage.transitions import advance_state, restart_state
+
+
+class Reg(StatesGroup):
+    first = State()
+    second = State()
+
+
+def key(chat_id: int) -> StorageKey:
+    return StorageKey(bot_id=42, chat_id=chat_id, user_id=chat_id)
+
+
+async def wait_until(condition, timeout: float = 1.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.005)
+
+
+class TestCachedStorage(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.redis = CountingRedis()
+        self.storage = CachedStorage(HashRedisStorage(self.redis), shared=False)
+
+    async def asyncTearDown(self):
+        await self.storage.close()
+
+    async def test_reads_after_write_served_from_memory(self):
+        context = FSMContext(self.storage, key(1))
+        await restart_state(context, Reg.first)
+        await advance_state(context, Reg.second, answer='Да')
+
+        self.redis.commands.clear()
+        self.assertEqual(await context.get_state(), 'Reg:second')
+        self.assertEqual(await context.get_data(), {'answer': 'Да'})
+        self.assertEqual(self.redis.commands, [])
+        self.assertEqual((self.storage.hits, self.storage.misses), (2, 0))
+
+    async def test_miss_reads_redis_once(self):
+        await HashRedisStorage(self.redis).set_state(key(1), Reg.first)
+
+        self.assertEqual(await self.storage.get_state(key(1)), 'Reg:first')
+        self.assertEqual(await self.storage.get_state(key(1)), 'Reg:first')
+        self.assertEqual((self.storage.hits, self.storage.misses), (1, 1))
+
+    async def test_returned_data_is_a_copy(self):
+        await self.storage.set_data(key(1), {'a': 1})
+        data = await self.storage.get_data(key(1))
+        data['a'] = 2
+        self.assertEqual(await self.storage.get_data(key(1)), {'a': 1})
+
+    async def test_size_bound(self):
+        self.storage.max_size = 2
+        for chat_id in range(3):
+            await self.storage.set_state(key(chat_id), Reg.first)
+
+        self.assertEqual(self.storage.stats()['size'], 2)
+        self.assertEqual(self.storage.evictions, 1)
+        await self.storage.get_state(key(0))
+        self.assertEqual(self.storage.misses, 1)
+
+    async def test_idle_chats_evicted(self):
+        await self.storage.set_state(key(1), Reg.first)
+        with patch('app.storage.cached.time.monotonic', return_value=10 ** 9):
+            await self.storage.set_state(key(2), Reg.first)
+        self.assertEqual(self.storage.stats()['size'], 1)
+
+    async def test_failed_write_drops_entry(self):
+        await self.storage.set_state(key(1), Reg.first)
+        with patch.object(self.storage.storage, 'set_state', side_effect=ConnectionError):
+            with self.assertRaises(ConnectionError):
+                await self.storage.set_state(key(1), Reg.second)
+        self.assertEqual(self.storage.stats()['size'], 0)
+
+
+class TestSharedCachedStorage(unittest.IsolatedAsyncioTestCase):
+    """Два процесса с общим Redis: запись в одном сбрасывает кэш в другом."""
+
+    async def asyncSetUp(self):
+        server = FakeServer()
+        self.first = CachedStorage(HashRedisStorage(CountingRedis(server=server)))
+        self.second = CachedStorage(HashRedisStorage(CountingRedis(server=server)))
+
+    async def asyncTearDown(self):
+        await self.first.close()
+        await self.second.close()
+
+    async def test_cache_bypassed_until_subscribed(self):
+        await self.first.set_state(key(1), Reg.first)
+        self.assertFalse(self.first.enabled)
+        self.assertEqual(self.first.stats()['size'], 0)
+
+        await wait_until(lambda: self.first.enabled)
+        await self.first.set_state(key(1), Reg.first)
+        self.assertEqual(await self.first.get_state(key(1)), 'Reg:first')
+        self.assertEqual(self.first.hits, 1)
+
+    async def test_remote_write_invalidates(self):
+        self.first._ensure_listener()
+        self.second._ensure_listener()
+        await wait_until(lambda: self.first.enabled and self.second.enabled)
+
+        await self.first.set_state(key(1), Reg.first)
+        await wait_until(lambda: self.second.invalidations == 2)
+        self.assertEqual(await self.second.get_state(key(1)), 'Reg:first')
+
+        await self.second.set_state(key(1), Reg.second)
+        await wait_until(lambda: self.first.invalidations == 2)
+
+        self.assertEqual(await self.first.get_state(key(1)), 'Reg:second')
+        self.assertEqual(self.first.misses, 1)
+        # Собственные записи не сбрасывают кэш процесса.
+        self.assertEqual(self.second.invalidations, 2)
+        self.assertEqual(await self.second.get_state(key(1)), 'Reg:second')
+        self.assertEqual(self.second.hits, 1)
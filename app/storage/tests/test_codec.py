@@ -0,0 +1,31 @@
+import unittest
+
+from app.anesthetic_risk.handlers.execution_logic import get_operate_patient
+from app.anesthetic_risk.keyboards.keyboard_patient import patient_codec, TERMINAL
+from app.skf.keyboards.reply_kb_skf import gender_codec
+from app.sofa.handlers.calc_EyeVerbalMotor import calculation_Motor_response
+from app.sofa.keyboards.kb_motor import motor_codec, FOUR
+from app.storage.codec import OptionCodec
+
+
+class TestOptionCodec(unittest.TestCase):
+
+    def test_round_trip(self):
+        codec = OptionCodec('Да', 'Нет')
+        self.assertEqual(codec.encode('Нет'), 1)
+        self.assertEqual(codec.decode(1), 'Нет')
+
+    def test_unknown_label(self):
+        with self.assertRaises(ValueError):
+            OptionCodec('Да', 'Нет').encode('Может быть')
+
+    def test_legacy_label_decoded_as_is(self):
+        self.assertEqual(motor_codec.decode(FOUR), FOUR)
+
+    def test_aliases(self):
+        self.assertEqual(gender_codec.encode('муж'), gender_codec.encode('мужской'))
+        self.assertEqual(gender_codec.decode(gender_codec.encode('жен')), 'женский')
+
+    def test_decoded_value_scored_as_text(self):
+        self.assertEqual(calculation_Motor_response(motor_codec.decode(motor_codec.encode(FOUR))), 3)
+        self.assertEqual(get_operate_patient(patient_codec.decode(patient_codec.encode(TERMINAL)).lower()), 6)
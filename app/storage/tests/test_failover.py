@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import unittest
+from unittest.mock import patch
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from app.storage.cached import CachedStorage
+from app.storage.failover import FailoverStorage, CLOSED, OPEN
+from app.storage.redis_hash import HashRedisStorage
+from app.storage.transitions import advance_state, finish_state, restart_state
+
+
+class Reg(StatesGroup):
+    first = State()
+    second = State()
+    third = State()
+
+
+KEY = StorageKey(bot_id=42, chat_id=1, user_id=1)
+
+
+class TestFailoverStorage(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        # Переключения предохранителя логируются как WARNING, в тестах они ожидаемы.
+        logger = logging.getLogger('app.storage.failover')
+        logger.setLevel(logging.ERROR)
+        self.addCleanup(logger.setLevel, logging.NOTSET)
+
+        self.server = FakeServer()
+        self.redis = HashRedisStorage(FakeAsyncRedis(server=self.server))
+        self.cached = CachedStorage(self.redis, shared=False)
+        self.storage = FailoverStorage(self.cached, health_check=self.redis.redis.ping, last_known=self.cached.peek,
+                                       timeout=0.05, failure_threshold=2, recovery_time=60)
+        self.context = FSMContext(self.storage, KEY)
+
+    async def test_wizard_continues_while_redis_down(self):
+        await restart_state(self.context, Reg.first)
+        await advance_state(self.context, Reg.second, answer=1)
+
+        self.server.connected = False
+        await advance_state(self.context, Reg.third, other=2)
+        await self.storage.get_state(StorageKey(bot_id=42, chat_id=2, user_id=2))
+
+        self.assertEqual(self.storage.state, OPEN)
+        self.assertEqual(await self.context.get_state(), 'Reg:third')
+        self.assertEqual(await finish_state(self.context, last=3), {'answer': 1, 'other': 2, 'last': 3})
+        self.assertEqual(self.storage.stats()['dirty'], 1)
+
+    async def test_reconcile_after_recovery(self):
+        await restart_state(self.context, Reg.first)
+        self.server.connected = False
+        for _ in range(2):
+            await self.storage.get_state(StorageKey(bot_id=42, chat_id=2, user_id=2))
+        await advance_state(self.context, Reg.second, answer=1)
+
+        self.server.connected = True
+        self.storage.recovery_time = 0
+        await self.storage.get_state(StorageKey(bot_id=42, chat_id=3, user_id=3))
+
+        self.assertEqual(self.storage.state, CLOSED)
+        self.assertEqual(self.storage.stats()['reconciled'], 1)
+        self.assertEqual(self.storage.stats()['fallback_sessions'], 0)
+        self.assertEqual(await self.redis.get_state(KEY), 'Reg:second')
+        self.assertEqual(await self.redis.get_data(KEY), {'answer': 1})
+
+    async def test_recovery_fails_stays_open(self):
+        self.server.connected = False
+        for _ in range(2):
+            await self.storage.get_state(KEY)
+        self.storage.recovery_time = 0
+        await self.storage.get_state(KEY)
+
+        self.assertEqual(self.storage.state, OPEN)
+        self.assertEqual(self.storage.opened, 2)
+
+    async def test_slow_redis_times_out(self):
+        async def stall(*args, **kwargs):
+            await asyncio.sleep(1)
+
+        with patch.object(self.redis, 'get_state_ttl', stall):
+            self.assertIsNone(await self.storage.get_state(KEY))
+        self.assertEqual(self.storage.timeouts, 1)
+        self.assertEqual(self.storage.state, CLOSED)
+
+        # После единичной ошибки сессия возвращается в Redis при следующем обращении.
+        await restart_state(self.context, Reg.first)
+        self.assertEqual(self.storage.stats()['fallback_sessions'], 0)
+        self.assertEqual(await self.redis.get_state(KEY), 'Reg:first')
+
+    async def test_fallback_bounded(self):
+        self.storage.max_sessions = 2
+        self.server.connected = False
+        for chat_id in range(4):
+            await self.storage.set_state(StorageKey(bot_id=42, chat_id=chat_id, user_id=chat_id), Reg.first)
+
+        stats = self.storage.stats()
+        self.assertEqual((stats['fallback_sessions'], stats['dropped']), (2, 2))
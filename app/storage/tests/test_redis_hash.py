@@ -0,0 +1,138 @@
+import unittest
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+from fakeredis import FakeAsyncRedis
+
+from app.storage.redis_hash import HashRedisStorage
+from app.storage.transitions import restart_state, advance_state, finish_state
+
+
+class CountingRedis(FakeAsyncRedis):
+    """FakeAsyncRedis, подсчитывающий команды, отправленные в Redis."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commands = []
+
+    async def execute_command(self, *args, **options):
+        self.commands.append(args[0])
+        return await super().execute_command(*args, **options)
+
+
+class Reg(StatesGroup):
+    first = State()
+    second = State()
+
+
+# Ответы пользователя в сценарии SOFA: шаг -> (поле, значение).
+SOFA_STEPS = [('pao2', '80'), ('fio2', '0.4'), ('respiratory', 'Да'), ('platelet', '<= 150'),
+              ('liver', '20 - 32'), ('creatinin_kidney', '< 110'), ('hypotension', 'Нет гипотензии'),
+              ('eye_response', 'Не открывает'), ('verbal_response', 'Отсутствие речи'),
+              ('motor_response', 'Не двигается')]
+
+KEY = StorageKey(bot_id=42, chat_id=1, user_id=1)
+
+
+class TestHashRedisStorage(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.redis = CountingRedis()
+        self.storage = HashRedisStorage(self.redis)
+
+    async def test_state(self):
+        self.assertIsNone(await self.storage.get_state(KEY))
+        await self.storage.set_state(KEY, Reg.first)
+        self.assertEqual(await self.storage.get_state(KEY), 'Reg:first')
+        await self.storage.set_state(KEY, None)
+        self.assertIsNone(await self.storage.get_state(KEY))
+
+    async def test_data(self):
+        await self.storage.set_state(KEY, Reg.first)
+        await self.storage.set_data(KEY, {'a': 1, 'b': 'текст'})
+        self.assertEqual(await self.storage.get_data(KEY), {'a': 1, 'b': 'текст'})
+
+        self.assertEqual(await self.storage.update_data(KEY, {'c': [1, 2]}), {'a': 1, 'b': 'текст', 'c': [1, 2]})
+
+        # set_data заменяет данные целиком, но не трогает состояние.
+        await self.storage.set_data(KEY, {'d': None})
+        self.assertEqual(await self.storage.get_data(KEY), {'d': None})
+        self.assertEqual(await self.storage.get_state(KEY), 'Reg:first')
+
+    async def test_clear_removes_key(self):
+        context = FSMContext(self.storage, KEY)
+        await context.set_state(Reg.first)
+        await context.update_data(a=1)
+        await context.clear()
+        self.assertEqual(await self.redis.keys('*'), [])
+
+    async def test_transitions_single_round_trip(self):
+        context = FSMContext(self.storage, KEY)
+        await restart_state(context, Reg.first)
+
+        self.redis.commands.clear()
+        await advance_state(context, Reg.second, answer='Да')
+        self.assertEqual(len(self.redis.commands), 1)
+
+        self.assertEqual(await context.get_state(), 'Reg:second')
+        self.assertEqual(await context.get_data(), {'answer': 'Да'})
+
+        self.redis.commands.clear()
+        self.assertEqual(await finish_state(context, last=2), {'answer': 'Да', 'last': 2})
+        self.assertEqual(len(self.redis.commands), 1)
+        self.assertEqual(await self.redis.keys('*'), [])
+
+    async def test_restart_drops_previous_data(self):
+        context = FSMContext(self.storage, KEY)
+        await advance_state(context, Reg.second, old=1)
+        await restart_state(context, Reg.first)
+        self.assertEqual(await context.get_state(), 'Reg:first')
+        self.assertEqual(await context.get_data(), {})
+
+    async def test_restart_with_data(self):
+        context = FSMContext(self.storage, KEY)
+        await advance_state(context, Reg.second, old=1)
+        self.redis.commands.clear()
+        await restart_state(context, Reg.first, message_id=7)
+        self.assertEqual(len(self.redis.commands), 1)
+        self.assertEqual(await context.get_state(), 'Reg:first')
+        self.assertEqual(await context.get_data(), {'message_id': 7})
+
+
+class TestSofaRedisCommands(unittest.IsolatedAsyncioTestCase):
+    """Количество команд Redis на одно полное прохождение сценария SOFA (без чтения состояния middleware)."""
+
+    async def test_redis_storage_baseline(self):
+        redis = CountingRedis()
+        context = FSMContext(RedisStorage(redis), KEY)
+
+        await context.clear()
+        await context.set_state(Reg.first)
+        for field, value in SOFA_STEPS[:-1]:
+            await context.update_data({field: value})
+            await context.set_state(Reg.second)
+        field, value = SOFA_STEPS[-1]
+        await context.update_data({field: value})
+        data = await context.get_data()
+        await context.clear()
+
+        self.assertEqual(len(data), 10)
+        self.assertEqual(len(redis.commands), 35)
+
+    async def test_hash_storage(self):
+        redis = CountingRedis()
+        context = FSMContext(HashRedisStorage(redis), KEY)
+        # Первый вызов скрипта загружает его в Redis (EVALSHA -> SCRIPT LOAD), это происходит один раз.
+        await context.storage.reset(StorageKey(bot_id=42, chat_id=2, user_id=2))
+        redis.commands.clear()
+
+        await restart_state(context, Reg.first)
+        for field, value in SOFA_STEPS[:-1]:
+            await advance_state(context, Reg.second, **{field: value})
+        field, value = SOFA_STEPS[-1]
+        data = await finish_state(context, **{field: value})
+
+        self.assertEqual(data, dict(SOFA_STEPS))
+        self.assertEqual(len(redis.commands), 11)
@@ -0,0 +1,108 @@
+import unittest
+from unittest.mock import patch
+
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from fakeredis import FakeAsyncRedis
+
+from app.storage.cached import CachedStorage
+from app.storage.redis_hash import HashRedisStorage
+from app.storage.sessions import SessionRegistry, SessionSweeper, UNKNOWN_WIZARD
+
+
+class Sofa(StatesGroup):
+    pao2 = State()
+    fio2 = State()
+
+
+class Donor(StatesGroup):
+    phenotype = State()
+
+
+def key(chat_id: int) -> StorageKey:
+    return StorageKey(bot_id=42, chat_id=chat_id, user_id=chat_id)
+
+
+def make_registry() -> SessionRegistry:
+    registry = SessionRegistry(default_ttl=600)
+    registry.register('sofa', Sofa, 3600)
+    registry.register('donor', Donor)
+    return registry
+
+
+class TestSessionRegistry(unittest.TestCase):
+
+    def test_ttl_by_state(self):
+        registry = make_registry()
+        self.assertEqual(registry.ttl('Sofa:fio2'), 3600)
+        self.assertEqual(registry.ttl('Donor:phenotype'), 600)
+        self.assertEqual(registry.ttl(None), 600)
+        self.assertEqual(registry.wizard('Other:state'), UNKNOWN_WIZARD)
+
+    def test_state_registered_twice(self):
+        registry = make_registry()
+        with self.assertRaises(ValueError):
+            registry.register('skf', Sofa)
+
+
+class TestSessionTTL(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.redis = FakeAsyncRedis()
+        self.storage = HashRedisStorage(self.redis, state_ttl=make_registry().ttl)
+        self.redis_key = self.storage.key_builder.build(key(1))
+
+    async def test_step_refreshes_wizard_ttl(self):
+        await self.storage.reset(key(1), Sofa.pao2)
+        await self.redis.expire(self.redis_key, 10)
+
+        await self.storage.update_data_and_set_state(key(1), {'pao2': '80'}, Sofa.fio2)
+        self.assertEqual(await self.redis.ttl(self.redis_key), 3600)
+
+    async def test_write_without_state_keeps_ttl(self):
+        await self.storage.reset(key(1), Sofa.pao2)
+        await self.redis.expire(self.redis_key, 10)
+
+        await self.storage.update_data(key(1), {'a': 1})
+        self.assertEqual(await self.redis.ttl(self.redis_key), 10)
+
+    async def test_write_without_state_sets_default_ttl(self):
+        await self.storage.update_data(key(1), {'a': 1})
+        self.assertEqual(await self.redis.ttl(self.redis_key), 600)
+
+    async def test_cache_does_not_outlive_session(self):
+        cached = CachedStorage(self.storage, idle_ttl=600, shared=False)
+        await self.storage.reset(key(1), Sofa.pao2)
+        await self.redis.expire(self.redis_key, 5)
+
+        self.assertEqual(await cached.get_state(key(1)), 'Sofa:pao2')
+        with patch('app.storage.cached.time.monotonic', return_value=10 ** 9):
+            await cached.get_state(key(1))
+        self.assertEqual((cached.hits, cached.misses), (0, 2))
+
+
+class TestSessionSweeper(unittest.IsolatedAsyncioTestCase):
+
+    async def test_sweep_reports_and_fixes_ttl(self):
+        redis = FakeAsyncRedis()
+        registry = make_registry()
+        storage = HashRedisStorage(redis, state_ttl=registry.ttl)
+        await storage.update_data_and_set_state(key(1), {'pao2': '80'}, Sofa.fio2)
+        await storage.update_data_and_set_state(key(2), {}, Sofa.pao2)
+        await storage.reset(key(3), Donor.phenotype)
+
+        # Сессии без срока жизни: созданная до его введения и ключ старого RedisStorage.
+        await HashRedisStorage(redis).reset(key(4), Donor.phenotype)
+        await redis.set('fsm:5:5:data', '{"a": 1}')
+
+        sweeper = SessionSweeper(storage, registry, batch=2)
+        report = await sweeper.sweep()
+
+        self.assertEqual(report.sessions, {'sofa': 2, 'donor': 2, UNKNOWN_WIZARD: 1})
+        self.assertEqual(report.ttl_fixed, 2)
+        self.assertGreater(report.bytes['sofa'], report.bytes['donor'] / 2)
+        self.assertIs(sweeper.last_report, report)
+        self.assertEqual(await redis.ttl(storage.key_builder.build(key(4))), 600)
+        self.assertEqual(await redis.ttl('fsm:5:5:data'), 600)
+
+        self.assertEqual((await sweeper.sweep()).ttl_fixed, 0)
@@ -0,0 +1,55 @@
+# Переходы между шагами сценариев. Обработчики вызывают эти функции вместо пар
+# state.update_data(...) + state.set_state(...), чтобы хранилище могло выполнить шаг за одно обращение.
+from contextvars import ContextVar
+from typing import Any
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StateType
+
+from app.storage.base import WizardStorage, state_name
+
+# Состояние, в которое перевел сценарий последний шаг в текущем обновлении: имя состояния,
+# None — сценарий завершен, UNCHANGED — шага не было. Читает HandlerMetrics (app/server/metrics.py).
+UNCHANGED = object()
+transition: ContextVar[Any] = ContextVar('transition', default=UNCHANGED)
+
+
+async def restart_state(state: FSMContext, first_state: StateType, **data: Any) -> None:
+    """
+    Начинает сценарий заново: сбрасывает данные (оставляя только data) и устанавливает первое состояние.
+    Заменяет state.clear() + state.set_state(first_state).
+    """
+    transition.set(state_name(first_state))
+    if isinstance(state.storage, WizardStorage):
+        await state.storage.reset(state.key, first_state, data)
+    else:
+        await state.set_data(data)
+        await state.set_state(first_state)
+
+
+async def advance_state(state: FSMContext, next_state: StateType, **data: Any) -> None:
+    """
+    Сохраняет ответ пользователя и переводит сценарий на следующий шаг.
+    Заменяет state.update_data(**data) + state.set_state(next_state).
+    """
+    transition.set(state_name(next_state))
+    if isinstance(state.storage, WizardStorage):
+        await state.storage.update_data_and_set_state(state.key, data, next_state)
+    else:
+        if data:
+            await state.update_data(**data)
+        await state.set_state(next_state)
+
+
+async def finish_state(state: FSMContext, **data: Any) -> dict[str, Any]:
+    """
+    Сохраняет последний ответ, возвращает все данные сценария и завершает его.
+    Заменяет state.update_data(**data) + state.get_data() + state.clear().
+    """
+    transition.set(None)
+    if isinstance(state.storage, WizardStorage):
+        return await state.storage.pop_data(state.key, data)
+
+    result = await state.update_data(**data)
+    await state.clear()
+    return result
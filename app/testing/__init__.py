@@ -0,0 +1,2 @@
+# Вспомогательные средства для тестов и нагрузочных прогонов: локальная имитация Telegram Bot API
+# и фабрики входящих обновлений. В рабочем боте не используются.
@@ -0,0 +1,238 @@
+import asyncio
+import itertools
+import json
+import time
+from dataclasses import dataclass, field
+
+from aiohttp import ClientSession, web
+
+# Методы Bot API, которые в ответ возвращают объект Message.
+MESSAGE_METHODS = ('sendMessage', 'sendDocument', 'sendPhoto', 'editMessageText',
+                   'editMessageReplyMarkup', 'copyMessage', 'forwardMessage')
+
+
+@dataclass
+class ApiCall:
+    """
+    Запрос бота к имитации Bot API.
+
+    :param method: Имя метода Bot API (например, 'sendMessage').
+    :param params: Параметры запроса (значения — строки, как они пришли в форме).
+    :param timestamp: Время получения запроса по time.perf_counter().
+    """
+    method: str
+    params: dict
+    timestamp: float = field(default_factory=time.perf_counter)
+
+
+def make_message_update(chat_id: int, text: str, user_id: int | None = None) -> dict:
+    """
+    Создает обновление с текстовым сообщением пользователя (как его присылает Telegram).
+
+    :param chat_id: Идентификатор чата.
+    :param text: Текст сообщения. Если начинается с '/', размечается как команда.
+    :param user_id: Идентификатор пользователя, по умолчанию совпадает с chat_id.
+    :return: dict с полями обновления без update_id.
+    """
+    user_id = chat_id if user_id is None else user_id
+    message = {'message_id': int(time.monotonic_ns() % 2 ** 31), 'date': int(time.time()),
+               'chat': {'id': chat_id, 'type': 'private'},
+               'from': {'id': user_id, 'is_bot': False, 'first_name': 'Test'},
+               'text': text}
+    if text.startswith('/'):
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+    return {'message': message}
+
+
+def make_callback_update(chat_id: int, data: str, user_id: int | None = None,
+                         message_id: int = 1) -> dict:
+    """
+    Создает обновление с нажатием на inline-кнопку.
+
+    :param chat_id: Идентификатор чата.
+    :param data: callback_data нажатой кнопки.
+    :param user_id: Идентификатор пользователя, по умолчанию совпадает с chat_id.
+    :param message_id: Идентификатор сообщения с клавиатурой.
+    :return: dict с полями обновления без update_id.
+    """
+    user_id = chat_id if user_id is None else user_id
+    user = {'id': user_id, 'is_bot': False, 'first_name': 'Test'}
+    return {'callback_query': {'id': str(time.monotonic_ns()), 'from': user, 'chat_instance': str(chat_id),
+                               'data': data,
+                               'message': {'message_id': message_id, 'date': int(time.time()),
+                                           'chat': {'id': chat_id, 'type': 'private'},
+                                           'from': {'id': 1, 'is_bot': True, 'first_name': 'Bot'},
+                                           'text': '...'}}}
+
+
+def make_inline_query_update(user_id: int, query: str) -> dict:
+    """
+    Создает обновление с inline-запросом ('@бот <query>' в поле ввода любого чата).
+
+    :param user_id: Идентификатор пользователя.
+    :param query: Текст запроса после имени бота.
+    :return: dict с полями обновления без update_id.
+    """
+    user = {'id': user_id, 'is_bot': False, 'first_name': 'Test'}
+    return {'inline_query': {'id': str(time.monotonic_ns()), 'from': user, 'query': query, 'offset': ''}}
+
+
+class FakeTelegramServer:
+    """
+    Локальная имитация Telegram Bot API на aiohttp.
+
+    Принимает запросы бота вида /bot<token>/<method>, запоминает их в self.calls и отвечает так,
+    как ответил бы Telegram. Входящие обновления, добавленные через push_update, отдаются боту
+    через getUpdates (long polling) или отправляются POST-запросом на адрес, зарегистрированный
+    методом setWebhook.
+
+    Пример использования:
+    server = FakeTelegramServer()
+    await server.start()
+    bot = Bot(token, session=AiohttpSession(api=TelegramAPIServer.from_base(server.url)))
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.host = host
+        self.port = port
+        self.calls: list[ApiCall] = []
+        self.webhook_url: str | None = None
+        self.webhook_secret: str | None = None
+        # update_id -> время добавления обновления (time.perf_counter()), для замера задержки ответа.
+        self.pushed_at: dict[int, float] = {}
+        # Метод -> сколько следующих запросов к нему получат ответ 429 и с каким retry_after.
+        self.flood: dict[str, tuple[int, int]] = {}
+
+        self._updates: list[dict] = []
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._new_update = asyncio.Event()
+        self._new_call = asyncio.Event()
+        self._runner: web.AppRunner | None = None
+        self._client: ClientSession | None = None
+        self._deliveries: set[asyncio.Task] = set()
+
+    @property
+    def url(self) -> str:
+        """Базовый адрес для TelegramAPIServer.from_base."""
+        return f'http://{self.host}:{self.port}'
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def close(self) -> None:
+        for task in list(self._deliveries):
+            task.cancel()
+        if self._client is not None:
+            await self._client.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def push_update(self, update: dict) -> int:
+        """
+        Добавляет входящее обновление и возвращает присвоенный ему update_id.
+
+        Если зарегистрирован webhook, обновление сразу отправляется на него,
+        иначе ждет очередного вызова getUpdates.
+        """
+        update = {'update_id': next(self._update_ids), **update}
+        self.pushed_at[update['update_id']] = time.perf_counter()
+        if self.webhook_url:
+            task = asyncio.create_task(self._deliver(update))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+        else:
+            self._updates.append(update)
+            self._new_update.set()
+        return update['update_id']
+
+    def flood_next(self, method: str, count: int = 1, retry_after: int = 1) -> None:
+        """Следующие count запросов к методу получат ответ 429 Too Many Requests."""
+        self.flood[method] = (count, retry_after)
+
+    def calls_of(self, method: str) -> list[ApiCall]:
+        """Возвращает все запросы к указанному методу Bot API."""
+        return [call for call in self.calls if call.method == method]
+
+    async def wait_for_call(self, method: str, count: int = 1, timeout: float = 5) -> ApiCall:
+        """
+        Ждет, пока бот вызовет метод не менее count раз, и возвращает последний такой вызов.
+
+        :raises asyncio.TimeoutError: если вызовов не было за timeout секунд.
+        """
+        async def _wait() -> ApiCall:
+            while len(self.calls_of(method)) < count:
+                self._new_call.clear()
+                await self._new_call.wait()
+            return self.calls_of(method)[count - 1]
+
+        return await asyncio.wait_for(_wait(), timeout)
+
+    async def _deliver(self, update: dict) -> None:
+        if self._client is None:
+            self._client = ClientSession()
+        headers = {}
+        if self.webhook_secret:
+            headers['X-Telegram-Bot-Api-Secret-Token'] = self.webhook_secret
+        async with self._client.post(self.webhook_url, json=update, headers=headers) as response:
+            await response.read()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        params = dict(await request.post())
+        self.calls.append(ApiCall(method=method, params=params))
+        self._new_call.set()
+
+        count, retry_after = self.flood.get(method, (0, 0))
+        if count:
+            self.flood[method] = (count - 1, retry_after)
+            return web.json_response({'ok': False, 'error_code': 429,
+                                      'description': f'Too Many Requests: retry after {retry_after}',
+                                      'parameters': {'retry_after': retry_after}}, status=429)
+
+        if method == 'getUpdates':
+            result = await self._get_updates(params)
+        elif method == 'getMe':
+            result = {'id': int(request.match_info['token'].split(':')[0]), 'is_bot': True,
+                      'first_name': 'Fake', 'username': 'fake_bot'}
+        elif method == 'setWebhook':
+            self.webhook_url = params.get('url')
+            self.webhook_secret = params.get('secret_token')
+            result = True
+        elif method == 'deleteWebhook':
+            self.webhook_url = self.webhook_secret = None
+            result = True
+        elif method in MESSAGE_METHODS:
+            result = self._message(params)
+        else:
+            result = True
+        return web.json_response({'ok': True, 'result': result})
+
+    async def _get_updates(self, params: dict) -> list[dict]:
+        offset = int(params.get('offset', 0))
+        self._updates = [update for update in self._updates if update['update_id'] >= offset]
+        if not self._updates:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), float(params.get('timeout', 0)))
+            except asyncio.TimeoutError:
+                pass
+        return list(self._updates)
+
+    def _message(self, params: dict) -> dict:
+        chat_id = int(params.get('chat_id', 0))
+        message = {'message_id': int(params.get('message_id') or next(self._message_ids)),
+                   'date': int(time.time()), 'chat': {'id': chat_id, 'type': 'private'},
+                   'from': {'id': 1, 'is_bot': True, 'first_name': 'Fake'},
+                   'text': params.get('text', '')}
+        if 'reply_markup' in params:
+            markup = json.loads(params['reply_markup'])
+            if 'inline_keyboard' in markup:
+                message['reply_markup'] = markup
+        return message
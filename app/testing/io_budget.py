@@ -0,0 +1,198 @@
+import unittest
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Callable
+from unittest.mock import patch
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Update
+from fakeredis import FakeAsyncRedis
+from redis.asyncio.client import Pipeline
+
+from app.server.executor import ChatOrderedExecutor
+from app.storage.cached import CachedStorage
+from app.storage.failover import FailoverStorage
+from app.storage.redis_hash import WRITE_SCRIPT, HashRedisStorage
+from app.testing.fake_telegram import FakeTelegramServer, make_message_update
+
+TOKEN = '42:IO-budget'
+
+
+@dataclass
+class IOCounts:
+    """
+    Обращения к внешним сервисам за время диалога.
+
+    telegram: Запросы к Bot API по методам.
+    redis: Команды Redis по именам (команды конвейера считаются по отдельности).
+    redis_round_trips: Обращения к Redis (конвейер — одно обращение).
+    postgres: Запросы к PostgreSQL по имени запроса (name в DatabasePool.fetch).
+    """
+    telegram: Counter = field(default_factory=Counter)
+    redis: Counter = field(default_factory=Counter)
+    redis_round_trips: int = 0
+    postgres: Counter = field(default_factory=Counter)
+
+    def __str__(self) -> str:
+        def details(counter: Counter) -> str:
+            return ', '.join(f'{name}×{count}' for name, count in sorted(counter.items())) or '—'
+
+        return (f'Bot API {self.telegram.total()}: {details(self.telegram)}; '
+                f'Redis {self.redis.total()} ({self.redis_round_trips} обращений): {details(self.redis)}; '
+                f'PostgreSQL {self.postgres.total()}: {details(self.postgres)}')
+
+
+class CountingPipeline(Pipeline):
+    """Конвейер redis.asyncio, сообщающий счетчику о каждой отправке."""
+
+    def __init__(self, *args: Any, counts: IOCounts, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.counts = counts
+
+    async def execute(self, raise_on_error: bool = True) -> list[Any]:
+        if self.command_stack:
+            self.counts.redis_round_trips += 1
+            self.counts.redis.update(str(args[0]).upper() for args, _ in self.command_stack)
+        return await super().execute(raise_on_error)
+
+
+class CountingRedis(FakeAsyncRedis):
+    """Redis в памяти процесса (fakeredis), считающий команды в self.counts."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.counts = IOCounts()
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        self.counts.redis_round_trips += 1
+        self.counts.redis[str(args[0]).upper()] += 1
+        return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Any = None) -> CountingPipeline:
+        return CountingPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint,
+                                counts=self.counts)
+
+
+class FakeConnection:
+    """Соединение asyncpg: строки результата возвращает функция rows(query, args)."""
+
+    def __init__(self, rows: Callable[[str, tuple], list[dict]]):
+        self.rows = rows
+
+    async def fetch(self, query: str, *args: Any) -> list[dict]:
+        return self.rows(query, args)
+
+    async def fetchrow(self, query: str, *args: Any) -> dict | None:
+        rows = self.rows(query, args)
+        return rows[0] if rows else None
+
+
+_dispatchers: dict[tuple[Router, ...], Dispatcher] = {}
+
+
+def bot_dispatcher(routers: tuple[Router, ...] = ()) -> Dispatcher:
+    """
+    Диспетчер со всеми роутерами бота (run.register_routers) или только с роутерами routers.
+    Один на процесс для каждого набора: роутер aiogram подключается только к одному родителю.
+    Хранилище FSM каждый тест задает свое. Обновления одного чата идут по очереди (ChatOrderedExecutor),
+    как в config.py.
+    """
+    if routers not in _dispatchers:
+        dispatcher = Dispatcher(events_isolation=ChatOrderedExecutor())
+        if routers:
+            dispatcher.include_routers(*routers)
+        else:
+            from run import register_routers
+
+            register_routers(dispatcher, wizard_mode='reply')
+        _dispatchers[routers] = dispatcher
+    return _dispatchers[routers]
+
+
+class IOBudgetTestCase(unittest.IsolatedAsyncioTestCase):
+    """
+    Тест числа обращений к Bot API, Redis и PostgreSQL за полный диалог со сценарием.
+
+    Обновления подаются в dp.feed_update с настоящими роутерами бота. Бот отправляет запросы по HTTP в
+    имитацию Bot API (FakeTelegramServer). Сессии FSM хранятся в той же цепочке хранилищ, что в config.py
+    (FailoverStorage -> CachedStorage -> HashRedisStorage), поверх fakeredis. Кэш работает без канала
+    инвалидации: команд Redis столько же, уведомление публикует сам скрипт записи. Запросы к PostgreSQL
+    идут через config.db_pool и считаются им же, соединение подменяется на FakeConnection, строки
+    результата возвращает метод database_rows.
+
+    Пример:
+    counts = await self.converse(100, '/skf', 'мужской', '40', '90')
+    self.assertWithinBudget(counts, telegram=6, redis=6)
+
+    Тест сценария в одном сообщении задает routers — роутеры, которые подключаются вместо роутеров бота.
+    """
+    routers: tuple[Router, ...] = ()
+
+    async def asyncSetUp(self):
+        from config import db_pool
+
+        self.telegram = FakeTelegramServer()
+        await self.telegram.start()
+        self.addAsyncCleanup(self.telegram.close)
+        self.bot = Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(self.telegram.url)))
+        self.addAsyncCleanup(self.bot.session.close)
+
+        # В работающем боте скрипт записи уже загружен в Redis: SCRIPT LOAD после первого NOSCRIPT
+        # в бюджет диалога не входит.
+        self.redis = CountingRedis()
+        await self.redis.script_load(WRITE_SCRIPT)
+        cached = CachedStorage(HashRedisStorage(self.redis), shared=False)
+        self.dp = bot_dispatcher(self.routers)
+        self.dp.fsm.storage = FailoverStorage(cached, health_check=self.redis.ping, last_known=cached.peek)
+        self.addAsyncCleanup(self.dp.fsm.storage.close)
+
+        self.db_pool = db_pool
+        patcher = patch.object(db_pool, 'acquire', self._acquire)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self._update_ids = iter(range(1, 1_000_000))
+
+    def database_rows(self, query: str, args: tuple) -> list[dict]:
+        """Строки результата запроса к PostgreSQL. По умолчанию — пустой результат."""
+        return []
+
+    @asynccontextmanager
+    async def _acquire(self) -> AsyncGenerator[FakeConnection, None]:
+        yield FakeConnection(self.database_rows)
+
+    async def converse(self, chat_id: int, *updates: str | dict) -> IOCounts:
+        """
+        Подает обновления одного чата по очереди и возвращает обращения к сервисам за все время.
+
+        :param chat_id: Идентификатор чата.
+        :param updates: Текст сообщения пользователя или готовое обновление (например, make_callback_update).
+        """
+        calls = len(self.telegram.calls)
+        self.redis.counts = IOCounts()
+        queries = {name: timing.count for name, timing in self.db_pool.queries.items()}
+
+        for update in updates:
+            if isinstance(update, str):
+                update = make_message_update(chat_id, update)
+            await self.dp.feed_update(self.bot, Update.model_validate({'update_id': next(self._update_ids), **update},
+                                                                      context={'bot': self.bot}))
+
+        counts = self.redis.counts
+        counts.telegram.update(call.method for call in self.telegram.calls[calls:])
+        counts.postgres.update({name: timing.count - queries.get(name, 0)
+                                for name, timing in self.db_pool.queries.items()})
+        counts.postgres = +counts.postgres
+        return counts
+
+    def assertWithinBudget(self, counts: IOCounts, telegram: int, redis: int, postgres: int = 0) -> None:
+        """Проверяет, что обращений к каждому сервису не больше заявленного бюджета."""
+        over = [f'{service}: {actual} > {budget}' for service, actual, budget in (
+            ('Bot API', counts.telegram.total(), telegram),
+            ('Redis', counts.redis.total(), redis),
+            ('PostgreSQL', counts.postgres.total(), postgres),
+        ) if actual > budget]
+        if over:
+            self.fail(f'Бюджет обращений превышен ({"; ".join(over)}). {counts}')
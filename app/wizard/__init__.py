@@ -0,0 +1 @@
+# Сценарии в одном сообщении: inline-кнопки и правка сообщения бота вместо новых сообщений.
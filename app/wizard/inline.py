@@ -0,0 +1,243 @@
+import html
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from aiogram import Bot, F, Router, types
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import Command, StateFilter
+from aiogram.filters.callback_data import CallbackData
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup
+
+from app.storage.codec import OptionCodec
+from app.storage.transitions import restart_state, advance_state, finish_state
+
+# Поле данных FSM с id сообщения сценария: его редактирует шаг с вводом текста.
+MESSAGE_FIELD = 'message_id'
+
+
+class WizardCallback(CallbackData, prefix='w'):
+    """callback_data кнопки ответа: 'w:<сценарий>:<номер шага>:<номер варианта>', например 'w:sofa:3:1'."""
+    wizard: str
+    step: int
+    code: int
+
+
+@dataclass(frozen=True)
+class Choice:
+    """
+    Шаг с выбором варианта inline-кнопкой. В данные FSM пишется номер варианта (codec).
+
+    :param state: Состояние сценария на этом шаге.
+    :param field: Поле данных FSM.
+    :param label: Подпись ответа в сводке сообщения.
+    :param prompt: Вопрос шага.
+    :param codec: Варианты ответа.
+    :param buttons: Тексты кнопок, если отличаются от вариантов codec (по умолчанию — сами варианты).
+    :param normalize: Приведение введенного текстом ответа перед поиском в codec (например, str.lower).
+    """
+    state: State
+    field: str
+    label: str
+    prompt: str
+    codec: OptionCodec
+    buttons: tuple[str, ...] = ()
+    normalize: Callable[[str], str] | None = None
+
+    def parse(self, text: str) -> int | None:
+        text = self.normalize(text) if self.normalize else text
+        return self.codec.encode(text) if text in self.codec else None
+
+    def show(self, value: Any) -> str:
+        option = self.codec.decode(value)
+        return self.buttons[self.codec.options.index(option)] if self.buttons else option
+
+    def reply_keyboard(self) -> ReplyKeyboardMarkup:
+        """Те же варианты обычной клавиатурой — для сценария с обычной клавиатурой (WIZARD_MODE=reply)."""
+        labels = self.buttons or self.codec.options
+        return ReplyKeyboardMarkup(keyboard=[[KeyboardButton(text=label)] for label in labels],
+                                   input_field_placeholder='Выберите ответ', resize_keyboard=True,
+                                   one_time_keyboard=True)
+
+
+@dataclass(frozen=True)
+class Number:
+    """
+    Шаг с вводом значения текстом. В данные FSM пишется текст сообщения, как в обычном режиме.
+
+    :param check: Проверка ввода: None — значение некорректно.
+    :param error: Текст ошибки при некорректном вводе.
+    """
+    state: State
+    field: str
+    label: str
+    prompt: str
+    check: Callable[[str], Any]
+    error: str
+
+    def parse(self, text: str) -> str | None:
+        return None if self.check(text) is None else text
+
+    def show(self, value: Any) -> str:
+        return str(value)
+
+
+Step = Choice | Number
+
+
+class InlineWizard:
+    """
+    Сценарий в одном сообщении: вопросы задаются правкой одного сообщения бота (editMessageText),
+    варианты ответа — inline-кнопками с компактной callback_data (WizardCallback). Над вопросом
+    сообщение показывает уже полученные ответы, последний шаг заменяет вопрос результатом и меню.
+
+    Состояния и поля данных FSM — те же, что у сценария с обычной клавиатурой, поэтому сроки жизни
+    сессий (SessionRegistry) и метрики переходов общие для обоих режимов. Дополнительно в данных хранится
+    id сообщения сценария: шаг с вводом текста приходит сообщением пользователя и без него не знает,
+    какое сообщение править. Ответ на устаревшую кнопку (шаг уже пройден или сценарий завершен)
+    не меняет сессию. Ответ на шаг с кнопками можно и ввести текстом варианта.
+
+    :param name: Имя сценария: команда /name, callback_data '/name' кнопки меню и префикс кнопок ответа.
+    :param title: Заголовок сообщения сценария.
+    :param steps: Шаги по порядку.
+    :param result: Текст результата (HTML) по всем данным сценария.
+    :param menu: Клавиатура под результатом.
+    """
+
+    def __init__(self, name: str, title: str, steps: list[Step], result: Callable[[dict[str, Any]], str],
+                 menu: Callable[[], InlineKeyboardMarkup]):
+        self.name = name
+        self.title = title
+        self.steps = steps
+        self.result = result
+        self.menu = menu
+        self._index = {step.state.state: index for index, step in enumerate(steps)}
+        self._keyboards = [self._keyboard(index, step) for index, step in enumerate(steps)]
+
+        self.router = Router(name=f'{name}_inline_router')
+        self.router.message(Command(name))(self.start_command)
+        self.router.callback_query(F.data == f'/{name}')(self.start_callback)
+        self.router.callback_query(WizardCallback.filter(F.wizard == name))(self.answer_button)
+        self.router.message(F.text, StateFilter(*(step.state for step in steps)))(self.answer_text)
+
+    def _keyboard(self, index: int, step: Step) -> InlineKeyboardMarkup | None:
+        if isinstance(step, Number):
+            return None
+        labels = step.buttons or step.codec.options
+        return InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text=label,
+                                  callback_data=WizardCallback(wizard=self.name, step=index, code=code).pack())]
+            for code, label in enumerate(labels)])
+
+    def render(self, data: dict[str, Any], index: int | None, error: str | None = None) -> str:
+        """Текст сообщения: заголовок, полученные ответы и вопрос шага index (None — сценарий завершен)."""
+        lines = [f'<b>{html.escape(self.title)}</b>']
+        lines += [f'{step.label}: {html.escape(step.show(data[step.field]))}'
+                  for step in self.steps if step.field in data]
+        if error:
+            lines.append(f'\n<b>{error}</b>')
+        if index is not None:
+            lines.append(f'\n{self.steps[index].prompt}')
+        return '\n'.join(lines)
+
+    async def _edit(self, bot: Bot, chat_id: int, message_id: int | None, text: str,
+                    reply_markup: InlineKeyboardMarkup | None) -> int:
+        """
+        Правит сообщение сценария. Если его нет (сессия начата с обычной клавиатурой) или его уже нельзя
+        править (удалено), отправляет новое. Возвращает id сообщения сценария.
+        """
+        if message_id is not None:
+            try:
+                await bot.edit_message_text(text, chat_id=chat_id, message_id=message_id, reply_markup=reply_markup)
+                return message_id
+            except TelegramBadRequest as error:
+                if 'message is not modified' in error.message:
+                    return message_id
+        message = await bot.send_message(chat_id, text, reply_markup=reply_markup)
+        return message.message_id
+
+    async def _start(self, message: types.Message, state: FSMContext) -> None:
+        sent = await message.answer(self.render({}, 0), reply_markup=self._keyboards[0])
+        await restart_state(state, self.steps[0].state, **{MESSAGE_FIELD: sent.message_id})
+
+    async def open(self, message: types.Message, state: FSMContext, data: dict[str, Any],
+                   inline: bool = True) -> None:
+        """
+        Открывает сценарий с уже известными ответами data (например, из ссылки на бота, app/wizard/links.py):
+        задает первый вопрос без ответа или, если известны все ответы, сразу отправляет результат с меню.
+
+        :param inline: True — вопрос в сообщении сценария с inline-кнопками; False — вопрос с обычной
+            клавиатурой, дальше сценарий ведут обработчики обычного режима (состояния и поля данных те же).
+        """
+        index = next((index for index, step in enumerate(self.steps) if step.field not in data), None)
+        if index is None:
+            await finish_state(state)
+            await message.answer(self.render(data, None) + f'\n\n{self.result(data)}', reply_markup=self.menu())
+            return
+
+        step = self.steps[index]
+        if inline:
+            sent = await message.answer(self.render(data, index), reply_markup=self._keyboards[index])
+            await restart_state(state, step.state, **data, **{MESSAGE_FIELD: sent.message_id})
+            return
+        await restart_state(state, step.state, **data)
+        await message.answer(self.render(data, index),
+                             reply_markup=step.reply_keyboard() if isinstance(step, Choice) else None)
+
+    async def start_command(self, message: types.Message, state: FSMContext):
+        """Команда /name: новое сообщение сценария с первым вопросом."""
+        await self._start(message, state)
+
+    async def start_callback(self, callback: CallbackQuery, state: FSMContext):
+        """Кнопка меню '/name': новое сообщение сценария (меню, из которого начат сценарий, остается)."""
+        await callback.answer(self.title)
+        await self._start(callback.message, state)
+
+    async def _answer(self, bot: Bot, chat_id: int, message_id: int | None, state: FSMContext,
+                      data: dict[str, Any], index: int, value: Any) -> None:
+        """Сохраняет ответ шага index и правит сообщение: следующий вопрос или результат с меню."""
+        step = self.steps[index]
+        if index + 1 == len(self.steps):
+            data = await finish_state(state, **{step.field: value})
+            text = self.render(data, None) + f'\n\n{self.result(data)}'
+            await self._edit(bot, chat_id, message_id, text, self.menu())
+            return
+
+        data[step.field] = value
+        next_step = self.steps[index + 1]
+        await advance_state(state, next_step.state, **{step.field: value})
+        sent_id = await self._edit(bot, chat_id, message_id, self.render(data, index + 1), self._keyboards[index + 1])
+        if sent_id != message_id:
+            await advance_state(state, next_step.state, **{MESSAGE_FIELD: sent_id})
+
+    async def answer_button(self, callback: CallbackQuery, callback_data: WizardCallback, state: FSMContext,
+                            raw_state: str | None):
+        """Нажатие на вариант ответа."""
+        index = callback_data.step
+        step = self.steps[index] if index < len(self.steps) else None
+        if self._index.get(raw_state) != index or not isinstance(step, Choice) \
+                or not 0 <= callback_data.code < len(step.codec.options):
+            await callback.answer('Этот вопрос уже пройден')
+            return
+
+        await callback.answer()
+        await self._answer(callback.bot, callback.message.chat.id, callback.message.message_id, state,
+                           await state.get_data(), index, callback_data.code)
+
+    async def answer_text(self, message: types.Message, state: FSMContext, raw_state: str | None):
+        """Ответ текстом: значение для шага с вводом или текст варианта для шага с кнопками."""
+        index = self._index[raw_state]
+        step = self.steps[index]
+        data = await state.get_data()
+        message_id = data.get(MESSAGE_FIELD)
+        value = step.parse(message.text)
+        if value is not None:
+            await self._answer(message.bot, message.chat.id, message_id, state, data, index, value)
+            return
+
+        error = step.error if isinstance(step, Number) else 'Выберите корректное значение из предложенного!'
+        sent_id = await self._edit(message.bot, message.chat.id, message_id, self.render(data, index, error),
+                                   self._keyboards[index])
+        if sent_id != message_id:
+            await advance_state(state, step.state, **{MESSAGE_FIELD: sent_id})
@@ -0,0 +1,70 @@
+# Ссылки на бота с известными ответами сценария: t.me/<бот>?start=<payload> с интранет-страниц больницы.
+from functools import lru_cache
+from typing import Any
+
+from aiogram.utils.deep_linking import decode_payload, encode_payload
+
+from app.wizard.inline import Choice, InlineWizard
+
+# Telegram принимает в параметре start не больше 64 символов.
+MAX_PAYLOAD = 64
+
+SEPARATOR = ','
+
+
+class WizardLinks:
+    """
+    Параметр start ссылки на бота, который открывает сценарий с уже известными ответами (InlineWizard.open):
+    бот сразу задает первый вопрос без ответа, а если известны все ответы — отправляет результат.
+
+    payload — base64url (aiogram.utils.deep_linking) строки '<сценарий>,<ответ 1>,<ответ 2>,...' по порядку
+    шагов: для шага с кнопками — номер варианта, для шага с вводом — значение; пустое значение — ответа нет,
+    ответы после последнего известного не пишутся. Например, 'sofa,80,0.4,0,1' — SOFA с известными PaO₂,
+    FiO₂, респираторной поддержкой и тромбоцитами. Некорректный ответ считается неизвестным.
+
+    По ссылкам с одних и тех же страниц приходят одни и те же payload, поэтому разбор кэшируется
+    (cache_size последних payload).
+
+    :param wizards: Сценарии, которые можно открыть ссылкой (по именам InlineWizard.name).
+    :param cache_size: Размер кэша разбора payload.
+    """
+
+    def __init__(self, *wizards: InlineWizard, cache_size: int = 256):
+        self.wizards = {wizard.name: wizard for wizard in wizards}
+        self.decode = lru_cache(maxsize=cache_size)(self._decode)
+
+    def payload(self, name: str, **data: Any) -> str:
+        """
+        payload ссылки на сценарий name с ответами data в том виде, в каком их хранит сценарий
+        (номера вариантов и введенные значения), например links.payload('skf', gender=0, age='67').
+
+        :raises ValueError: payload длиннее 64 символов.
+        """
+        wizard = self.wizards[name]
+        values = [str(data.get(step.field, '')) for step in wizard.steps]
+        while values and not values[-1]:
+            values.pop()
+        payload = encode_payload(SEPARATOR.join([name, *values]))
+        if len(payload) > MAX_PAYLOAD:
+            raise ValueError(f'payload длиннее {MAX_PAYLOAD} символов: {payload}')
+        return payload
+
+    def _decode(self, payload: str) -> tuple[InlineWizard, tuple[tuple[str, Any], ...]] | None:
+        """Сценарий и известные ответы (поле, значение) по payload; None — payload не ссылка на сценарий."""
+        try:
+            name, *values = decode_payload(payload).split(SEPARATOR)
+        except ValueError:
+            return None
+        wizard = self.wizards.get(name)
+        if wizard is None or len(values) > len(wizard.steps):
+            return None
+
+        answers = []
+        for step, value in zip(wizard.steps, values):
+            if isinstance(step, Choice):
+                answer = int(value) if value.isdecimal() and int(value) < len(step.codec.options) else None
+            else:
+                answer = step.parse(value) if value else None
+            if answer is not None:
+                answers.append((step.field, answer))
+        return wizard, tuple(answers)
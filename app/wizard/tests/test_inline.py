@@ -0,0 +1,144 @@
+import unittest
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.filters import CommandStart
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import InlineKeyboardMarkup, Update
+
+from app.storage.codec import OptionCodec
+from app.testing.fake_telegram import FakeTelegramServer, make_callback_update, make_message_update
+from app.wizard.inline import Choice, InlineWizard, Number, WizardCallback
+
+TOKEN = '42:TEST-token'
+CHAT = 100
+
+
+class Reg(StatesGroup):
+    dose = State()
+    route = State()
+
+
+ROUTE = OptionCodec('< 5 мг', 'внутривенно')
+
+
+def make_wizard() -> InlineWizard:
+    return InlineWizard('dose', 'Доза', [
+        Number(Reg.dose, 'dose', 'Доза', 'Введите дозу:', lambda text: text if text.isdigit() else None,
+               'Введите число!'),
+        Choice(Reg.route, 'route', 'Путь', 'Выберите путь введения:', ROUTE),
+    ], result=lambda data: f'<b>{data["dose"]} {ROUTE.decode(data["route"])}</b>',
+        menu=lambda: InlineKeyboardMarkup(inline_keyboard=[]))
+
+
+class TestInlineWizard(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.telegram = FakeTelegramServer()
+        await self.telegram.start()
+        self.addAsyncCleanup(self.telegram.close)
+        self.bot = Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(self.telegram.url)))
+        self.addAsyncCleanup(self.bot.session.close)
+
+        self.wizard = make_wizard()
+        self.dp = Dispatcher()
+        self.dp.include_router(self.wizard.router)
+        self.key = StorageKey(bot_id=42, chat_id=CHAT, user_id=CHAT)
+        self._update_ids = iter(range(1, 1000))
+
+    async def feed(self, update: str | dict) -> None:
+        if isinstance(update, str):
+            update = make_message_update(CHAT, update)
+        await self.dp.feed_update(self.bot, Update.model_validate({'update_id': next(self._update_ids), **update},
+                                                                  context={'bot': self.bot}))
+
+    def methods(self) -> list[str]:
+        return [call.method for call in self.telegram.calls]
+
+    def button(self, step: int, code: int) -> dict:
+        return make_callback_update(CHAT, WizardCallback(wizard='dose', step=step, code=code).pack())
+
+    async def test_one_message_per_session(self):
+        await self.feed('/dose')
+        await self.feed('abc')
+        await self.feed('10')
+        await self.feed(self.button(1, 0))
+
+        self.assertEqual(self.methods(), ['sendMessage', 'editMessageText', 'editMessageText',
+                                          'answerCallbackQuery', 'editMessageText'])
+        error, question, result = (call.params['text'] for call in self.telegram.calls_of('editMessageText'))
+        self.assertIn('<b>Введите число!</b>', error)
+        self.assertIn('Доза: 10\n', question)
+        self.assertTrue(question.endswith('Выберите путь введения:'))
+        # Текст варианта экранируется, результат — HTML как есть.
+        self.assertIn('Путь: &lt; 5 мг', result)
+        self.assertTrue(result.endswith('<b>10 < 5 мг</b>'))
+        self.assertIsNone(await self.dp.storage.get_state(self.key))
+
+    async def test_stale_button(self):
+        await self.feed('/dose')
+        await self.feed(self.button(1, 0))
+
+        self.assertEqual(self.methods(), ['sendMessage', 'answerCallbackQuery'])
+        self.assertEqual(self.telegram.calls[-1].params['text'], 'Этот вопрос уже пройден')
+        self.assertEqual(await self.dp.storage.get_state(self.key), Reg.dose.state)
+
+    async def test_choice_typed_as_text(self):
+        await self.feed('/dose')
+        await self.feed('5')
+        await self.feed('внутривенно')
+
+        self.assertEqual(self.methods(), ['sendMessage', 'editMessageText', 'editMessageText'])
+        self.assertTrue(self.telegram.calls[-1].params['text'].endswith('<b>5 внутривенно</b>'))
+
+    async def test_session_without_message(self):
+        # Сессия начата с обычной клавиатурой: сообщения сценария еще нет, шаг отправляет новое.
+        await self.dp.storage.set_state(self.key, Reg.dose)
+        await self.feed('7')
+
+        self.assertEqual(self.methods(), ['sendMessage'])
+        data = await self.dp.storage.get_data(self.key)
+        self.assertEqual((data['dose'], data['message_id']), ('7', 1))
+
+    def open_with(self, data: dict, inline: bool = True) -> None:
+        router = Router()
+
+        @router.message(CommandStart())
+        async def start(message, state):
+            await self.wizard.open(message, state, data, inline)
+
+        self.dp.include_router(router)
+
+    async def test_open_with_known_answers(self):
+        self.open_with({'dose': '10'})
+        await self.feed('/start link')
+        await self.feed(self.button(1, 1))
+
+        self.assertEqual(self.methods(), ['sendMessage', 'answerCallbackQuery', 'editMessageText'])
+        self.assertIn('Доза: 10\n', self.telegram.calls[0].params['text'])
+        self.assertTrue(self.telegram.calls[-1].params['text'].endswith('<b>10 внутривенно</b>'))
+
+    async def test_open_with_reply_keyboard(self):
+        self.open_with({'dose': '10'}, inline=False)
+        await self.feed('/start link')
+
+        self.assertEqual(self.methods(), ['sendMessage'])
+        self.assertIn('keyboard', self.telegram.calls[0].params['reply_markup'])
+        self.assertEqual(await self.dp.storage.get_state(self.key), Reg.route.state)
+        self.assertEqual(await self.dp.storage.get_data(self.key), {'dose': '10'})
+
+    async def test_open_with_all_answers(self):
+        self.open_with({'dose': '10', 'route': 0})
+        await self.dp.storage.set_data(self.key, {'dose': '3'})
+        await self.feed('/start link')
+
+        self.assertEqual(self.methods(), ['sendMessage'])
+        self.assertTrue(self.telegram.calls[0].params['text'].endswith('<b>10 < 5 мг</b>'))
+        self.assertIsNone(await self.dp.storage.get_state(self.key))
+        self.assertEqual(await self.dp.storage.get_data(self.key), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from aiogram.utils.deep_linking import encode_payload
+
+from app.skf.handlers.inline_skf import skf_wizard
+from app.wizard.links import WizardLinks
+from app.wizard.tests.test_inline import make_wizard
+
+
+class TestWizardLinks(unittest.TestCase):
+
+    def setUp(self):
+        self.wizard = make_wizard()
+        self.links = WizardLinks(self.wizard)
+
+    def test_round_trip(self):
+        payload = self.links.payload('dose', dose='10', route=1)
+        self.assertRegex(payload, r'^[A-Za-z0-9_-]+$')
+        self.assertEqual(self.links.decode(payload), (self.wizard, (('dose', '10'), ('route', 1))))
+
+    def test_unknown_answers(self):
+        # Неизвестные ответы в конце не пишутся, в середине — пустые.
+        self.assertEqual(self.links.payload('dose', dose='10'), encode_payload('dose,10'))
+        self.assertEqual(self.links.decode(self.links.payload('dose', route=0)), (self.wizard, (('route', 0),)))
+
+    def test_invalid_answers_are_unknown(self):
+        self.assertEqual(self.links.decode(encode_payload('dose,abc,7')), (self.wizard, ()))
+
+    def test_malformed_answers_are_unknown(self):
+        # '²'.isdigit() — истина, но int('²') — ValueError.
+        for value in ('²', '-1', '1.5', '99'):
+            with self.subTest(value=value):
+                self.assertEqual(self.links.decode(encode_payload(f'dose,,{value}')), (self.wizard, ()))
+
+    def test_zero_creatinine_is_unknown(self):
+        # Креатинин 0 считается неизвестным: иначе ссылка открыла бы сценарий сразу с расчетом,
+        # а calc_skf на нуле делит на ноль.
+        links = WizardLinks(skf_wizard)
+        self.assertEqual(links.decode(encode_payload('skf,0,67,0')), (skf_wizard, (('gender', 0), ('age', '67'))))
+
+    def test_not_a_wizard_link(self):
+        for payload in ('ref42', encode_payload('other,1'), encode_payload('dose,1,0,0'), '%%%'):
+            with self.subTest(payload=payload):
+                self.assertIsNone(self.links.decode(payload))
+
+    def test_too_long(self):
+        with self.assertRaises(ValueError):
+            self.links.payload('dose', dose='1' * 50)
+
+    def test_decode_is_cached(self):
+        payload = self.links.payload('dose', dose='10')
+        self.links.decode(payload)
+        self.links.decode(payload)
+        self.assertEqual(self.links.decode.cache_info().hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
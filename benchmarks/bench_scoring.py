@@ -0,0 +1,281 @@
+"""
+Микробенчмарки функций расчета баллов и проверки ответов (SOFA, СКФ, риск анестезии, фенотип донора).
+
+Каждая функция вызывается на потоке входных данных, похожем на реальные ответы пользователей:
+ответы с клавиатуры с перекосом в сторону легких вариантов, небольшая доля свободного текста
+в проверках, числа из клинически правдоподобных диапазонов. Поток одинаков при каждом запуске (seed).
+
+Функции с lru_cache измеряются в двух режимах:
+    cold — кэш очищается перед каждым вызовом (время очистки вычитается);
+    warm — кэш сохраняется между вызовами, как в работающем боте.
+Функции без кэша измеряются только в режиме warm. Результат — наименьшее из repeat измерений, нс/вызов.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_scoring                  # сравнение с baselines/scoring.json
+    python -m benchmarks.bench_scoring --save           # записать текущие результаты как базовые
+    python -m benchmarks.bench_scoring --threshold 0.5 --filter sofa
+
+Базовые значения зависят от машины, поэтому в репозиторий не входят (.gitignore): первый запуск
+записывает их, следующие сравнивают с ними. Код возврата 1, если хотя бы одна функция медленнее
+базового значения больше чем на threshold (доля). Базовые значения, записанные на другой машине
+или другой версии Python, только выводятся для сведения и не проверяются: их нужно записать заново
+(--save).
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from app.anesthetic_risk.handlers.check_correct_values import (check_correct_valuesPatient,
+                                                               check_correct_valuesOperation,
+                                                               check_correct_valuesCharacter)
+from app.anesthetic_risk.handlers.execution_logic import (get_operate_patient, get_operate_operation,
+                                                          get_operate_character)
+from app.anesthetic_risk.handlers.result import print_result
+from app.anesthetic_risk.keyboards.keyboard_hypotension import hypotension_codec
+from app.anesthetic_risk.keyboards.keyboard_operation import operation_codec
+from app.anesthetic_risk.keyboards.keyboard_patient import patient_codec
+from app.anesthetic_risk.keyboards.keyboards_character import character_codec
+from app.blood_donor.handlers.check_correct import СheckСorrectPhenotype, RESIPIENT
+from app.skf.handlers.calc_GenAgeCreatinin import calc_skf
+from app.skf.keyboards.reply_kb_skf import gender_codec
+from app.sofa.handlers.calc_EyeVerbalMotor import (calculation_Eye_response, calculation_Verbal_response,
+                                                   calculation_Motor_response, final_calculation_EyeVerbalMotor)
+from app.sofa.handlers.calc_PaoFio import calculation_PaoFio
+from app.sofa.handlers.calc_hypotension import calculate_hypotension
+from app.sofa.handlers.calc_kidney import calculation_creatinin
+from app.sofa.handlers.calc_liver import calculation_liver
+from app.sofa.handlers.calc_platelet import calculation_platelet
+from app.sofa.handlers.calc_respiratory import calculation_respiratory
+from app.sofa.handlers.check_Correct_values import (check_correct_values_FioPao, check_correct_kb_respiratory,
+                                                    check_correct_kb_platelet, check_correct_kb_liver,
+                                                    check_correct_kb_creatinin, check_correct_kb_hypotension,
+                                                    check_correct_kb_eye, check_correct_kb_verbal,
+                                                    check_correct_kb_motor)
+from app.sofa.handlers.result_calculating_functions import total_result_functions
+from app.sofa.keyboards.kb_creatinin import creatinin_codec
+from app.sofa.keyboards.kb_eye import eye_codec
+from app.sofa.keyboards.kb_liver import liver_codec
+from app.sofa.keyboards.kb_motor import motor_codec
+from app.sofa.keyboards.kb_platelet import platelet_codec
+from app.sofa.keyboards.kb_respiratory import respiratory_codec
+from app.sofa.keyboards.kb_verbal import verbal_codec
+from app.storage.codec import OptionCodec
+
+BASELINE = Path(__file__).parent / 'baselines' / 'scoring.json'
+SEED = 20240917
+STREAM = 1000  # входных значений в потоке
+FREE_TEXT = ('привет', 'да', '100', '/start', 'не знаю', '')  # ответы мимо клавиатуры
+
+
+@dataclass
+class Case:
+    """Измеряемая функция и поток ее аргументов."""
+    name: str
+    func: Callable
+    inputs: list[tuple]
+
+    @property
+    def cached(self) -> bool:
+        return hasattr(self.func, 'cache_clear')
+
+
+def answers(rng: random.Random, codec: OptionCodec, count: int = STREAM) -> list[str]:
+    """Ответы с клавиатуры: первые (легкие) варианты выбираются чаще последних."""
+    weights = [len(codec.options) - index for index in range(len(codec.options))]
+    return rng.choices(codec.options, weights=weights, k=count)
+
+
+def typed(rng: random.Random, valid: list[str], share: float = 0.1) -> list[str]:
+    """Поток ответов для проверки: доля share — свободный текст вместо кнопки."""
+    return [rng.choice(FREE_TEXT) if rng.random() < share else value for value in valid]
+
+
+def clamp(value: float, low: int, high: int) -> int:
+    return int(min(max(value, low), high))
+
+
+def make_cases(seed: int = SEED) -> list[Case]:
+    rng = random.Random(seed)
+
+    pao2 = [str(clamp(rng.gauss(90, 25), 40, 500)) for _ in range(STREAM)]
+    fio2 = [str(rng.choice((21, 30, 40, 50, 60, 80, 100))) for _ in range(STREAM)]
+    eye, verbal, motor = answers(rng, eye_codec), answers(rng, verbal_codec), answers(rng, motor_codec)
+    sofa_points = [tuple(rng.choices(range(5), weights=(8, 5, 3, 2, 1), k=6)) + (rng.randint(0, 4),)
+                   for _ in range(STREAM)]
+
+    genders = answers(rng, gender_codec)
+    ages = [str(clamp(rng.gauss(60, 15), 18, 95)) for _ in range(STREAM)]
+    creatinins = [str(clamp(rng.lognormvariate(4.5, 0.5), 30, 900)) for _ in range(STREAM)]
+
+    patient, operation, character = (answers(rng, patient_codec), answers(rng, operation_codec),
+                                     answers(rng, character_codec))
+    phenotypes = rng.choices(RESIPIENT, k=STREAM)
+
+    def single(values: list[Any]) -> list[tuple]:
+        return [(value,) for value in values]
+
+    return [
+        # SOFA
+        Case('calculation_PaoFio', calculation_PaoFio, list(zip(pao2, fio2))),
+        Case('calculation_respiratory', calculation_respiratory, single(answers(rng, respiratory_codec))),
+        Case('calculation_platelet', calculation_platelet, single(answers(rng, platelet_codec))),
+        Case('calculation_liver', calculation_liver, single(answers(rng, liver_codec))),
+        Case('calculation_creatinin', calculation_creatinin, single(answers(rng, creatinin_codec))),
+        Case('calculate_hypotension', calculate_hypotension, single(answers(rng, hypotension_codec))),
+        Case('final_calculation_EyeVerbalMotor', final_calculation_EyeVerbalMotor,
+             [(calculation_Eye_response(e), calculation_Verbal_response(v), calculation_Motor_response(m))
+              for e, v, m in zip(eye, verbal, motor)]),
+        Case('total_result_functions', total_result_functions, sofa_points),
+        Case('check_correct_values_FioPao', check_correct_values_FioPao, single(typed(rng, pao2))),
+        Case('check_correct_kb_respiratory', check_correct_kb_respiratory,
+             single(typed(rng, answers(rng, respiratory_codec)))),
+        Case('check_correct_kb_platelet', check_correct_kb_platelet, single(typed(rng, answers(rng, platelet_codec)))),
+        Case('check_correct_kb_liver', check_correct_kb_liver, single(typed(rng, answers(rng, liver_codec)))),
+        Case('check_correct_kb_creatinin', check_correct_kb_creatinin,
+             single(typed(rng, answers(rng, creatinin_codec)))),
+        Case('check_correct_kb_hypotension', check_correct_kb_hypotension,
+             single(typed(rng, answers(rng, hypotension_codec)))),
+        Case('check_correct_kb_eye', check_correct_kb_eye, single(typed(rng, eye))),
+        Case('check_correct_kb_verbal', check_correct_kb_verbal, single(typed(rng, verbal))),
+        Case('check_correct_kb_motor', check_correct_kb_motor, single(typed(rng, motor))),
+        # СКФ
+        Case('calc_skf', calc_skf, list(zip(genders, ages, creatinins))),
+        # Риск анестезии
+        Case('print_result', print_result,
+             [(get_operate_patient(p.lower()), get_operate_operation(o.lower()), get_operate_character(c.lower()))
+              for p, o, c in zip(patient, operation, character)]),
+        Case('check_correct_valuesPatient', check_correct_valuesPatient, single(typed(rng, patient))),
+        Case('check_correct_valuesOperation', check_correct_valuesOperation, single(typed(rng, operation))),
+        Case('check_correct_valuesCharacter', check_correct_valuesCharacter, single(typed(rng, character))),
+        # Донор
+        Case('check_correct_phenotype', СheckСorrectPhenotype, single(typed(rng, phenotypes))),
+    ]
+
+
+def run_warm(case: Case, passes: int) -> float:
+    """Секунд на проход потока, кэш функции сохраняется между вызовами."""
+    func, inputs = case.func, case.inputs
+    started = time.perf_counter()
+    for _ in range(passes):
+        for args in inputs:
+            func(*args)
+    return (time.perf_counter() - started) / passes
+
+
+def run_cold(case: Case, passes: int) -> float:
+    """Секунд на проход потока с очисткой кэша перед каждым вызовом, без времени самой очистки."""
+    func, inputs, clear = case.func, case.inputs, case.func.cache_clear
+    started = time.perf_counter()
+    for _ in range(passes):
+        for args in inputs:
+            clear()
+            func(*args)
+    elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(passes):
+        for _args in inputs:
+            clear()
+    overhead = time.perf_counter() - started
+    return max(elapsed - overhead, 0.0) / passes
+
+
+def measure(case: Case, repeat: int = 5, passes: int = 10) -> dict[str, float]:
+    """Наименьшее из repeat измерений в наносекундах на вызов для каждого режима (сборщик мусора отключен)."""
+    modes = {'warm': run_warm}
+    if case.cached:
+        modes['cold'] = run_cold
+
+    result = {}
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for mode, run in modes.items():
+            if case.cached:
+                case.func.cache_clear()
+            run(case, 1)  # прогрев
+            best = min(run(case, passes) for _ in range(repeat))
+            result[mode] = round(best / len(case.inputs) * 1e9, 1)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return result
+
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]],
+            threshold: float) -> list[str]:
+    """Функции и режимы, ставшие медленнее базовых больше чем на threshold."""
+    regressions = []
+    for name, modes in results.items():
+        for mode, value in modes.items():
+            base = baseline.get(name, {}).get(mode)
+            if base and value > base * (1 + threshold):
+                regressions.append(f'{name} ({mode}): {base:.0f} -> {value:.0f} нс, {value / base - 1:+.0%}')
+    return regressions
+
+
+def environment() -> dict[str, str]:
+    """Машина и версия Python, на которых записаны базовые значения."""
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'node': platform.node()}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--save', action='store_true', help='записать результаты как базовые')
+    parser.add_argument('--threshold', type=float, default=0.25, help='допустимое замедление, доля (0.25 = 25%%)')
+    parser.add_argument('--filter', default='', help='измерять только функции, в имени которых есть подстрока')
+    parser.add_argument('--baseline', type=Path, default=BASELINE, help='файл базовых значений')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    baseline = stored.get('cases', {})
+
+    cases = {case.name: case for case in make_cases() if args.filter in case.name}
+    results = {}
+    print(f'{"функция":<34} {"cold, нс":>10} {"warm, нс":>10} {"база warm":>10}')
+    for case in cases.values():
+        results[case.name] = measure(case, repeat=args.repeat)
+        cold = results[case.name].get('cold')
+        base = baseline.get(case.name, {}).get('warm')
+        print(f'{case.name:<34} {"—" if cold is None else f"{cold:.0f}":>10} {results[case.name]["warm"]:>10.0f} '
+              f'{"—" if base is None else f"{base:.0f}":>10}')
+
+    current = environment()
+    if args.save or not baseline:
+        stored = {**current, 'cases': {**baseline, **results} if args.save else results}
+        args.baseline.parent.mkdir(exist_ok=True)
+        args.baseline.write_text(json.dumps(stored, ensure_ascii=False, indent=2, sort_keys=True) + '\n')
+        note = '' if args.save else ', следующий запуск сравнит с ними'
+        print(f'\nБазовые значения записаны в {args.baseline}{note}')
+        return 0
+
+    recorded = {key: stored.get(key) for key in current}
+    if recorded != current:
+        print(f'\nБазовые значения записаны в другом окружении ({recorded}, сейчас {current}) '
+              f'и не проверяются; запишите их заново: --save')
+        return 0
+
+    # Замедление перепроверяется повторным замером: единичный выброс (шум машины) не считается.
+    for name in {line.split(' ')[0] for line in compare(results, baseline, args.threshold)}:
+        again = measure(cases[name], repeat=args.repeat)
+        results[name] = {mode: min(value, again[mode]) for mode, value in results[name].items()}
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f'\nЗамедление больше {args.threshold:.0%}:')
+        print('\n'.join(regressions))
+        return 1
+    print(f'\nЗамедлений больше {args.threshold:.0%} нет')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Сравнение размера данных FSM открытых сессий: текст кнопок против номеров кнопок (OptionCodec).
+
+Сессия берется на последнем шаге сценария, когда в ней сохранены все ответы, кроме последнего.
+Варианты ответов перебираются по кругу, поэтому результат — средний размер по всем вариантам.
+
+Запуск из корня проекта:
+    python -m benchmarks.fsm_payload_size
+    python -m benchmarks.fsm_payload_size --redis redis://localhost:6379/15   # замер used_memory в Redis
+
+С --redis в указанную базу записываются сессии (по умолчанию 100 000 на вариант) через HashRedisStorage,
+прирост INFO used_memory пересчитывается на 100k сессий; база очищается (FLUSHDB) до и после замера.
+"""
+import argparse
+import asyncio
+import time
+
+from app.anesthetic_risk.keyboards.keyboard_hypotension import hypotension_codec
+from app.anesthetic_risk.keyboards.keyboard_operation import operation_codec
+from app.anesthetic_risk.keyboards.keyboard_patient import patient_codec
+from app.skf.keyboards.reply_kb_skf import gender_codec
+from app.sofa.keyboards.kb_creatinin import creatinin_codec
+from app.sofa.keyboards.kb_eye import eye_codec
+from app.sofa.keyboards.kb_liver import liver_codec
+from app.sofa.keyboards.kb_platelet import platelet_codec
+from app.sofa.keyboards.kb_respiratory import respiratory_codec
+from app.sofa.keyboards.kb_verbal import verbal_codec
+from app.storage.redis_hash import STATE_FIELD, dump_value
+
+SESSIONS = 100_000
+
+# Сценарий: состояние на последнем шаге и поля, заполненные к этому моменту (строка — свободный ввод числа).
+WIZARDS = {
+    'sofa': ('Reg:motor_response', {
+        'pao2': '80', 'fio2': '0.4', 'respiratory': respiratory_codec, 'platelet': platelet_codec,
+        'liver': liver_codec, 'creatinin_kidney': creatinin_codec, 'hypotension': hypotension_codec,
+        'eye_response': eye_codec, 'verbal_response': verbal_codec,
+    }),
+    'anesthetic_risk': ('Reg:character', {'patient': patient_codec, 'operation': operation_codec}),
+    'skf': ('Reg:creatinin', {'gender': gender_codec, 'age': '45'}),
+}
+
+
+def session(fields: dict, number: int, encoded: bool) -> dict:
+    """Данные сессии номер number: ответ с клавиатуры — текст (как раньше) или номер кнопки."""
+    data = {}
+    for field, source in fields.items():
+        if isinstance(source, str):
+            data[field] = source
+        else:
+            code = number % len(source.options)
+            data[field] = code if encoded else source.options[code]
+    return data
+
+
+def payload_size(state: str, data: dict) -> int:
+    """Байты полей и значений хэша сессии (так, как их записывает HashRedisStorage)."""
+    size = len(STATE_FIELD) + len(state.encode())
+    for field, value in data.items():
+        size += len(field.encode()) + len(dump_value(value).encode())
+    return size
+
+
+def measure_payload(name: str, encoded: bool) -> tuple[float, float]:
+    """Средний размер сессии в байтах и время сериализации 100k сессий в секундах."""
+    state, fields = WIZARDS[name]
+    sessions = [session(fields, number, encoded) for number in range(SESSIONS)]
+
+    started = time.perf_counter()
+    for data in sessions:
+        for value in data.values():
+            dump_value(value)
+    elapsed = time.perf_counter() - started
+
+    return sum(payload_size(state, data) for data in sessions) / SESSIONS, elapsed
+
+
+async def measure_redis(url: str, name: str, encoded: bool, count: int) -> float:
+    """Прирост used_memory Redis после записи count сессий, в пересчете на 100k сессий, байт."""
+    from aiogram.fsm.storage.base import StorageKey
+    from app.storage.redis_hash import HashRedisStorage
+
+    storage = HashRedisStorage.from_url(url)
+    state, fields = WIZARDS[name]
+    try:
+        await storage.redis.flushdb()
+        before = (await storage.redis.info('memory'))['used_memory']
+        for number in range(count):
+            key = StorageKey(bot_id=1, chat_id=number, user_id=number)
+            await storage.update_data_and_set_state(key, session(fields, number, encoded), state)
+        after = (await storage.redis.info('memory'))['used_memory']
+        await storage.redis.flushdb()
+    finally:
+        await storage.close()
+    return (after - before) * SESSIONS / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--redis', help='адрес отдельной (очищаемой!) базы Redis для замера used_memory')
+    parser.add_argument('--count', type=int, default=SESSIONS, help='сколько сессий записывать в Redis')
+    args = parser.parse_args()
+
+    print(f'Открытые сессии: {SESSIONS:,} на сценарий\n')
+    print(f'{"сценарий":<16} {"текст, МБ":>10} {"коды, МБ":>10} {"экономия":>9} '
+          f'{"json текст, с":>14} {"json коды, с":>13}')
+    for name in WIZARDS:
+        text_size, text_time = measure_payload(name, encoded=False)
+        code_size, code_time = measure_payload(name, encoded=True)
+        print(f'{name:<16} {text_size * SESSIONS / 2 ** 20:>10.1f} {code_size * SESSIONS / 2 ** 20:>10.1f} '
+              f'{1 - code_size / text_size:>9.0%} {text_time:>14.3f} {code_time:>13.3f}')
+
+    if args.redis:
+        print(f'\nRedis used_memory на {SESSIONS:,} сессий:')
+        for name in WIZARDS:
+            text = asyncio.run(measure_redis(args.redis, name, False, args.count))
+            code = asyncio.run(measure_redis(args.redis, name, True, args.count))
+            print(f'{name:<16} текст {text / 2 ** 20:>8.1f} МБ   коды {code / 2 ** 20:>8.1f} МБ   '
+                  f'экономия {1 - code / text:.0%}')
+
+
+if __name__ == '__main__':
+    main()
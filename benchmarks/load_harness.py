@@ -0,0 +1,270 @@
+"""
+Нагрузочный стенд: сколько одновременных диалогов SOFA / СКФ / донор выдерживает один процесс бота.
+
+Каждый виртуальный пользователь — отдельный чат, который проходит сценарий от команды до результата
+(ответы — как с клавиатуры бота), затем начинает следующий. Обновления подаются в dp.feed_update
+с настоящими роутерами бота; бот отправляет ответы по HTTP в локальную имитацию Bot API
+(FakeTelegramServer), сессии FSM хранятся в имитации Redis в памяти процесса (fakeredis) через ту же
+цепочку хранилищ, что в config.py. Таблица доноров берется из donor_rows.py, PostgreSQL не нужен.
+
+Задержка шага — время dp.feed_update (обработчик вместе с его запросами к Bot API). Результат:
+пропускная способность, перцентили задержки по обработчикам и по шагам сценариев, пиковый RSS.
+
+Запуск из корня проекта (нужен requirements-dev.txt):
+    python -m benchmarks.load_harness --users 50
+    python -m benchmarks.load_harness --users 10,50,100,500 --duration 20 --slo 0.25
+
+При нескольких значениях --users отчет выводится для каждого, в конце — таблица p99 и первая
+нагрузка, при которой p99 превысил --slo секунд.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import resource
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+# config.py требует настроек бота; стенду они не нужны, но модули обработчиков импортируют config.
+# По REDIS_URL config только создает клиента (соединение не открывается), сессии стенда — в fakeredis.
+os.environ.setdefault('BOT_TOKEN', '42:LOAD-harness')
+os.environ.setdefault('ADMIN_ID', '0')
+os.environ.setdefault('REDIS_URL', 'redis://localhost')
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import TelegramObject, Update
+from fakeredis import FakeAsyncRedis
+
+from app.anesthetic_risk.keyboards.keyboard_hypotension import hypotension_codec
+from app.blood_donor.database.donor_index import DonorIndex, set_donor_index
+from app.blood_donor.database.donor_rows import DONOR_ROWS
+from app.blood_donor.handlers.check_correct import RESIPIENT
+from app.server.executor import ChatOrderedExecutor
+from app.server.outbound import OutboundLimiter
+from app.skf.keyboards.reply_kb_skf import gender_codec
+from app.sofa.keyboards.kb_creatinin import creatinin_codec
+from app.sofa.keyboards.kb_eye import eye_codec
+from app.sofa.keyboards.kb_liver import liver_codec
+from app.sofa.keyboards.kb_motor import motor_codec
+from app.sofa.keyboards.kb_platelet import platelet_codec
+from app.sofa.keyboards.kb_respiratory import respiratory_codec
+from app.sofa.keyboards.kb_verbal import verbal_codec
+from app.storage.cached import CachedStorage
+from app.storage.failover import FailoverStorage
+from app.storage.redis_hash import HashRedisStorage
+from app.storage.sessions import SessionRegistry
+from app.testing.fake_telegram import FakeTelegramServer, make_message_update
+
+TOKEN = '42:LOAD-harness'
+UPDATE_IDS = itertools.count(1)
+PERCENTILES = (50, 90, 99)
+
+
+def sofa_script(rng: random.Random) -> list[str]:
+    return ['/sofa', str(rng.randint(50, 150)), str(rng.choice((21, 30, 40, 60, 100)))] + [
+        rng.choice(codec.options) for codec in (respiratory_codec, platelet_codec, liver_codec, creatinin_codec,
+                                                hypotension_codec, eye_codec, verbal_codec, motor_codec)]
+
+
+def skf_script(rng: random.Random) -> list[str]:
+    return ['/skf', rng.choice(gender_codec.options), str(rng.randint(18, 95)), str(rng.randint(40, 400))]
+
+
+def donor_script(rng: random.Random) -> list[str]:
+    return ['/donor', rng.choice(RESIPIENT)]
+
+
+# Сценарий -> функция, возвращающая сообщения пользователя от команды до результата.
+SCRIPTS: dict[str, Callable[[random.Random], list[str]]] = {
+    'sofa': sofa_script,
+    'skf': skf_script,
+    'donor': donor_script,
+}
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Перцентиль по методу ближайшего ранга (values отсортирован)."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, round(percent / 100 * len(values)) - 1))
+    return values[index]
+
+
+def rss_mb() -> float:
+    """Пиковый RSS процесса, МБ (ru_maxrss в Linux — в КБ)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@dataclass
+class Report:
+    users: int
+    duration: float = 0.0
+    updates: int = 0
+    conversations: int = 0
+    errors: int = 0
+    unhandled: int = 0  # обновления, не дошедшие до обработчика сценария (попали в echo)
+    by_handler: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    by_step: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    all: list[float] = field(default_factory=list)
+    rss_before: float = 0.0
+    rss_peak: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.updates / self.duration if self.duration else 0.0
+
+    def p(self, percent: float) -> float:
+        return percentile(sorted(self.all), percent)
+
+
+class StepTimer(BaseMiddleware):
+    """
+    Inner-middleware сообщений и нажатий кнопок: имя обработчика и состояние FSM до шага для отчета,
+    по update_id. Время шага считает сам стенд вокруг feed_update, middleware только подписывает его.
+    """
+
+    def __init__(self):
+        self.last: dict[int, tuple[str, str]] = {}
+
+    async def __call__(self, handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: dict[str, Any]) -> Any:
+        callback = data['handler'].callback
+        name = f'{callback.__module__.rsplit(".", 1)[-1]}.{callback.__name__}'
+        self.last[data['event_update'].update_id] = (name, data.get('raw_state') or 'start')
+        return await handler(event, data)
+
+    def pop(self, update_id: int) -> tuple[str, str]:
+        """Обработчик и состояние для обновления; ('echo.echo', 'start'), если обработчик не вызывался."""
+        return self.last.pop(update_id, ('echo.echo', 'start'))
+
+
+def create_dispatcher(redis: FakeAsyncRedis) -> tuple[Dispatcher, StepTimer]:
+    """Диспетчер с роутерами бота и цепочкой хранилищ FSM как в config.py, но на fakeredis."""
+    from app.inline_query.handler_inline_query import inline_calculators
+    from run import register_routers
+
+    registry = SessionRegistry(default_ttl=3600)
+    redis_storage = HashRedisStorage(redis, state_ttl=registry.ttl)
+    cached = CachedStorage(redis_storage, shared=False)
+    storage = FailoverStorage(cached, health_check=redis.ping, last_known=cached.peek)
+
+    dp = Dispatcher(storage=storage, events_isolation=ChatOrderedExecutor(limit=100))
+    register_routers(dp)
+    inline_calculators.setup(dp)  # пауза в наборе inline-запросов, как в run.main
+    timer = StepTimer()
+    dp.message.middleware(timer)
+    dp.callback_query.middleware(timer)
+    return dp, timer
+
+
+async def user(number: int, dp: Dispatcher, bot: Bot, timer: StepTimer, report: Report, deadline: float,
+               think: float, wizards: list[str], seed: int) -> None:
+    """Один виртуальный пользователь: сценарии подряд до deadline."""
+    rng = random.Random(seed * 1_000_003 + number)
+    chat_id = 1_000_000 + number
+    while time.perf_counter() < deadline:
+        wizard = rng.choice(wizards)
+        for text in SCRIPTS[wizard](rng):
+            update = Update.model_validate({'update_id': next(UPDATE_IDS), **make_message_update(chat_id, text)},
+                                           context={'bot': bot})
+            started = time.perf_counter()
+            try:
+                await dp.feed_update(bot, update)
+            except Exception:
+                report.errors += 1
+            elapsed = time.perf_counter() - started
+            report.updates += 1
+
+            handler, step = timer.pop(update.update_id)
+            if handler == 'echo.echo':
+                report.unhandled += 1
+            report.all.append(elapsed)
+            report.by_handler[handler].append(elapsed)
+            report.by_step[f'{wizard}:{step}'].append(elapsed)
+            if think:
+                await asyncio.sleep(rng.uniform(0, 2 * think))
+        report.conversations += 1
+
+
+async def run_load(user_counts: list[int], duration: float, think: float, wizards: list[str], seed: int,
+                   limit_outbound: bool) -> list[Report]:
+    """Прогоны для каждого числа пользователей по очереди; между прогонами Redis очищается."""
+    telegram = FakeTelegramServer()
+    await telegram.start()
+    session = AiohttpSession(api=TelegramAPIServer.from_base(telegram.url), limit=max(100, *user_counts))
+    if limit_outbound:
+        session.middleware(OutboundLimiter())
+    bot = Bot(TOKEN, session=session)
+    redis = FakeAsyncRedis()
+    dp, timer = create_dispatcher(redis)
+    set_donor_index(DonorIndex((recipient, compatible, indications)
+                               for _, recipient, compatible, indications in DONOR_ROWS))
+
+    reports = []
+    try:
+        for users in user_counts:
+            await redis.flushall()
+            telegram.calls.clear()
+            report = Report(users=users, rss_before=rss_mb())
+            started = time.perf_counter()
+            await asyncio.gather(*(user(number, dp, bot, timer, report, started + duration, think, wizards, seed)
+                                   for number in range(users)))
+            report.duration = time.perf_counter() - started
+            report.rss_peak = rss_mb()
+            print_report(report)
+            reports.append(report)
+    finally:
+        await dp.storage.close()
+        await bot.session.close()
+        await telegram.close()
+    return reports
+
+
+def print_report(report: Report) -> None:
+    ms = 1000
+    print(f'\n=== {report.users} пользователей, {report.duration:.1f} с ===')
+    print(f'обновлений: {report.updates}, {report.throughput:.0f}/с; диалогов: {report.conversations}; '
+          f'ошибок: {report.errors}; мимо сценария: {report.unhandled}')
+    print(f'задержка, мс: ' + ', '.join(f'p{p}={report.p(p) * ms:.1f}' for p in PERCENTILES)
+          + f', max={max(report.all, default=0) * ms:.1f}')
+    print(f'RSS: {report.rss_before:.1f} МБ до, {report.rss_peak:.1f} МБ пик')
+
+    for title, groups in (('обработчик', report.by_handler), ('шаг сценария', report.by_step)):
+        print(f'\n{title:<44} {"вызовов":>8} ' + ' '.join(f'{f"p{p}, мс":>9}' for p in PERCENTILES))
+        for name, values in sorted(groups.items()):
+            values = sorted(values)
+            print(f'{name:<44} {len(values):>8} ' + ' '.join(f'{percentile(values, p) * ms:>9.1f}'
+                                                              for p in PERCENTILES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', default='50', help='число пользователей или список через запятую')
+    parser.add_argument('--duration', type=float, default=10, help='длительность прогона, с')
+    parser.add_argument('--think', type=float, default=0.0, help='средняя пауза пользователя между шагами, с')
+    parser.add_argument('--wizards', default=','.join(SCRIPTS), help='сценарии через запятую')
+    parser.add_argument('--slo', type=float, default=0.25, help='допустимый p99 задержки шага, с')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--limit-outbound', action='store_true',
+                        help='ограничивать исходящие сообщения как в боте (OutboundLimiter)')
+    args = parser.parse_args()
+
+    user_counts = [int(value) for value in args.users.split(',')]
+    reports = asyncio.run(run_load(user_counts, args.duration, args.think, args.wizards.split(','), args.seed,
+                                   args.limit_outbound))
+
+    if len(reports) > 1:
+        print(f'\n{"пользователей":>13} {"обн/с":>8} {"p99, мс":>9} {"RSS, МБ":>8}')
+        for report in reports:
+            print(f'{report.users:>13} {report.throughput:>8.0f} {report.p(99) * 1000:>9.1f} {report.rss_peak:>8.1f}')
+        over = next((report for report in reports if report.p(99) > args.slo), None)
+        print(f'\np99 > {args.slo * 1000:.0f} мс: ' + (f'с {over.users} пользователей' if over else 'не превышен'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Накладные расходы логирования в цикле событий: прежняя настройка (logging.basicConfig, запись в поток
+прямо из цикла) против очереди app/server/logs.py (запись в отдельном потоке), с текстовым и JSON-форматом
+и с выборкой aiogram.event.
+
+Нагрузка похожа на работающего бота: на каждое обновление aiogram.event пишет строку INFO
+«Update id=... is handled», каждое сотое обновление дает предупреждение. Для каждой настройки выводится
+время одного обновления в цикле событий (сколько цикл занят логированием, мкс) и общее время
+вместе с выводом оставшихся в очереди записей.
+
+Вывод: --sink devnull (по умолчанию), путь к файлу или slow — поток, каждая запись в который занимает
+--write-delay мкс (stderr, перенаправленный в загруженный journald или медленный терминал).
+
+Запуск из корня проекта:
+    python -m benchmarks.log_overhead
+    python -m benchmarks.log_overhead --sink slow --write-delay 200 --updates 5000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from app.server.logs import TEXT_FORMAT, log_context, setup_logging, stop_logging
+
+
+class SlowStream:
+    """Поток вывода, запись в который занимает delay секунд."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def write(self, text: str) -> None:
+        time.sleep(self.delay)
+
+    def flush(self) -> None:
+        pass
+
+
+def basic(stream) -> None:
+    logging.basicConfig(level=logging.INFO, format=TEXT_FORMAT, stream=stream, force=True)
+
+
+CONFIGS = {
+    'basicConfig': basic,
+    'queue text': lambda stream: setup_logging(logging.INFO, 'text', stream=stream),
+    'queue json': lambda stream: setup_logging(logging.INFO, 'json', stream=stream),
+    'queue json, aiogram.event=0.01': lambda stream: setup_logging(logging.INFO, 'json', {'aiogram.event': 0.01},
+                                                                   stream=stream),
+}
+
+
+async def workload(updates: int) -> float:
+    """Логирование updates обновлений; возвращает время, которое цикл событий провел в логировании."""
+    events = logging.getLogger('aiogram.event')
+    storage = logging.getLogger('app.storage.cached')
+    spent = 0.0
+    for update_id in range(updates):
+        token = log_context.set((update_id, 1000 + update_id % 50))
+        started = time.perf_counter()
+        events.info('Update id=%s is handled. Duration %d ms by bot id=%d', update_id, 12, 42)
+        if update_id % 100 == 0:
+            storage.warning('Кэш FSM: промах для чата %s', 1000 + update_id % 50)
+        spent += time.perf_counter() - started
+        log_context.reset(token)
+        if update_id % 50 == 0:
+            await asyncio.sleep(0)
+    return spent
+
+
+def measure(name: str, stream, updates: int) -> tuple[float, float]:
+    CONFIGS[name](stream)
+    started = time.perf_counter()
+    spent = asyncio.run(workload(updates))
+    stop_logging()
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+    return spent / updates, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--updates', type=int, default=20000, help='сколько обновлений залогировать')
+    parser.add_argument('--sink', default='devnull', help='devnull, slow или путь к файлу')
+    parser.add_argument('--write-delay', type=float, default=100, help='мкс на запись для --sink slow')
+    args = parser.parse_args()
+
+    print(f'{args.updates} обновлений, вывод: {args.sink}')
+    print(f'{"настройка":<34} {"в цикле, мкс/обновление":>24} {"всего с выводом, с":>20}')
+    for name in CONFIGS:
+        if args.sink == 'slow':
+            stream, close = SlowStream(args.write_delay / 1e6), None
+        else:
+            stream = open(os.devnull if args.sink == 'devnull' else args.sink, 'w', encoding='utf-8')
+            close = stream.close
+        per_update, total = measure(name, stream, args.updates)
+        print(f'{name:<34} {per_update * 1e6:>24.1f} {total:>20.2f}')
+        logging.getLogger().handlers.clear()
+        if close:
+            close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Воспроизведение записанных обновлений (UpdateRecorder, UPDATE_RECORD_DIR) на имитациях Bot API и Redis.
+
+Обновления из записи подаются в dp.feed_update с настоящими роутерами бота с теми же интервалами,
+что в записи, ускоренными в --speed раз (--speed 0 — без пауз, с максимальной скоростью). Обновления
+разных чатов обрабатываются параллельно, как в работающем боте. Окружение то же, что у нагрузочного
+стенда (benchmarks.load_harness): FakeTelegramServer, fakeredis, таблица доноров из donor_rows.py.
+
+Отчет: пропускная способность, перцентили задержки по обработчикам и по состояниям FSM, отставание
+от расписания записи, процессорное время и пиковый RSS. С --json итог сохраняется в файл, а --compare
+сравнивает прогон с сохраненным ранее (например, до и после изменения).
+
+Запуск из корня проекта (нужен requirements-dev.txt, .env и настройки бота не нужны):
+    python -m benchmarks.replay records/updates-*.jsonl.gz
+    python -m benchmarks.replay records/*.jsonl.gz --speed 10 --json before.json
+    python -m benchmarks.replay records/*.jsonl.gz --speed 0 --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import resource
+import time
+from pathlib import Path
+
+# load_harness первым: он задает настройки, без которых не импортируется config.
+from benchmarks.load_harness import TOKEN, Report, StepTimer, create_dispatcher, percentile, print_report, rss_mb
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Update
+from fakeredis import FakeAsyncRedis
+
+from app.blood_donor.database.donor_index import DonorIndex, set_donor_index
+from app.blood_donor.database.donor_rows import DONOR_ROWS
+from app.server.recorder import read_recording
+from app.testing.fake_telegram import FakeTelegramServer
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def feed(dp: Dispatcher, bot: Bot, timer: StepTimer, report: Report, update: Update) -> None:
+    started = time.perf_counter()
+    try:
+        await dp.feed_update(bot, update)
+    except Exception:
+        report.errors += 1
+    elapsed = time.perf_counter() - started
+
+    handler, step = timer.pop(update.update_id)
+    report.updates += 1
+    if handler == 'echo.echo':
+        report.unhandled += 1
+    report.all.append(elapsed)
+    report.by_handler[handler].append(elapsed)
+    report.by_step[step].append(elapsed)
+
+
+async def replay(paths: list[str], speed: float) -> tuple[Report, float, float]:
+    """Воспроизводит запись; возвращает отчет, наибольшее отставание от расписания и процессорное время."""
+    records = list(read_recording(*paths))
+    chats = {update.get('message', update.get('callback_query', {}).get('message', {})).get('chat', {}).get('id')
+             for _, update in records}
+
+    telegram = FakeTelegramServer()
+    await telegram.start()
+    bot = Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(telegram.url), limit=200))
+    dp, timer = create_dispatcher(FakeAsyncRedis())
+    set_donor_index(DonorIndex((recipient, compatible, indications)
+                               for _, recipient, compatible, indications in DONOR_ROWS))
+
+    report = Report(users=len(chats), rss_before=rss_mb())
+    max_lag = 0.0
+    tasks = []
+    cpu_before = cpu_seconds()
+    started = time.perf_counter()
+    try:
+        first = records[0][0] if records else 0.0
+        for number, (moment, data) in enumerate(records, 1):
+            if speed:
+                due = started + (moment - first) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                max_lag = max(max_lag, time.perf_counter() - due)
+            # update_id в записи могут повторяться между воркерами: нумеруем заново.
+            update = Update.model_validate({**data, 'update_id': number}, context={'bot': bot})
+            tasks.append(asyncio.create_task(feed(dp, bot, timer, report, update)))
+            if not speed and number % 100 == 0:
+                await asyncio.sleep(0)  # дать задачам начаться, не накапливая всю запись в очереди
+        await asyncio.gather(*tasks)
+    finally:
+        report.duration = time.perf_counter() - started
+        report.rss_peak = rss_mb()
+        await dp.storage.close()
+        await bot.session.close()
+        await telegram.close()
+    return report, max_lag, cpu_seconds() - cpu_before
+
+
+def summary(report: Report, max_lag: float, cpu: float) -> dict:
+    return {
+        'updates': report.updates,
+        'duration': round(report.duration, 3),
+        'throughput': round(report.throughput, 1),
+        'errors': report.errors,
+        'p50': report.p(50), 'p90': report.p(90), 'p99': report.p(99),
+        'max_lag': round(max_lag, 4),
+        'cpu': round(cpu, 3),
+        'rss_peak_mb': round(report.rss_peak, 1),
+        'handlers_p99': {name: percentile(sorted(values), 99) for name, values in report.by_handler.items()},
+    }
+
+
+def compare(before: dict, after: dict) -> None:
+    print(f'\n{"показатель":<48} {"было":>10} {"стало":>10} {"изменение":>10}')
+    rows = [(name, before.get(name), after.get(name)) for name in ('throughput', 'p50', 'p90', 'p99', 'cpu',
+                                                                    'rss_peak_mb')]
+    rows += [(f'p99 {name}', before.get('handlers_p99', {}).get(name), value)
+             for name, value in sorted(after['handlers_p99'].items())]
+    for name, old, new in rows:
+        change = f'{new / old - 1:+.0%}' if old and new is not None else '—'
+        old_text = '—' if old is None else f'{old:.4g}'
+        print(f'{name:<48} {old_text:>10} {new:>10.4g} {change:>10}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help='файлы записи (.jsonl.gz)')
+    parser.add_argument('--speed', type=float, default=1.0, help='ускорение относительно записи, 0 — без пауз')
+    parser.add_argument('--json', type=Path, help='сохранить итог прогона в файл')
+    parser.add_argument('--compare', type=Path, help='сравнить с итогом, сохраненным ранее через --json')
+    args = parser.parse_args()
+
+    report, max_lag, cpu = asyncio.run(replay(args.paths, args.speed))
+    print_report(report)
+    print(f'отставание от расписания: {max_lag * 1000:.1f} мс; процессорное время: {cpu:.2f} с')
+
+    result = summary(report, max_lag, cpu)
+    if args.json:
+        args.json.write_text(json.dumps(result, ensure_ascii=False, indent=2) + '\n')
+    if args.compare:
+        compare(json.loads(args.compare.read_text()), result)
+
+
+if __name__ == '__main__':
+    main()
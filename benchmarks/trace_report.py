@@ -0,0 +1,86 @@
+"""
+Отчет по трассам обновлений (Tracer, TRACE_DIR): самые медленные обновления и их критический путь.
+
+Для каждого из --top самых долгих обновлений выводится критический путь — последовательность
+обращений к хранилищу FSM (fsm), PostgreSQL (db), Bot API (telegram) и собственного времени бота (self),
+из которых сложилась длительность обновления. В конце — доля каждого вида в критических путях
+выведенных обновлений: что тормозит чаще — Redis, база данных или Telegram.
+
+Запуск из корня проекта:
+    python -m benchmarks.trace_report traces/
+    python -m benchmarks.trace_report traces/trace-0.jsonl traces/trace-0.jsonl.1 --top 5 --handler sofa_router
+"""
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from app.server.tracing import critical_path
+
+KINDS = ('fsm', 'db', 'telegram', 'self')
+
+
+def read_traces(paths: list[Path]) -> list[dict]:
+    """Трассы из файлов; каталог — все trace-*.jsonl* в нем, включая ротированные."""
+    files = []
+    for path in paths:
+        files.extend(sorted(path.glob('trace-*.jsonl*')) if path.is_dir() else [path])
+    traces = []
+    for file in files:
+        with open(file, encoding='utf-8') as lines:
+            traces.extend(json.loads(line) for line in lines if line.strip())
+    return traces
+
+
+def print_trace(record: dict) -> dict[str, float]:
+    """Печатает критический путь обновления и возвращает время по видам обращений."""
+    ms = 1000
+    duration = record['duration']
+    print(f'\nupdate {record["update_id"]} ({record["type"]}) {record.get("handler") or "—"} '
+          f'[{record.get("state") or "—"}]: {duration * ms:.1f} мс'
+          + (f', ошибка {record["error"]}' if record.get('error') else ''))
+
+    by_kind: dict[str, float] = defaultdict(float)
+    for item in critical_path(record):
+        by_kind[item['kind']] += item['duration']
+        share = item['duration'] / duration if duration else 0.0
+        error = f' ({item["error"]})' if item.get('error') else ''
+        print(f'  +{item["start"] * ms:8.1f} мс {item["duration"] * ms:8.1f} мс {share:>5.0%}  '
+              f'{item["kind"]:<8} {item["name"]}{error}')
+    return by_kind
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', type=Path, help='файлы трасс или каталог TRACE_DIR')
+    parser.add_argument('--top', type=int, default=10, help='сколько самых медленных обновлений вывести')
+    parser.add_argument('--handler', help='только обработчики, в имени которых есть эта строка')
+    parser.add_argument('--type', help='только обновления этого типа (message, callback_query, ...)')
+    args = parser.parse_args()
+
+    traces = read_traces(args.paths)
+    if args.handler:
+        traces = [record for record in traces if args.handler in (record.get('handler') or '')]
+    if args.type:
+        traces = [record for record in traces if record['type'] == args.type]
+    if not traces:
+        print('Трасс нет')
+        return
+
+    durations = sorted(record['duration'] for record in traces)
+    print(f'трасс: {len(traces)}, медиана {durations[len(durations) // 2] * 1000:.1f} мс, '
+          f'максимум {durations[-1] * 1000:.1f} мс')
+
+    slowest = sorted(traces, key=lambda record: record['duration'], reverse=True)[:args.top]
+    totals: dict[str, float] = defaultdict(float)
+    for record in slowest:
+        for kind, seconds in print_trace(record).items():
+            totals[kind] += seconds
+
+    total = sum(totals.values())
+    print(f'\nкритический путь {len(slowest)} самых медленных обновлений: '
+          + ', '.join(f'{kind} {totals[kind] / total:.0%}' for kind in KINDS if total))
+
+
+if __name__ == '__main__':
+    main()
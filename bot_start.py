@@ -1,23 +1,43 @@
 from aiogram import Router, types, F
-from aiogram.filters import CommandStart
+from aiogram.filters import CommandObject, CommandStart
 from aiogram.types import CallbackQuery
 from aiogram.utils.markdown import hbold
 from aiogram.fsm.context import FSMContext
 
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
-user_router = Router()
+from app.anesthetic_risk.handlers.inline_anest import anesthesia_wizard
+from app.skf.handlers.inline_skf import skf_wizard
+from app.sofa.handlers.inline_sofa import sofa_wizard
+from app.wizard.links import WizardLinks
+
+user_router = Router(name='start_router')
+
+# Ссылки на бота, открывающие сценарий с известными ответами: t.me/<бот>?start=<wizard_links.payload(...)>.
+wizard_links = WizardLinks(anesthesia_wizard, skf_wizard, sofa_wizard)
 
 
 @user_router.message(CommandStart())
-async def command_start(message: types.Message, state: FSMContext):
+async def command_start(message: types.Message, state: FSMContext, command: CommandObject,
+                        wizard_mode: str = 'reply'):
     """
     Функция, которая обрабатывает команду /start, отправленную пользователем.
 
+    Если пользователь пришел по ссылке на сценарий (/start <payload>, см. wizard_links), сценарий
+    открывается сразу с известными из ссылки ответами: первый вопрос без ответа или готовый результат.
+
     :arg message (types.Message): Объект, содержащий информацию о сообщении пользователя.
+    :arg command (CommandObject): Команда и payload ссылки.
+    :arg wizard_mode (str): Режим сценариев ('reply' или 'inline'), задается в run.register_routers.
     :return Ничего не возвращает, но отправляет приветственное сообщение пользователю и
     предлагает выбрать команду.
     """
+    link = wizard_links.decode(command.args) if command.args else None
+    if link is not None:
+        wizard, answers = link
+        await wizard.open(message, state, dict(answers), inline=wizard_mode == 'inline')
+        return
+
     await state.clear()  # автоматический сброс закрытие сценария заполнения.
 
     await message.reply(f'Добро пожаловать пользователь, {hbold(message.from_user.full_name)}!')
@@ -3,30 +3,162 @@ import os
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
-from asyncpg_lite import DatabaseManager
 
-from aiogram.fsm.storage.redis import RedisStorage
+from app.database.pool import DatabasePool
+from app.server.executor import ChatOrderedExecutor
+from app.server.logs import parse_rates
+from app.server.memprofile import MemoryProfiler
+from app.server.metrics import Metrics
+from app.server.outbound import OutboundLimiter
+from app.server.recorder import UpdateRecorder
+from app.server.tracing import TracedStorage, TraceRequests, Tracer
+from app.server.watchdog import LoopWatchdog
+from app.storage.cached import CachedStorage
+from app.storage.failover import FailoverStorage
+from app.storage.redis_hash import HashRedisStorage
+from app.storage.sessions import SessionRegistry, SessionSweeper
 
 load_dotenv()
 
 TOKEN = str(os.getenv('BOT_TOKEN'))
 
 
-# Deletion_password - нужен для дополнительной защиты в критических операциях.
-# Взамодействие с базой данных.
-db_manager = DatabaseManager(db_url=os.getenv('PG_LINK'), deletion_password=os.getenv('ROOT_PASS'))
+# Взамодействие с базой данных: общий пул соединений процесса (PG_POOL_MIN-PG_POOL_MAX соединений),
+# открывается при старте бота. PG_STATEMENT_CACHE — сколько подготовленных запросов хранит соединение.
+db_pool = DatabasePool(os.getenv('PG_LINK'),
+                       min_size=int(os.getenv('PG_POOL_MIN', 1)),
+                       max_size=int(os.getenv('PG_POOL_MAX', 10)),
+                       statement_cache_size=int(os.getenv('PG_STATEMENT_CACHE', 100)),
+                       command_timeout=float(os.getenv('PG_TIMEOUT', 5)))
+
+# Адрес Bot API. По умолчанию https://api.telegram.org, можно указать локальный Bot API сервер.
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL')
+
+session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else AiohttpSession()
+
+# Трассировка обновлений: обращения к хранилищу FSM, PostgreSQL и Bot API пишутся в TRACE_DIR/trace-<воркер>.jsonl
+# (ротация по TRACE_MAX_MB МБ, TRACE_BACKUPS старых файлов). Записывается доля TRACE_SAMPLE обновлений
+# и все обновления дольше TRACE_SLOW секунд. Пустой TRACE_DIR — трассировка выключена.
+TRACE_DIR = os.getenv('TRACE_DIR')
+tracer = Tracer(TRACE_DIR, sample_rate=float(os.getenv('TRACE_SAMPLE', 0.01)),
+                slow=float(os.getenv('TRACE_SLOW', 1)),
+                max_bytes=int(float(os.getenv('TRACE_MAX_MB', 10)) * 1024 * 1024),
+                backup_count=int(os.getenv('TRACE_BACKUPS', 5))) if TRACE_DIR else None
+# Первым в сессии: время метода Bot API включает ожидание в очереди исходящих сообщений.
+if tracer is not None:
+    session.middleware(TraceRequests())
+
+# Исходящие сообщения ставятся в очередь под лимиты Telegram: TG_GLOBAL_RATE сообщений в секунду на бота,
+# TG_CHAT_RATE в секунду в личный чат, TG_GROUP_RATE в минуту в группу. На ответ 429 запрос повторяется
+# после retry_after, не более TG_MAX_RETRIES раз.
+outbound = OutboundLimiter(global_rate=float(os.getenv('TG_GLOBAL_RATE', 30)),
+                           chat_rate=float(os.getenv('TG_CHAT_RATE', 1)),
+                           group_rate=float(os.getenv('TG_GROUP_RATE', 20)),
+                           max_retries=int(os.getenv('TG_MAX_RETRIES', 3)))
+session.middleware(outbound)
 
 # инициируем объект бота, передавая ему parse_mode=ParseMode.HTML по умолчанию
-bot = Bot(TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+bot = Bot(TOKEN, session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
 
 # хранения данных FSM Redis
 redis_url = os.getenv('REDIS_URL')
 
+# Время жизни сессии сценария в Redis (секунды), продлевается на каждом шаге: FSM_TTL — по умолчанию,
+# FSM_TTL_<СЦЕНАРИЙ> — для отдельного сценария. Сценарии регистрируются в run.py.
+FSM_TTL = int(os.getenv('FSM_TTL', 3600))
+FSM_TTL_WIZARDS = {name: int(os.getenv(f'FSM_TTL_{name.upper()}', FSM_TTL))
+                   for name in ('anesthetic_risk', 'skf', 'donor', 'sofa')}
+sessions = SessionRegistry(default_ttl=FSM_TTL)
+
 # используется для хранения данных конечного автомата состояний (FSM) в Redis.
-storage = RedisStorage.from_url(os.getenv('REDIS_URL'))
+# Данные сценария хранятся в хэше, шаг сценария записывается одним Lua-скриптом.
+redis_storage = HashRedisStorage.from_url(os.getenv('REDIS_URL'), state_ttl=sessions.ttl)
+
+# Перед Redis — кэш сессий в памяти процесса (FSM_CACHE_SIZE чатов, неактивные дольше
+# FSM_CACHE_IDLE секунд вытесняются), сбрасываемый при записи из других процессов.
+cached_storage = CachedStorage(redis_storage,
+                               max_size=int(os.getenv('FSM_CACHE_SIZE', 10000)),
+                               idle_ttl=float(os.getenv('FSM_CACHE_IDLE', 600)))
+
+# Каждое обращение к Redis ограничено FSM_REDIS_TIMEOUT секундами. Если Redis не отвечает, сессии
+# обслуживаются из памяти процесса (не более FSM_FAILOVER_SESSIONS), после восстановления переносятся в Redis.
+storage = FailoverStorage(cached_storage, health_check=redis_storage.redis.ping, last_known=cached_storage.peek,
+                          timeout=float(os.getenv('FSM_REDIS_TIMEOUT', 0.5)),
+                          max_sessions=int(os.getenv('FSM_FAILOVER_SESSIONS', 10000)))
+
+# Раз в FSM_SWEEP_INTERVAL секунд в лог пишется количество и объем сессий и число истекших ключей.
+sweeper = SessionSweeper(redis_storage, sessions, interval=float(os.getenv('FSM_SWEEP_INTERVAL', 300)))
+
+# Обновления разных чатов обрабатываются параллельно (не более MAX_CONCURRENT_UPDATES одновременно),
+# обновления одного чата — строго по очереди, но только внутри процесса: при WEB_WORKERS > 1 обновления
+# одного чата могут прийти в разные воркеры и обработаться одновременно.
+executor = ChatOrderedExecutor(limit=int(os.getenv('MAX_CONCURRENT_UPDATES', 100)))
 
 # инициируем объект бота
-dp = Dispatcher(storage=storage)
+dp = Dispatcher(storage=TracedStorage(storage) if tracer is not None else storage, events_isolation=executor)
+
+ADMIN_ID=int(os.getenv('ADMIN_ID'))
+
+# Логирование через очередь (запись в stderr — в отдельном потоке): уровень, формат ('text' или 'json')
+# и доля записей ниже WARNING по логгерам, например LOG_SAMPLE=aiogram.event=0.01.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_SAMPLE = parse_rates(os.getenv('LOG_SAMPLE'))
+
+# Запись входящих обновлений для воспроизведения (python -m benchmarks.replay). Включается, если задан
+# UPDATE_RECORD_DIR; id пользователей и чатов заменяются псевдонимами с секретом UPDATE_RECORD_SALT.
+UPDATE_RECORD_DIR = os.getenv('UPDATE_RECORD_DIR')
+recorder = UpdateRecorder(UPDATE_RECORD_DIR, salt=os.getenv('UPDATE_RECORD_SALT') or TOKEN) \
+    if UPDATE_RECORD_DIR else None
+
+# Метрики обработчиков и хранилищ в формате Prometheus: GET http://METRICS_HOST:METRICS_PORT/metrics.
+# Воркер с номером N слушает METRICS_PORT + N. METRICS_PORT=0 — сервер метрик не запускается.
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9100))
+metrics = Metrics()
+metrics.add_source('outbound', outbound.stats)
+metrics.add_source('db_pool', db_pool.stats)
+metrics.add_source('fsm_cache', cached_storage.stats)
+metrics.add_source('fsm_failover', storage.stats)
+metrics.add_source('executor', executor.stats)
+
+# Отставание цикла событий замеряется каждые LOOP_LAG_INTERVAL секунд; если цикл заблокирован дольше
+# LOOP_STALL_THRESHOLD секунд, в лог пишется стек блокирующего вызова с типом обновления и обработчиком.
+watchdog = LoopWatchdog(interval=float(os.getenv('LOOP_LAG_INTERVAL', 0.1)),
+                        threshold=float(os.getenv('LOOP_STALL_THRESHOLD', 0.5)))
+metrics.add_source('event_loop', watchdog.stats)
+metrics.add_histogram('bot_event_loop_lag_seconds', 'Отставание цикла событий, сек.', watchdog.lag)
+
+# Снимки памяти по команде администратора /memprofile (tracemalloc). Пока профилирование не включено
+# командой, tracemalloc выключен; MEMPROFILE_FRAMES — глубина стека, сохраняемая для каждой аллокации.
+memory_profiler = MemoryProfiler(frames=int(os.getenv('MEMPROFILE_FRAMES', 10)))
+
+# Режим получения обновлений: 'polling' (по умолчанию) или 'webhook'.
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+
+# Режим сценариев SOFA, СКФ и риска анестезии: 'reply' (по умолчанию) — вопрос каждого шага новым сообщением
+# с обычной клавиатурой, 'inline' — одно сообщение на сессию, которое правится на каждом шаге (app/wizard/inline.py).
+WIZARD_MODE = os.getenv('WIZARD_MODE', 'reply')
+
+# Inline-режим ('@бот skf ж 67 94' в любом чате, включается у @BotFather командой /setinline): сколько секунд
+# Telegram кэширует ответ, пауза в наборе перед вычислением запроса (в секундах), размер и время жизни
+# кэша ответов в памяти процесса.
+INLINE_CACHE_TIME = int(os.getenv('INLINE_CACHE_TIME', 300))
+INLINE_DEBOUNCE = float(os.getenv('INLINE_DEBOUNCE', 0.3))
+INLINE_CACHE_SIZE = int(os.getenv('INLINE_CACHE_SIZE', 1000))
+INLINE_CACHE_TTL = float(os.getenv('INLINE_CACHE_TTL', 600))
+
+# Настройки webhook: публичный адрес (https://example.com), путь и секрет для заголовка
+# X-Telegram-Bot-Api-Secret-Token.
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
 
-ADMIN_ID=int(os.getenv('ADMIN_ID'))
\ No newline at end of file
+# Локальный aiohttp-сервер, принимающий webhook, и количество процессов-воркеров на одном порту.
+# Порядок обновлений одного чата (ChatOrderedExecutor) соблюдается только внутри воркера.
+WEB_SERVER_HOST = os.getenv('WEB_SERVER_HOST', '0.0.0.0')
+WEB_SERVER_PORT = int(os.getenv('WEB_SERVER_PORT', 8080))
+WEB_WORKERS = int(os.getenv('WEB_WORKERS', 1))
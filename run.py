@@ -1,24 +1,86 @@
 import asyncio
 import logging
+import multiprocessing
+import signal
 
 import bot_start
-from app.other_files import echo, feedback_project
-from app.anesthetic_risk.handlers import handler_main_anest
+from app.other_files import admin_stats, echo, feedback_project
+from app.anesthetic_risk.handlers import handler_main_anest, inline_anest
+from app.blood_donor.database.donor_index import reload_donor_index
 from app.blood_donor.handlers import handler_donor
-from app.skf.handlers import handler_main_skf
-from app.sofa.handlers import handler_main_sofa
+from app.inline_query import handler_inline_query
+from app.server.logs import LogContext, setup_logging
+from app.server.metrics import create_metrics_app, setup_metrics
+from app.server.tracing import setup_tracing
+from app.server.webhook import create_app, start_server
+from app.skf.handlers import handler_main_skf, handler_oneshot_skf, inline_skf
+from app.sofa.handlers import handler_main_sofa, handler_oneshot_sofa, inline_sofa
+
+from config import (dp, bot, ADMIN_ID, BOT_MODE, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET,
+                    WEB_SERVER_HOST, WEB_SERVER_PORT, WEB_WORKERS, FSM_TTL_WIZARDS, sessions, sweeper, db_pool,
+                    recorder, metrics, METRICS_HOST, METRICS_PORT, watchdog, tracer,
+                    LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE, WIZARD_MODE)
+
+from aiogram import Dispatcher
+from aiogram.types import BotCommand, BotCommandScopeDefault
 
-from config import dp, bot, ADMIN_ID
 
-from aiogram.types import BotCommand, BotCommandScopeDefault
+# Сервер метрик процесса (on_startup), останавливается в on_shutdown.
+metrics_runner = None
+
+
+async def on_startup(worker_index: int = 0):
+    # Сторож цикла событий — первым, чтобы видеть и блокировки при старте.
+    watchdog.start()
+
+    # Пул соединений с базой данных у каждого воркера свой. Таблица donor загружается в память;
+    # если база данных недоступна, пул откроется при первом запросе, а /donor будет обращаться к ней.
+    try:
+        await db_pool.open()
+        await reload_donor_index()
+    except Exception:
+        logging.exception('Не удалось загрузить индекс доноров, /donor будет обращаться к базе данных')
+
+    if recorder is not None:
+        recorder.open(worker_index)
+    if tracer is not None:
+        tracer.open(worker_index)
+
+    # Сервер метрик у каждого воркера свой, на соседнем порту.
+    global metrics_runner
+    if METRICS_PORT:
+        metrics_runner = await start_server(create_metrics_app(metrics), METRICS_HOST, METRICS_PORT + worker_index)
+
+    # Webhook регистрирует и сообщение администратору отправляет только первый воркер.
+    if worker_index:
+        return
+
+    # Проверка сессий FSM в Redis: одной задачи достаточно на все воркеры.
+    sweeper.start()
 
+    if BOT_MODE == 'webhook':
+        await bot.set_webhook(url=f'{WEBHOOK_URL}{WEBHOOK_PATH}', secret_token=WEBHOOK_SECRET,
+                              allowed_updates=dp.resolve_used_update_types())
 
-async def on_startup():
     await bot.send_message(chat_id=ADMIN_ID, text=f'🤩 Бот запущен!')
 
 
-async def on_shutdown():
-    await bot.send_message(chat_id=ADMIN_ID, text=f'🤨 Внимание, бот остановлен!')
+async def on_shutdown(worker_index: int = 0):
+    if not worker_index:
+        if BOT_MODE == 'webhook':
+            await bot.delete_webhook()
+
+        await bot.send_message(chat_id=ADMIN_ID, text=f'🤨 Внимание, бот остановлен!')
+
+    await sweeper.stop()
+    await watchdog.stop()
+    if metrics_runner is not None:
+        await metrics_runner.cleanup()
+    await db_pool.close()
+    if recorder is not None:
+        recorder.close()
+    if tracer is not None:
+        tracer.close()
     # Закрываем сессию бота, освобождая ресурсы
     await bot.session.close()
 
@@ -37,43 +99,143 @@ async def set_commands():
     await bot.set_my_commands(commands, BotCommandScopeDefault())
 
 
-async def main():
-    # регистрация роутеров
+def register_routers(dispatcher: Dispatcher = dp, wizard_mode: str = WIZARD_MODE):
+    """
+    Регистрация роутеров. Порядок важен: echo_router должен быть последним.
+    Сценарии SOFA, СКФ и риска анестезии подключаются в режиме wizard_mode ('reply' или 'inline').
+    """
+    if wizard_mode == 'inline':
+        anesthesia, skf, sofa = (inline_anest.anesthesia_inline_router, inline_skf.skf_inline_router,
+                                 inline_sofa.sofa_inline_router)
+    else:
+        anesthesia, skf, sofa = (handler_main_anest.anesthesia_router, handler_main_skf.skf_router,
+                                 handler_main_sofa.sofa_router)
+    # Режим сценариев для обработчиков: ссылка на сценарий (bot_start) открывает его в том же режиме.
+    dispatcher['wizard_mode'] = wizard_mode
 
-    dp.include_routers(
+    dispatcher.include_routers(
 
         bot_start.user_router,  # команда /start
 
         feedback_project.user_router,  # callback 'Обратная связь'
 
-        handler_main_anest.anesthesia_router,  # команда /anesthetic risk
+        admin_stats.admin_router,  # команды администратора /stats, /memprofile, /reload_donors
+
+        anesthesia,  # команда /anesthetic risk
+
+        handler_oneshot_skf.skf_oneshot_router,  # команда /skf с полом, возрастом и креатинином в одном сообщении
 
-        handler_main_skf.skf_router,  # команда /skf
+        skf,  # команда /skf
 
         handler_donor.donor_router,  # команда /donor
 
-        handler_main_sofa.sofa_router,  # команда /sofa
+        handler_inline_query.inline_query_router,  # inline-запросы '@бот skf ж 67 94'
+
+        handler_oneshot_sofa.sofa_oneshot_router,  # команда /sofa с показателями в одном сообщении
+
+        sofa,  # команда /sofa
 
         echo.echo_router  # неизвестная команда
     )
 
+
+def register_sessions():
+    """Сценарии бота и время жизни их сессий в Redis (FSM_TTL_<СЦЕНАРИЙ> в .env)."""
+
+    sessions.register('anesthetic_risk', handler_main_anest.Reg, FSM_TTL_WIZARDS['anesthetic_risk'])
+
+    sessions.register('skf', handler_main_skf.Reg, FSM_TTL_WIZARDS['skf'])
+
+    sessions.register('donor', handler_donor.Reg, FSM_TTL_WIZARDS['donor'])
+
+    sessions.register('sofa', handler_main_sofa.Reg, FSM_TTL_WIZARDS['sofa'])
+
+
+async def run_webhook(worker_index: int = 0):
+    """
+    Прием обновлений через webhook: aiohttp-сервер передает каждое обновление в dp.feed_update.
+    Работает до SIGINT/SIGTERM.
+    """
+    app = create_app(dp, bot, WEBHOOK_PATH, WEBHOOK_SECRET)
+    runner = await start_server(app, WEB_SERVER_HOST, WEB_SERVER_PORT, reuse_port=WEB_WORKERS > 1)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await dp.emit_startup(bot=bot, dispatcher=dp, worker_index=worker_index)
+    try:
+        await stop.wait()
+    finally:
+        await runner.cleanup()
+        await dp.emit_shutdown(bot=bot, dispatcher=dp, worker_index=worker_index)
+
+
+async def main(worker_index: int = 0):
+    # регистрация роутеров и сроков жизни сессий сценариев
+    register_routers()
+    register_sessions()
+
+    # update_id и id чата в каждой записи лога, сделанной при обработке обновления.
+    dp.update.outer_middleware(LogContext())
+
+    # Запись входящих обновлений (UPDATE_RECORD_DIR) — до всех обработчиков.
+    if recorder is not None:
+        dp.update.outer_middleware(recorder)
+
+    # Метрики: число и время обработки обновлений, время обработчиков, переходы сценариев.
+    # Сторож цикла событий по стеку блокирующего вызова определяет обработчик.
+    setup_metrics(dp, metrics)
+    metrics.add_source('inline_query', handler_inline_query.inline_calculators.stats)
+
+    # Пауза в наборе inline-запросов — до FSM-middleware, вне очереди чата пользователя.
+    handler_inline_query.inline_calculators.setup(dp)
+    watchdog.watch_router(dp)
+
+    # Трассировка обращений к FSM, PostgreSQL и Bot API по обновлениям (TRACE_DIR).
+    if tracer is not None:
+        setup_tracing(dp, tracer)
+
     # Регистрируем функцию, которая будет вызвана при старте бота
     dp.startup.register(on_startup)
 
     # Регистрируем функцию, которая будет вызвана при остановке бота
     dp.shutdown.register(on_shutdown) # Ctrl-C для остановки бота и вывода сообщения
 
-    await set_commands()  # Командное меню.
+    if not worker_index:
+        await set_commands()  # Командное меню.
 
-    await dp.start_polling(bot)
+    if BOT_MODE == 'webhook':
+        await run_webhook(worker_index)
+    else:
+        await dp.start_polling(bot)
 
 
+def run_worker(worker_index: int):
+    """Точка входа процесса-воркера в режиме webhook с WEB_WORKERS > 1."""
+    setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE)
+    asyncio.run(main(worker_index))
+
 
 if __name__ == '__main__':
-    # в терминале выводит ход запросов/работы бота
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # в терминале выводит ход запросов/работы бота; вывод — в отдельном потоке (app/server/logs.py)
+    setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE)
     logger = logging.getLogger(__name__)
-    if True:
+
+    if BOT_MODE == 'webhook' and WEB_WORKERS > 1:
+        # Несколько процессов слушают один порт (SO_REUSEPORT). spawn: каждый воркер
+        # заново импортирует config и получает собственные bot, dp и соединения.
+        context = multiprocessing.get_context('spawn')
+        workers = [context.Process(target=run_worker, args=(index,)) for index in range(WEB_WORKERS)]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            # Ctrl-C получают и воркеры: дожидаемся их штатной остановки.
+            for worker in workers:
+                worker.join()
+    else:
         asyncio.run(main())
-    elif False:
-        print("exit")